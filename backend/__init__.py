@@ -5,13 +5,16 @@ from pathlib import Path
 from flask import Flask
 from flask.blueprints import Blueprint
 from flask.globals import request
-from flask.json import jsonify
 from flask_migrate import Migrate
 
 
 from backend import blueprints
 from backend.database import setup_db, reset_db, db
-from backend.services.auth import AuthError
+from backend.services.auth import AuthError, setup_auth
+from backend.services.cache import setup_cache
+from backend.services.ingest import ingest_cli
+from backend.services.metrics import setup_metrics
+from backend.services.serialization import jsonify, setup_json
 
 
 APP_ROOT = Path(os.path.abspath(os.path.dirname(__file__))).parents[0]
@@ -34,6 +37,9 @@ def create_app(test_config=None):
         'config/production.py' if not test_config else test_config
     )
 
+    # Setting up JSON serialization
+    setup_json(app)
+
     # Registering blueprints
     route_blueprints = [
         bp[1] for bp in inspect.getmembers(blueprints)
@@ -52,6 +58,18 @@ def create_app(test_config=None):
     migrate = Migrate()
     migrate.init_app(app, db)
 
+    # Setting up auth key store
+    setup_auth(app)
+
+    # Setting up response cache
+    setup_cache(app)
+
+    # Recording request metrics
+    setup_metrics(app)
+
+    # Registering CLI commands
+    app.cli.add_command(ingest_cli)
+
     # Baseline error handlers
     @app.errorhandler(400)
     def bad_request(error):
@@ -1,4 +1,6 @@
 from .auctions import auction_routes
 from .items import item_routes
 from .home import home_routes
+from .metrics import metrics_routes
+from .snapshots import snapshot_routes
 from .auth import auth_routes
@@ -1,37 +1,346 @@
-from typing import Any
+from datetime import datetime
+from functools import wraps
+from typing import Any, Optional
 
-from flask import Blueprint, jsonify, abort, request
-from sqlalchemy import exc
+from flask import Blueprint, abort, request, current_app
+from sqlalchemy import Integer, any_, bindparam, exc
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql.sqltypes import DateTime
 
 from backend.services.auth import requires_auth
-from backend.database.models import Auction, Item
+from backend.services.cache import cached_response
+from backend.services.catalogue import item_catalogue
+from backend.services.export import (
+    NDJSON_MIMETYPE,
+    ndjson_response,
+    wants_ndjson
+)
+from backend.services.ingest import iter_ndjson, load_auctions
+from backend.services.lookup import IdsError, get_lookup_ids, lookup_response
+from backend.services.pagination import (
+    CursorError,
+    after_cursor,
+    decode_cursor,
+    encode_cursor,
+    get_page_limit
+)
+from backend.services.serialization import (
+    get_fields,
+    jsonify,
+    parse_timestamp,
+    serialize_rows,
+    with_columns
+)
+from backend.database.replica import read_from_replica
+from backend.database.models import Auction
+from backend.database.models.auction import TIME_LEFT_VALUES
+from backend.database.storage import (
+    READ_ONLY_MESSAGE,
+    auction_model,
+    storage_mode
+)
 
 auction_routes = Blueprint('auction_routes', __name__)
+read_from_replica(auction_routes)
+
+
+def get_latest_auction(id: int):
+    """Gets the most recent snapshot of an auction.
+
+    Args:
+        id (int): Auction id.
+    """
+    model = auction_model()
+
+    return model.query.filter(model.id == id) \
+        .order_by(model.timestamp.desc()).first()
+
+
+def get_latest_auctions(ids: list) -> dict:
+    """Gets the most recent snapshot of several auctions in a single query.
+
+    Args:
+        ids (list): Auction ids.
+
+    Returns:
+        dict: Auctions by id, for the auctions that exist.
+    """
+    model = auction_model()
+    ids = bindparam(None, sorted(set(ids)), type_=ARRAY(Integer))
+    # DISTINCT ON keeps the first row of each id, the latest one
+    auctions = model.query.filter(model.id == any_(ids)) \
+        .distinct(model.id).order_by(model.id, model.timestamp.desc())
+
+    return {auction.id: auction for auction in auctions}
+
+
+def _lookup_auctions():
+    try:
+        ids = get_lookup_ids()
+    except IdsError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    try:
+        return lookup_response('auctions', ids, {
+            id: auction.serialize()
+            for id, auction in get_latest_auctions(ids).items()
+        })
+
+    except exc.DBAPIError:
+        abort(400)
+
+
+def writes_auctions(f):
+    """Rejects a route with 409 when auctions are stored as deltas."""
+    @wraps(f)
+    def wrapper(*args, **kwargs):
+        if storage_mode() == 'delta':
+            return jsonify({
+                'success': False,
+                'message': READ_ONLY_MESSAGE
+            }), 409
+
+        return f(*args, **kwargs)
+
+    return wrapper
+
+
+def _filter_auctions(query, model, args):
+    """Applies the filters of GET /auctions to a query.
+
+    Args:
+        query (BaseQuery): Query over the auctions.
+        model (Model): Model the auctions are read through.
+        args (MultiDict): Query parameters of the request.
+
+    Raises:
+        ValueError: A filter value is malformed.
+
+    Returns:
+        BaseQuery: The filtered query.
+    """
+    item_ids = [int(value) for value in args.getlist('item_id')]
+    time_left = args.getlist('time_left')
+
+    if item_ids:
+        query = query.filter(model.item_id.in_(item_ids))
+
+    if time_left:
+        if not set(time_left).issubset(TIME_LEFT_VALUES):
+            raise ValueError(f"'{time_left}' is not a valid time left.")
+
+        query = query.filter(model.time_left.in_(time_left))
+
+    if 'min_price' in args:
+        query = query.filter(model.unit_price >= int(args['min_price']))
+
+    if 'max_price' in args:
+        query = query.filter(model.unit_price <= int(args['max_price']))
+
+    if 'from' in args:
+        query = query.filter(
+            model.timestamp >= parse_timestamp(args['from'])
+        )
+
+    if 'to' in args:
+        query = query.filter(
+            model.timestamp < parse_timestamp(args['to'])
+        )
+
+    return query
+
+
+def _sortable_columns(pinned: set) -> set:
+    """Names of the columns an index returns auctions ordered by.
+
+    A column qualifies when it is part of an index or the primary key and
+    every column before it in that index is fixed by an equality filter,
+    e.g. `unit_price` once a single `item_id` is requested. The indexes
+    of `auctions` define the sorts of both storage modes.
+
+    Args:
+        pinned (set): Names of the columns fixed by equality filters.
+    """
+    table = Auction.__table__
+    keys = [index.columns for index in table.indexes]
+    keys.append(table.primary_key.columns)
+    sortable = set()
+
+    for columns in keys:
+        for column in columns:
+            sortable.add(column.name)
+
+            if column.name not in pinned:
+                break
+
+    return sortable
+
+
+def _decode_sort_key(cursor: str, columns: tuple) -> list:
+    """Decodes a cursor into values of the given sort key columns.
+
+    Raises:
+        CursorError: The cursor does not match the sort key.
+        ValueError: A value of the cursor is malformed.
+    """
+    values = decode_cursor(cursor, len(columns))
+
+    for index, (column, value) in enumerate(zip(columns, values)):
+        if value is None:
+            if not column.nullable:
+                raise CursorError(f"'{cursor}' is not a valid cursor.")
+        elif isinstance(column.type, DateTime):
+            values[index] = parse_timestamp(value)
+        else:
+            values[index] = int(value)
+
+    return values
 
 
 @auction_routes.get('/auctions')
 @requires_auth('get:auctions')
+@cached_response('auctions')
 def get_auctions(jwt: str):
-    """Gets all auctions.
+    """Gets a page of auctions, ordered by timestamp and id by default.
+
+    With `?format=ndjson` or `Accept: application/x-ndjson` every auction
+    after the cursor is streamed instead, one JSON object per line.
+
+    With `ids` the latest snapshot of each of those auctions is returned
+    instead, like `POST /auctions/lookup` does, and the other arguments do
+    not apply.
+
+    Args:
+        ids (str, optional): Comma separated auction ids to look up.
+        limit (int, optional): Maximum number of auctions to return.
+        after (str, optional): Cursor returned as `next` by the previous page.
+        format (str, optional): `ndjson` to stream the whole result.
+        fields (str, optional): Comma separated fields to return, e.g.
+        `id,unit_price,quantity`. Defaults to every field.
+        item_id (int, optional): Only auctions of this item, repeatable.
+        time_left (str, optional): Only auctions with this time left,
+        repeatable.
+        min_price (int, optional): Inclusive lower bound of the unit price.
+        max_price (int, optional): Inclusive upper bound of the unit price.
+        from (datetime, optional): Inclusive ISO-8601 lower bound.
+        to (datetime, optional): Exclusive ISO-8601 upper bound.
+        sort (str, optional): Indexed column to sort by, prefixed with `-`
+        for a descending order. Defaults to `timestamp`.
     """
+    if 'ids' in request.args:
+        return _lookup_auctions()
+
+    sort = request.args.get('sort', 'timestamp')
+    descending = sort.startswith('-')
+    sort = sort.lstrip('-')
+    pinned = {'item_id'} if len(request.args.getlist('item_id')) == 1 \
+        else set()
+
+    sortable = _sortable_columns(pinned)
+
+    if sort not in sortable:
+        message = (f"Cannot sort by '{sort}' without an index. Sortable "
+                   f"columns are {', '.join(sorted(sortable))}.")
+
+        if not pinned:
+            message += ' Filtering by a single item_id allows more.'
+
+        return jsonify({'success': False, 'message': message}), 400
+
+    # Ties are broken by the primary key, which keeps cursors unambiguous
+    model = auction_model()
+    table = model.__table__
+    key = tuple(dict.fromkeys((sort, 'timestamp', 'id')))
+    key_columns = tuple(table.c[name] for name in key)
+
+    try:
+        limit = get_page_limit(request.args.get('limit'))
+        columns = get_fields(request.args.get('fields'), model.columns())
+        fields = [column.key for column in columns]
+        # The sort key is selected even when not returned, for the cursor
+        query = _filter_auctions(
+            model.query.with_entities(*with_columns(columns, *key_columns)),
+            model, request.args
+        ).order_by(*(column.desc() if descending else column
+                     for column in key_columns))
+
+        if 'after' in request.args:
+            query = query.filter(after_cursor(
+                key_columns,
+                _decode_sort_key(request.args['after'], key_columns),
+                descending
+            ))
+    except (CursorError, TypeError, ValueError):
+        abort(400)
+
+    if wants_ndjson():
+        return ndjson_response(query, fields)
 
     try:
-        auctions = Auction.query.all()
+        # One extra row tells us whether there is a next page
+        auctions = query.limit(limit + 1).all()
 
         if not auctions:
             abort(404)
 
+        next_cursor = None
+
+        if len(auctions) > limit:
+            auctions = auctions[:limit]
+            next_cursor = encode_cursor(*(getattr(auctions[-1], name)
+                                          for name in key))
+
         return jsonify({
             'success': True,
-            'auctions': [auction.serialize() for auction in auctions]
+            'auctions': serialize_rows(auctions, fields),
+            'next': next_cursor
         }), 200
 
     except exc.DBAPIError:
         abort(400)
 
 
+def _get_item_id(data) -> Optional[int]:
+    """Reads the item id of a request body, which may be sent as a
+    string."""
+    item_id = data.get('item_id')
+
+    if item_id is None:
+        return None
+
+    # `type` rather than `isinstance` so booleans are rejected
+    if type(item_id) not in (int, str):
+        abort(400)
+
+    try:
+        return int(item_id)
+    except ValueError:
+        abort(400)
+
+
+def _get_timestamp(data) -> Optional[datetime]:
+    """Reads the timestamp of a request body as naive UTC.
+
+    Parsed here rather than by the database, which would drop the offset
+    and could store the row outside the partition created for it.
+    """
+    timestamp = data.get('timestamp')
+
+    if timestamp is None:
+        return None
+
+    if type(timestamp) is not str:
+        abort(400)
+
+    try:
+        return parse_timestamp(timestamp)
+    except ValueError:
+        abort(400)
+
+
 @auction_routes.post('/auctions')
 @requires_auth('post:auctions')
+@writes_auctions
 def create_auction(jwt: str):
     """Creates a new auction.
 
@@ -48,20 +357,17 @@ def create_auction(jwt: str):
     data: Any = request.get_json()
 
     try:
-        item_id = data.get('item_id', None)
+        item_id = _get_item_id(data)
         time_left = data.get('time_left', None)
 
-        if item_id:
-            item = Item.query.filter(Item.id == item_id).one_or_none()
-
-            if not item:
-                return jsonify({
-                    'success': False,
-                    'message': (f"Item with id '{item_id}' does not exist. "
-                                "Please create it first.")
-                }), 400
+        if item_id and not item_catalogue.exists(item_id):
+            return jsonify({
+                'success': False,
+                'message': (f"Item with id '{item_id}' does not exist. "
+                            "Please create it first.")
+            }), 400
 
-        allowed_time_left = ['SHORT', 'MEDIUM', 'LONG', 'VERY_LONG']
+        allowed_time_left = TIME_LEFT_VALUES
 
         if time_left and \
            time_left.upper() not in allowed_time_left:
@@ -76,7 +382,7 @@ def create_auction(jwt: str):
 
         auction = Auction(
             id=data.get('id'),
-            timestamp=data.get('timestamp'),
+            timestamp=_get_timestamp(data),
             bid=data.get('bid'),
             buyout=data.get('buyout'),
             unit_price=data.get('unit_price'),
@@ -96,8 +402,55 @@ def create_auction(jwt: str):
         abort(400)
 
 
+@auction_routes.post('/auctions/bulk')
+@requires_auth('post:auctions')
+@writes_auctions
+def create_auctions_bulk(jwt: str):
+    """Creates or updates many auctions at once.
+
+    The body is either a JSON array of auctions or newline delimited JSON
+    sent as `application/x-ndjson`. Each auction takes the same fields as
+    `POST /auctions`. Invalid rows are rejected individually while the
+    valid ones are written.
+    """
+    if request.mimetype == NDJSON_MIMETYPE:
+        rows = iter_ndjson(request.stream)
+    else:
+        rows = request.get_json(silent=True)
+
+        if not isinstance(rows, list):
+            abort(400)
+
+    try:
+        result = load_auctions(
+            rows, batch_size=current_app.config['API_BULK_BATCH_SIZE']
+        )
+
+        return jsonify({
+            'success': True,
+            **result.serialize()
+        })
+
+    except exc.DBAPIError:
+        abort(400)
+
+
+@auction_routes.post('/auctions/lookup')
+@requires_auth('get:auctions')
+def lookup_auctions(jwt: str):
+    """Gets several specific auctions at once.
+
+    The body is a JSON object like `{"ids": [1, 2, 3]}`, with at most
+    `API_MAX_LOOKUP_IDS` ids. The latest snapshot of every auction is
+    returned in request order, and the ids of those that do not exist are
+    listed as `missing`.
+    """
+    return _lookup_auctions()
+
+
 @auction_routes.get('/auction/<int:id>')
 @requires_auth('get:auction')
+@cached_response('auctions')
 def get_auction(jwt: str, id: int):
     """Gets a specific auction.
 
@@ -106,7 +459,7 @@ def get_auction(jwt: str, id: int):
     """
 
     try:
-        auction = Auction.query.filter(Auction.id == id).one_or_none()
+        auction = get_latest_auction(id)
 
         if not auction:
             abort(404)
@@ -122,6 +475,7 @@ def get_auction(jwt: str, id: int):
 
 @auction_routes.patch('/auction/<int:id>')
 @requires_auth('patch:auction')
+@writes_auctions
 def update_auction(jwt: str, id: int):
     """Updates an existing auction.
 
@@ -137,16 +491,16 @@ def update_auction(jwt: str, id: int):
     """
     data: Any = request.get_json()
 
-    timestamp = data.get('timestamp')
+    timestamp = _get_timestamp(data)
     bid = data.get('bid')
     buyout = data.get('buyout')
     unit_price = data.get('unit_price')
     quantity = data.get('quantity')
     time_left = data.get('time_left')
-    item_id = data.get('item_id')
+    item_id = _get_item_id(data)
 
     try:
-        auction = Auction.query.filter(Auction.id == id).one_or_none()
+        auction = get_latest_auction(id)
 
         if not auction:
             abort(404)
@@ -170,16 +524,14 @@ def update_auction(jwt: str, id: int):
             auction.time_left = time_left
 
         if item_id:
-            item = Item.query.filter(Item.id == item_id).one_or_none()
-
-            if not item:
+            if not item_catalogue.exists(item_id):
                 return jsonify({
                     'success': False,
                     'message': (f"'item_id' {item_id} does not exist. Please"
                                 "create it first.")
                 }), 400
 
-            item.item_id = item_id
+            auction.item_id = item_id
 
         auction.update()
 
@@ -194,6 +546,7 @@ def update_auction(jwt: str, id: int):
 
 @auction_routes.delete('/auction/<int:id>')
 @requires_auth('delete:auction')
+@writes_auctions
 def delete_auction(jwt: str, id: int):
     """Deletes a specific auction.
 
@@ -201,7 +554,7 @@ def delete_auction(jwt: str, id: int):
         id (int): Auction id.
     """
     try:
-        auction = Auction.query.filter(Auction.id == id).one_or_none()
+        auction = get_latest_auction(id)
 
         if not auction:
             abort(404)
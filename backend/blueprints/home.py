@@ -1,4 +1,6 @@
-from flask import Blueprint, jsonify, redirect, url_for
+from flask import Blueprint, redirect, url_for
+
+from backend.services.serialization import jsonify
 
 home_routes = Blueprint('home_routes', __name__)
 
@@ -1,28 +1,237 @@
 from typing import Any
 
-from flask import Blueprint, jsonify, abort, request
-from sqlalchemy import exc
+from flask import Blueprint, abort, request
+from sqlalchemy import Integer, any_, bindparam, exc, func
+from sqlalchemy.dialects.postgresql import ARRAY
 
 from backend.services.auth import requires_auth
-from backend.database.models import Item
+from backend.services.cache import cached_response
+from backend.services.catalogue import item_catalogue
+from backend.services.export import ndjson_response, wants_ndjson
+from backend.services.history import get_price_history, parse_bucket
+from backend.services.lookup import IdsError, get_lookup_ids, lookup_response
+from backend.services.pagination import (
+    CursorError,
+    after_cursor,
+    decode_cursor,
+    encode_cursor,
+    get_page_limit
+)
+from backend.services.search import find_items
+from backend.services.serialization import (
+    get_fields,
+    jsonify,
+    parse_timestamp,
+    serialize_rows,
+    with_columns
+)
+from backend.database import db
+from backend.database.replica import read_from_replica
+from backend.database.models import Auction, AuctionListing, Item
+from backend.database.storage import storage_mode
 
 item_routes = Blueprint('item_routes', __name__)
+read_from_replica(item_routes)
+
+
+def get_auction_ids(item_ids: list) -> dict:
+    """Gets the ids of the current auctions of several items in one query.
+
+    Only auctions of the latest snapshot are listed, so the work does not
+    grow with the number of snapshots kept.
+
+    Args:
+        item_ids (list): Item ids.
+
+    Returns:
+        dict: Sorted auction ids by item id, for items with auctions.
+    """
+    ids = bindparam(None, sorted(set(item_ids)), type_=ARRAY(Integer))
+
+    if storage_mode() == 'delta':
+        # Listings missing from the latest snapshot have a last_seen
+        model = AuctionListing
+        current = AuctionListing.last_seen.is_(None)
+    else:
+        model = Auction
+        current = Auction.timestamp == db.session.query(
+            func.max(Auction.timestamp)
+        ).scalar_subquery()
+
+    rows = db.session.query(model.item_id, func.array_agg(model.id)) \
+        .filter(model.item_id == any_(ids), current) \
+        .group_by(model.item_id)
+
+    return {item_id: sorted(auction_ids) for item_id, auction_ids in rows}
+
+
+def _lookup_items():
+    try:
+        ids = get_lookup_ids()
+    except IdsError as e:
+        return jsonify({'success': False, 'message': str(e)}), 400
+
+    try:
+        # Answered by the item catalogue, or a single query while the
+        # transaction has changed items
+        return lookup_response('items', ids, {
+            id: {'id': id, 'name': name}
+            for id, name in item_catalogue.get_names(ids).items()
+        })
+
+    except exc.DBAPIError:
+        abort(400)
 
 
 @item_routes.get('/items')
 @requires_auth('get:items')
+@cached_response('items', 'auctions')
 def get_items(jwt: str):
-    """Gets all items.
+    """Gets a page of items, ordered by id.
+
+    With `?format=ndjson` or `Accept: application/x-ndjson` every item
+    after the cursor is streamed instead, one JSON object per line.
+
+    With `ids` only those items are returned, like `POST /items/lookup`
+    does, and the other arguments do not apply.
+
+    Args:
+        ids (str, optional): Comma separated item ids to look up.
+        limit (int, optional): Maximum number of items to return.
+        after (str, optional): Cursor returned as `next` by the previous page.
+        fields (str, optional): Comma separated fields to return, e.g. `id`.
+        Defaults to every field.
+        include (str, optional): `auctions` to add the ids of the auctions
+        of every item in the latest snapshot, loaded in one query. Not
+        available with NDJSON.
     """
+    if 'ids' in request.args:
+        return _lookup_items()
+
+    include = request.args.get('include')
+
+    if include not in (None, 'auctions') or \
+       (include and wants_ndjson()):
+        abort(400)
+
     try:
-        items = Item.query.all()
+        limit = get_page_limit(request.args.get('limit'))
+        columns = get_fields(request.args.get('fields'), Item.columns())
+        fields = [column.key for column in columns]
+        # The id is selected even when not returned, for the cursor
+        query = Item.query.with_entities(*with_columns(columns, Item.id)) \
+            .order_by(Item.id)
+
+        if 'after' in request.args:
+            after = decode_cursor(request.args['after'], 1)
+
+            if type(after[0]) is not int:
+                raise CursorError(
+                    f"'{request.args['after']}' is not a valid cursor."
+                )
+
+            query = query.filter(after_cursor((Item.id,), after))
+    except ValueError:
+        abort(400)
+
+    if wants_ndjson():
+        return ndjson_response(query, fields)
+
+    try:
+        # One extra row tells us whether there is a next page
+        items = query.limit(limit + 1).all()
 
         if not items:
             abort(404)
 
+        next_cursor = None
+
+        if len(items) > limit:
+            items = items[:limit]
+            next_cursor = encode_cursor(items[-1].id)
+
+        serialized = serialize_rows(items, fields)
+
+        if include:
+            auction_ids = get_auction_ids([item.id for item in items])
+
+            for item, data in zip(items, serialized):
+                data['auctions'] = auction_ids.get(item.id, [])
+
         return jsonify({
             'success': True,
-            'items': [item.serialize() for item in items]
+            'items': serialized,
+            'next': next_cursor
+        }), 200
+
+    except exc.DBAPIError:
+        abort(400)
+
+
+@item_routes.post('/items/lookup')
+@requires_auth('get:items')
+def lookup_items(jwt: str):
+    """Gets several specific items at once.
+
+    The body is a JSON object like `{"ids": [1, 2, 3]}`, with at most
+    `API_MAX_LOOKUP_IDS` ids. The items are returned in request order, and
+    the ids of those that do not exist are listed as `missing`.
+    """
+    return _lookup_items()
+
+
+@item_routes.get('/items/search')
+@requires_auth('get:items')
+@cached_response('items')
+def search_items(jwt: str):
+    """Finds items by name, best matches first.
+
+    Names equal to the query rank first, then names starting with it,
+    containing it and similar to it, case insensitively. Queries without a
+    word of at least three characters only match names starting with them.
+
+    Args:
+        q (str): Searched text.
+        limit (int, optional): Maximum number of items to return.
+        after (str, optional): Cursor returned as `next` by the previous page.
+    """
+    query = request.args.get('q', '').strip()
+
+    if not query or len(query) > Item.name.type.length:
+        abort(400)
+
+    try:
+        limit = get_page_limit(request.args.get('limit'))
+        after = None
+
+        if 'after' in request.args:
+            after = decode_cursor(request.args['after'], 4)
+
+            if not all(type(value) is int for value in after):
+                raise CursorError(
+                    f"'{request.args['after']}' is not a valid cursor."
+                )
+    except ValueError:
+        abort(400)
+
+    try:
+        # One extra result tells us whether there is a next page
+        results = find_items(query, limit + 1, after)
+
+        if not results:
+            abort(404)
+
+        next_cursor = None
+
+        if len(results) > limit:
+            results = results[:limit]
+            next_cursor = encode_cursor(*results[-1].key)
+
+        return jsonify({
+            'success': True,
+            'items': [{'id': result.id, 'name': result.name}
+                      for result in results],
+            'next': next_cursor
         }), 200
 
     except exc.DBAPIError:
@@ -59,6 +268,7 @@ def create_item(jwt: str):
 
 @item_routes.get('/item/<int:id>')
 @requires_auth('get:item')
+@cached_response('items')
 def get_item(jwt: str, id: int):
     """Gets a specific item.
 
@@ -66,14 +276,49 @@ def get_item(jwt: str, id: int):
         id (int): Item id.
     """
     try:
-        item = Item.query.filter(Item.id == id).one_or_none()
+        name = item_catalogue.get_name(id)
 
-        if not item:
+        if name is None:
+            abort(404)
+
+        return jsonify({
+            'success': True,
+            'item': {'id': id, 'name': name}
+        })
+
+    except exc.DBAPIError:
+        abort(400)
+
+
+@item_routes.get('/item/<int:id>/history')
+@requires_auth('get:item')
+@cached_response('items', 'item_price_stats')
+def get_item_history(jwt: str, id: int):
+    """Gets the price history of a specific item.
+
+    Args:
+        id (int): Item id.
+        from (datetime, optional): Inclusive ISO-8601 lower bound.
+        to (datetime, optional): Exclusive ISO-8601 upper bound.
+        bucket (str, optional): Downsampling width such as `1h` or `1d`.
+    """
+    try:
+        start = request.args.get('from')
+        end = request.args.get('to')
+        start = parse_timestamp(start) if start else None
+        end = parse_timestamp(end) if end else None
+        bucket = parse_bucket(request.args.get('bucket'))
+    except ValueError:
+        abort(400)
+
+    try:
+        if not item_catalogue.exists(id):
             abort(404)
 
         return jsonify({
             'success': True,
-            'item': item.serialize()
+            'item': id,
+            'history': get_price_history(id, start, end, bucket)
         })
 
     except exc.DBAPIError:
@@ -0,0 +1,17 @@
+from flask import Blueprint, Response
+
+from backend.services.auth import requires_auth
+from backend.services.metrics import CONTENT_TYPE, render_metrics
+
+metrics_routes = Blueprint('metrics_routes', __name__)
+
+
+@metrics_routes.get('/metrics')
+@requires_auth('get:metrics')
+def metrics(jwt: str):
+    """Metrics of every worker in the Prometheus text format.
+
+    Route names, status codes and cache sizes describe the deployment, so
+    scrapers need a token with `get:metrics` like any other client.
+    """
+    return Response(render_metrics(), content_type=CONTENT_TYPE)
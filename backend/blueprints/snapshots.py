@@ -0,0 +1,41 @@
+from flask import Blueprint, abort
+from sqlalchemy import exc
+
+from backend.services.auth import requires_auth
+from backend.services.cache import cached_response
+from backend.services.serialization import jsonify, parse_timestamp
+from backend.services.snapshots import fetch_snapshot_diff
+
+snapshot_routes = Blueprint('snapshot_routes', __name__)
+
+
+@snapshot_routes.get('/snapshots/<timestamp>/diff')
+@requires_auth('get:auctions')
+@cached_response('auctions', 'snapshot_diffs')
+def get_snapshot_diff(jwt: str, timestamp: str):
+    """Gets the auctions that changed since the previous snapshot.
+
+    The diff is stored the first time it is requested, or when the
+    snapshot is ingested.
+
+    Args:
+        timestamp (datetime): ISO-8601 timestamp of the snapshot, in UTC
+        unless it has an offset.
+    """
+    try:
+        timestamp = parse_timestamp(timestamp)
+    except ValueError:
+        abort(400)
+
+    try:
+        diff = fetch_snapshot_diff(timestamp)
+    except exc.DBAPIError:
+        abort(400)
+
+    if diff is None:
+        abort(404)
+
+    return jsonify({
+        'success': True,
+        **diff
+    })
@@ -9,9 +9,79 @@ SECRET_KEY = os.environ['FLASK_SECRET_KEY']
 # SQLAlchemy
 SQLALCHEMY_DATABASE_URI = os.environ['FLASK_DATABASE_URL']
 SQLALCHEMY_TRACK_MODIFICATIONS = False
+# Statements running at least this long are logged as slow queries
+SQL_SLOW_QUERY_MS = int(os.environ.get('SQL_SLOW_QUERY_MS', 500))
+# Connections per worker, kept open and opened on bursts beyond them
+SQL_POOL_SIZE = int(os.environ.get('SQL_POOL_SIZE', 5))
+SQL_MAX_OVERFLOW = int(os.environ.get('SQL_MAX_OVERFLOW', 10))
+# Seconds to wait for a connection before failing the request
+SQL_POOL_TIMEOUT = int(os.environ.get('SQL_POOL_TIMEOUT', 30))
+# Connections older than this many seconds are replaced, -1 never
+SQL_POOL_RECYCLE = int(os.environ.get('SQL_POOL_RECYCLE', 1800))
+# Tests connections on checkout, so ones dropped while idle are replaced
+SQL_POOL_PRE_PING = os.environ.get('SQL_POOL_PRE_PING', '1') == '1'
+# Statements running longer are cancelled by the server, 0 never
+SQL_STATEMENT_TIMEOUT_MS = int(os.environ.get('SQL_STATEMENT_TIMEOUT_MS', 0))
+# Optional read replica serving the GET routes of auctions and items
+SQL_REPLICA_DATABASE_URI = os.environ.get('FLASK_REPLICA_DATABASE_URL', None)
+# Seconds a client reads from the primary after writing
+SQL_REPLICA_STICKY_SECONDS = float(
+    os.environ.get('SQL_REPLICA_STICKY_SECONDS', 5)
+)
+# Seconds reads go to the primary after the replica failed
+SQL_REPLICA_RETRY_INTERVAL = float(
+    os.environ.get('SQL_REPLICA_RETRY_INTERVAL', 30)
+)
 
 # Auth
 AUTH_DOMAIN = os.environ['AUTH_DOMAIN']
 AUTH_ALGORITHM = os.environ['AUTH_ALGORITHM']
 AUTH_API_AUDIENCE = os.environ['AUTH_API_AUDIENCE']
 AUTH_CLIENT_ID = os.environ['AUTH_CLIENT_ID']
+AUTH_JWKS_URL = os.environ.get(
+    'AUTH_JWKS_URL', f'https://{AUTH_DOMAIN}/.well-known/jwks.json'
+)
+AUTH_JWKS_TTL = int(os.environ.get('AUTH_JWKS_TTL', 3600))
+AUTH_JWKS_MIN_REFRESH_INTERVAL = int(
+    os.environ.get('AUTH_JWKS_MIN_REFRESH_INTERVAL', 30)
+)
+AUTH_TOKEN_CACHE_SIZE = int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 1024))
+AUTH_TOKEN_CACHE_MAX_AGE = int(
+    os.environ.get('AUTH_TOKEN_CACHE_MAX_AGE', 300)
+)
+# Shares verified token payloads through CACHE_URL between the workers
+AUTH_TOKEN_CACHE_SHARED = os.environ.get('AUTH_TOKEN_CACHE_SHARED', '0') == '1'
+
+# JSON
+# auto picks orjson when it is installed, stdlib otherwise
+JSON_PROVIDER = os.environ.get('JSON_PROVIDER', 'auto')
+
+# API
+API_DEFAULT_PAGE_SIZE = int(os.environ.get('API_DEFAULT_PAGE_SIZE', 100))
+API_MAX_PAGE_SIZE = int(os.environ.get('API_MAX_PAGE_SIZE', 1000))
+API_EXPORT_BATCH_SIZE = int(os.environ.get('API_EXPORT_BATCH_SIZE', 1000))
+API_BULK_BATCH_SIZE = int(os.environ.get('API_BULK_BATCH_SIZE', 10000))
+API_MAX_LOOKUP_IDS = int(os.environ.get('API_MAX_LOOKUP_IDS', 200))
+
+# Cache
+# sqlite:///path shares caches between the workers of a host, memory://
+# keeps them per process, which isolates the apps of the tests
+CACHE_URL = os.environ.get('CACHE_URL', 'memory://')
+CACHE_VERSION_POLL_INTERVAL = float(
+    os.environ.get('CACHE_VERSION_POLL_INTERVAL', 1)
+)
+RESPONSE_CACHE_MAX_BYTES = int(
+    os.environ.get('RESPONSE_CACHE_MAX_BYTES', 64 << 20)
+)
+
+# Metrics
+# Directory where gunicorn workers publish their metrics, unset when a
+# single process serves the API
+METRICS_DIR = os.environ.get('METRICS_DIR', None)
+METRICS_FLUSH_INTERVAL = float(os.environ.get('METRICS_FLUSH_INTERVAL', 1))
+
+# Auctions
+AUCTIONS_RETENTION_DAYS = int(os.environ.get('AUCTIONS_RETENTION_DAYS', 90))
+# rows stores every auction once per snapshot, delta once per listing with
+# the changes of its bid, buyout, quantity and time left
+AUCTIONS_STORAGE = os.environ.get('AUCTIONS_STORAGE', 'rows')
@@ -1,6 +1,83 @@
+import os
+import weakref
+
 from flask_sqlalchemy import SQLAlchemy
+from sqlalchemy import orm
+from sqlalchemy.engine import make_url
+from sqlalchemy.pool import QueuePool
+
+
+class RoutingSQLAlchemy(SQLAlchemy):
+    """Flask-SQLAlchemy whose sessions can read from a replica."""
+
+    def create_session(self, options):
+        from backend.database.replica import RoutingSession
+
+        return orm.sessionmaker(class_=RoutingSession, db=self, **options)
+
+
+db = RoutingSQLAlchemy()
+
+
+def _engine_options(app) -> dict:
+    """Engine options from the SQL_* settings of an application.
+
+    Options set explicitly in `SQLALCHEMY_ENGINE_OPTIONS` take precedence.
+
+    Args:
+        app (Flask): The application to configure.
+
+    Returns:
+        dict: Keyword arguments of `create_engine`.
+    """
+    from backend.database.instrumentation import TimedQueuePool
+
+    config = app.config
+    options = dict(config.get('SQLALCHEMY_ENGINE_OPTIONS') or {})
+    options.setdefault('poolclass', TimedQueuePool)
+    options.setdefault('pool_pre_ping', config['SQL_POOL_PRE_PING'])
+    options.setdefault('pool_recycle', config['SQL_POOL_RECYCLE'])
+
+    # Pools other than a queue pool do not take sizes
+    if issubclass(options['poolclass'], QueuePool):
+        options.setdefault('pool_size', config['SQL_POOL_SIZE'])
+        options.setdefault('max_overflow', config['SQL_MAX_OVERFLOW'])
+        options.setdefault('pool_timeout', config['SQL_POOL_TIMEOUT'])
+
+    url = make_url(config['SQLALCHEMY_DATABASE_URI'])
+
+    # Set at connection time, so it survives the rollback on checkin
+    if config['SQL_STATEMENT_TIMEOUT_MS'] and \
+       url.get_backend_name() == 'postgresql':
+        connect_args = options['connect_args'] = \
+            dict(options.get('connect_args', {}))
+        connect_args.setdefault(
+            'options',
+            f"-c statement_timeout={config['SQL_STATEMENT_TIMEOUT_MS']}"
+        )
 
-db = SQLAlchemy()
+    return options
+
+
+def _dispose_after_fork(engine):
+    """Drops the connections a forked process inherited from its parent.
+
+    With gunicorn --preload, workers are forked from a master that may
+    have connected already. The sockets are left open for the parent,
+    and the child opens its own on first use.
+
+    Args:
+        engine (Engine): Engine of the parent process.
+    """
+    ref = weakref.ref(engine)
+
+    def dispose():
+        engine = ref()
+
+        if engine is not None:
+            engine.dispose(close=False)
+
+    os.register_at_fork(after_in_child=dispose)
 
 
 def setup_db(app):
@@ -9,11 +86,40 @@ def setup_db(app):
     Args:
         app (Flask): The application to bind the database to.
     """
+    from backend.database.instrumentation import setup_instrumentation
+    from backend.database.replica import REPLICA_BIND, setup_replica
+
+    app.config['SQLALCHEMY_ENGINE_OPTIONS'] = _engine_options(app)
+    replica_uri = app.config['SQL_REPLICA_DATABASE_URI']
+
+    if replica_uri:
+        app.config['SQLALCHEMY_BINDS'] = {
+            **(app.config.get('SQLALCHEMY_BINDS') or {}),
+            REPLICA_BIND: replica_uri
+        }
+
     db.app = app
     db.init_app(app)
 
+    engines = [db.get_engine(app)]
+
+    if replica_uri:
+        engines.append(db.get_engine(app, REPLICA_BIND))
+        setup_replica(app, engines[-1])
+
+    setup_instrumentation(app, *engines)
+
+    for engine in engines:
+        _dispose_after_fork(engine)
+
     # Ensure that the database binding knows of our models
     import backend.database.models
+    import backend.database.partitions
+    import backend.database.versions
+    from backend.database.storage import storage_mode
+
+    # Fails on start rather than on the first request
+    storage_mode(app)
 
 
 def reset_db():
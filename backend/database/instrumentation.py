@@ -0,0 +1,120 @@
+import logging
+import time
+from typing import Any, Callable, List
+
+from flask import g, has_request_context
+from sqlalchemy import event, exc
+from sqlalchemy.pool import QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+def _shape(value: Any) -> Any:
+    """Describes statement parameters without their values.
+
+    Args:
+        value (Any): Parameters of a statement, or one of them.
+
+    Returns:
+        Any: Type names in the structure of the parameters, with long
+        sequences reduced to their type and length.
+    """
+    if isinstance(value, dict):
+        return {key: _shape(item) for key, item in value.items()}
+
+    if isinstance(value, (list, tuple)):
+        if len(value) > 8:
+            return f'{type(value).__name__}[{len(value)}]'
+
+        return type(value)(_shape(item) for item in value)
+
+    return type(value).__name__
+
+
+class TimedQueuePool(QueuePool):
+    """Queue pool reporting how long each connection checkout waited.
+
+    Every function of `wait_observers` is called with the seconds spent
+    getting a connection, including opening a new one, and whether the
+    checkout gave up after `pool_timeout` because the pool was exhausted.
+    """
+
+    wait_observers: List[Callable[[float, bool], None]] = []
+
+    def _do_get(self):
+        start = time.perf_counter()
+        timed_out = False
+
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            timed_out = True
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+
+            for observer in self.wait_observers:
+                observer(elapsed, timed_out)
+
+
+def _record(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault('statement_started', []).append(time.perf_counter())
+
+
+def _discard(context):
+    # A failed statement never reaches after_cursor_execute
+    conn = context.connection
+
+    if conn is not None and conn.info.get('statement_started'):
+        conn.info['statement_started'].pop()
+
+
+def setup_instrumentation(app, *engines):
+    """Times the SQL statements of engines and reports them per request.
+
+    Every request gets its statement count and database time in a
+    `Server-Timing` header, and statements slower than
+    `SQL_SLOW_QUERY_MS` are logged with the shape of their parameters.
+
+    Args:
+        app (Flask): The application serving the requests.
+        engines (Engine): The engines to instrument.
+    """
+
+    def measure(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - conn.info['statement_started'].pop()
+
+        if has_request_context():
+            g.sql_statements = g.get('sql_statements', 0) + 1
+            g.sql_seconds = g.get('sql_seconds', 0.0) + elapsed
+
+        if elapsed * 1000 >= app.config['SQL_SLOW_QUERY_MS']:
+            shape = (f'{len(parameters)} x {_shape(parameters[0])}'
+                     if executemany and parameters else _shape(parameters))
+            logger.warning('Slow query (%.1f ms): %s; parameters: %s',
+                           elapsed * 1000, statement, shape)
+
+    for engine in engines:
+        event.listen(engine, 'before_cursor_execute', _record)
+        event.listen(engine, 'after_cursor_execute', measure)
+        event.listen(engine, 'handle_error', _discard)
+
+    @app.before_request
+    def start_timer():
+        g.request_started = time.perf_counter()
+
+    @app.after_request
+    def add_server_timing(response):
+        # Streamed responses only include the statements run so far
+        statements = g.get('sql_statements', 0)
+        timings = [
+            f'db;dur={g.get("sql_seconds", 0.0) * 1000:.2f};'
+            f'desc="{statements} statement{"" if statements == 1 else "s"}"'
+        ]
+
+        if 'request_started' in g:
+            elapsed = time.perf_counter() - g.request_started
+            timings.append(f'app;dur={elapsed * 1000:.2f}')
+
+        response.headers.add('Server-Timing', ', '.join(timings))
+        return response
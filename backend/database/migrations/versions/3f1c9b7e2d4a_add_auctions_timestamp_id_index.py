@@ -0,0 +1,25 @@
+"""add auctions timestamp id index
+
+Revision ID: 3f1c9b7e2d4a
+Revises: 8a3a4eba6d09
+Create Date: 2026-10-18 09:12:41.518204
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3f1c9b7e2d4a'
+down_revision = '8a3a4eba6d09'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_index('ix_auctions_timestamp_id', 'auctions',
+                    ['timestamp', 'id'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_auctions_timestamp_id', table_name='auctions')
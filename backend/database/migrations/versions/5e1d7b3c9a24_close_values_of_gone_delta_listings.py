@@ -0,0 +1,35 @@
+"""close values of gone delta listings
+
+Revision ID: 5e1d7b3c9a24
+Revises: f3b8d1a6c9e2
+Create Date: 2026-10-19 09:12:45.318204
+
+"""
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = '5e1d7b3c9a24'
+down_revision = 'f3b8d1a6c9e2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Listings missing from the latest snapshots kept their values open
+    # until they were listed again, so every range lookup of a snapshot
+    # also found them. Ingests now close them at the first snapshot they
+    # are missing from
+    op.execute(
+        'UPDATE auction_changes AS c SET until = ('
+        ' SELECT min(timestamp) FROM auction_snapshots'
+        ' WHERE timestamp > l.last_seen'
+        ') FROM auction_listings AS l '
+        'WHERE c.id = l.id AND c.until IS NULL AND l.last_seen IS NOT NULL'
+    )
+
+
+def downgrade():
+    # Earlier ingests open new values for a listing seen again whether or
+    # not the previous ones were closed, so they are left closed
+    pass
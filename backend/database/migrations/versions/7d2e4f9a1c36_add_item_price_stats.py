@@ -0,0 +1,52 @@
+"""add item price stats
+
+Revision ID: 7d2e4f9a1c36
+Revises: c5d8e2a1f7b3
+Create Date: 2026-10-18 14:02:51.730114
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '7d2e4f9a1c36'
+down_revision = 'c5d8e2a1f7b3'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table(
+        'item_price_stats',
+        sa.Column('item_id', sa.Integer(), autoincrement=False,
+                  nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('min_price', sa.Float(), nullable=True),
+        sa.Column('p25_price', sa.Float(), nullable=True),
+        sa.Column('median_price', sa.Float(), nullable=True),
+        sa.Column('mean_price', sa.Float(), nullable=True),
+        sa.Column('quantity', sa.BigInteger(), nullable=False),
+        sa.Column('auctions', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['item_id'], ['items.id'],
+                                ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('item_id', 'timestamp')
+    )
+
+    # Backfill from the auctions already stored
+    op.execute(
+        'INSERT INTO item_price_stats '
+        'SELECT item_id, timestamp, min(price),'
+        ' percentile_cont(0.25) WITHIN GROUP (ORDER BY price),'
+        ' percentile_cont(0.5) WITHIN GROUP (ORDER BY price),'
+        ' avg(price), sum(quantity), count(*) '
+        'FROM (SELECT item_id, timestamp, quantity,'
+        ' coalesce(CAST(nullif(unit_price, 0) AS float),'
+        ' CAST(nullif(buyout, 0) AS float) / nullif(quantity, 0)) AS price'
+        ' FROM auctions) AS priced '
+        'GROUP BY item_id, timestamp'
+    )
+
+
+def downgrade():
+    op.drop_table('item_price_stats')
@@ -0,0 +1,114 @@
+"""partition auctions by week
+
+Revision ID: a4b7c1d9e3f2
+Revises: 7d2e4f9a1c36
+Create Date: 2026-10-18 16:25:13.481907
+
+"""
+from datetime import datetime, timedelta
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4b7c1d9e3f2'
+down_revision = '7d2e4f9a1c36'
+branch_labels = None
+depends_on = None
+
+COLUMNS = ('id, timestamp, bid, buyout, unit_price, quantity, time_left, '
+           'item_id')
+
+INDEXES = [
+    ('ix_auctions_timestamp_id', ['timestamp', 'id']),
+    ('ix_auctions_item_id_timestamp', ['item_id', 'timestamp']),
+    ('ix_auctions_item_id_unit_price', ['item_id', 'unit_price']),
+    ('ix_auctions_item_id_buyout', ['item_id', 'buyout']),
+]
+
+
+def _columns():
+    return [
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('bid', sa.Integer(), nullable=True),
+        sa.Column('buyout', sa.Integer(), nullable=True),
+        sa.Column('unit_price', sa.Integer(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('time_left', sa.String(length=10), nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.ForeignKeyConstraint(['item_id'], ['items.id'],
+                                ondelete='CASCADE'),
+    ]
+
+
+def _set_aside_auctions():
+    # The old table is only read from before it is dropped, so its
+    # constraints go now to free their names for the new table
+    op.rename_table('auctions', 'auctions_old')
+    op.drop_constraint('auctions_pkey', 'auctions_old', type_='primary')
+    op.drop_constraint('auctions_item_id_fkey', 'auctions_old',
+                       type_='foreignkey')
+
+    for name, _ in INDEXES:
+        op.drop_index(name, table_name='auctions_old')
+
+
+def _create_indexes():
+    for name, columns in INDEXES:
+        op.create_index(name, 'auctions', columns, unique=False)
+
+
+def upgrade():
+    _set_aside_auctions()
+
+    op.create_table(
+        'auctions',
+        *_columns(),
+        sa.PrimaryKeyConstraint('id', 'timestamp'),
+        postgresql_partition_by='RANGE (timestamp)'
+    )
+
+    # One partition per week, starting on Mondays, for the stored auctions.
+    # Later ones are created on demand by backend.database.partitions
+    oldest, newest = op.get_bind().execute(sa.text(
+        'SELECT min(timestamp), max(timestamp) FROM auctions_old'
+    )).one()
+
+    if oldest is not None:
+        start = datetime(oldest.year, oldest.month, oldest.day)
+        start -= timedelta(days=start.weekday())
+
+        while start <= newest:
+            end = start + timedelta(weeks=1)
+            op.execute(
+                f"CREATE TABLE auctions_p{start:%Y%m%d} PARTITION OF auctions "
+                f"FOR VALUES FROM ('{start.isoformat()}') "
+                f"TO ('{end.isoformat()}')"
+            )
+            start = end
+
+    op.execute(f'INSERT INTO auctions ({COLUMNS}) '
+               f'SELECT {COLUMNS} FROM auctions_old')
+    op.drop_table('auctions_old')
+
+    _create_indexes()
+
+
+def downgrade():
+    _set_aside_auctions()
+
+    op.create_table(
+        'auctions',
+        *_columns(),
+        sa.PrimaryKeyConstraint('id')
+    )
+
+    # Only the latest snapshot of each auction fits the old primary key
+    op.execute(f'INSERT INTO auctions ({COLUMNS}) '
+               f'SELECT DISTINCT ON (id) {COLUMNS} FROM auctions_old '
+               f'ORDER BY id, timestamp DESC')
+    op.drop_table('auctions_old')
+
+    _create_indexes()
@@ -0,0 +1,86 @@
+"""add auction delta store
+
+Revision ID: b9c4e7f2a1d6
+Revises: e6f1a3b8c2d5
+Create Date: 2026-10-18 22:37:52.604113
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b9c4e7f2a1d6'
+down_revision = 'e6f1a3b8c2d5'
+branch_labels = None
+depends_on = None
+
+# One row per auction and snapshot it was listed in, like auctions. The
+# values are those of the change whose validity contains the snapshot
+DELTA_AUCTIONS = '''
+CREATE VIEW delta_auctions AS
+SELECT c.id, s.timestamp, c.bid, c.buyout, c.unit_price, c.quantity,
+       c.time_left, l.item_id
+FROM auction_listings AS l
+JOIN auction_changes AS c ON c.id = l.id
+JOIN auction_snapshots AS s
+  ON tsrange(c.timestamp, c.until) @> s.timestamp
+ AND (l.last_seen IS NULL OR s.timestamp <= l.last_seen)
+'''
+
+
+def upgrade():
+    # Only written to with AUCTIONS_STORAGE=delta
+    op.create_table(
+        'auction_snapshots',
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.PrimaryKeyConstraint('timestamp')
+    )
+    op.create_table(
+        'auction_listings',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('item_id', sa.Integer(), nullable=False),
+        sa.Column('first_seen', sa.DateTime(), nullable=False),
+        sa.Column('last_seen', sa.DateTime(), nullable=True),
+        sa.ForeignKeyConstraint(['item_id'], ['items.id'],
+                                ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index('ix_auction_listings_item_id', 'auction_listings',
+                    ['item_id'], unique=False)
+    op.create_index('ix_auction_listings_last_seen', 'auction_listings',
+                    ['last_seen'], unique=False)
+    op.create_table(
+        'auction_changes',
+        sa.Column('id', sa.Integer(), autoincrement=False, nullable=False),
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('until', sa.DateTime(), nullable=True),
+        sa.Column('bid', sa.Integer(), nullable=True),
+        sa.Column('buyout', sa.Integer(), nullable=True),
+        sa.Column('unit_price', sa.Integer(), nullable=True),
+        sa.Column('quantity', sa.Integer(), nullable=False),
+        sa.Column('time_left', sa.String(length=10), nullable=False),
+        sa.ForeignKeyConstraint(['id'], ['auction_listings.id'],
+                                ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('id', 'timestamp')
+    )
+    op.create_index('ix_auction_changes_open', 'auction_changes', ['id'],
+                    unique=True, postgresql_where=sa.text('until IS NULL'))
+    op.create_index('ix_auction_changes_validity', 'auction_changes',
+                    [sa.text('tsrange(timestamp, until)')], unique=False,
+                    postgresql_using='gist')
+    op.execute(DELTA_AUCTIONS)
+
+
+def downgrade():
+    op.execute('DROP VIEW delta_auctions')
+    op.drop_index('ix_auction_changes_validity',
+                  table_name='auction_changes')
+    op.drop_index('ix_auction_changes_open', table_name='auction_changes')
+    op.drop_table('auction_changes')
+    op.drop_index('ix_auction_listings_last_seen',
+                  table_name='auction_listings')
+    op.drop_index('ix_auction_listings_item_id',
+                  table_name='auction_listings')
+    op.drop_table('auction_listings')
+    op.drop_table('auction_snapshots')
@@ -0,0 +1,33 @@
+"""add auction access indexes
+
+Revision ID: c5d8e2a1f7b3
+Revises: 3f1c9b7e2d4a
+Create Date: 2026-10-18 11:40:07.206318
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c5d8e2a1f7b3'
+down_revision = '3f1c9b7e2d4a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # (item_id, timestamp) also serves plain item_id lookups and the
+    # ON DELETE CASCADE from items, so item_id gets no index of its own
+    op.create_index('ix_auctions_item_id_timestamp', 'auctions',
+                    ['item_id', 'timestamp'], unique=False)
+    op.create_index('ix_auctions_item_id_unit_price', 'auctions',
+                    ['item_id', 'unit_price'], unique=False)
+    op.create_index('ix_auctions_item_id_buyout', 'auctions',
+                    ['item_id', 'buyout'], unique=False)
+
+
+def downgrade():
+    op.drop_index('ix_auctions_item_id_buyout', table_name='auctions')
+    op.drop_index('ix_auctions_item_id_unit_price', table_name='auctions')
+    op.drop_index('ix_auctions_item_id_timestamp', table_name='auctions')
@@ -0,0 +1,41 @@
+"""add item name search indexes
+
+Revision ID: d2a7f5c9e4b1
+Revises: b9c4e7f2a1d6
+Create Date: 2026-10-18 23:52:16.480193
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'd2a7f5c9e4b1'
+down_revision = 'b9c4e7f2a1d6'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Prefixes too short for trigrams
+    op.create_index('ix_items_name_prefix', 'items',
+                    [sa.text('lower(name) text_pattern_ops')], unique=False)
+
+    # pg_trgm ships with the contrib modules. Without it, item search
+    # falls back to an index kept in memory
+    available = op.get_bind().execute(sa.text(
+        "SELECT EXISTS (SELECT FROM pg_available_extensions "
+        "WHERE name = 'pg_trgm')"
+    )).scalar()
+
+    if available:
+        op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        op.create_index('ix_items_name_trgm', 'items', ['name'],
+                        unique=False, postgresql_using='gin',
+                        postgresql_ops={'name': 'gin_trgm_ops'})
+
+
+def downgrade():
+    # The extension is left installed, other database objects may use it
+    op.execute('DROP INDEX IF EXISTS ix_items_name_trgm')
+    op.drop_index('ix_items_name_prefix', table_name='items')
@@ -0,0 +1,39 @@
+"""add snapshot diffs
+
+Revision ID: e6f1a3b8c2d5
+Revises: a4b7c1d9e3f2
+Create Date: 2026-10-18 21:04:37.215689
+
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'e6f1a3b8c2d5'
+down_revision = 'a4b7c1d9e3f2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Diffs are computed on demand, so there is nothing to backfill
+    op.create_table(
+        'snapshot_diffs',
+        sa.Column('timestamp', sa.DateTime(), nullable=False),
+        sa.Column('previous_timestamp', sa.DateTime(), nullable=False),
+        sa.Column('new', postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column('sold', postgresql.ARRAY(sa.Integer()), nullable=False),
+        sa.Column('expired', postgresql.ARRAY(sa.Integer()),
+                  nullable=False),
+        sa.Column('relisted', postgresql.ARRAY(sa.Integer()),
+                  nullable=False),
+        sa.Column('price_changed', postgresql.ARRAY(sa.Integer()),
+                  nullable=False),
+        sa.PrimaryKeyConstraint('timestamp')
+    )
+
+
+def downgrade():
+    op.drop_table('snapshot_diffs')
@@ -0,0 +1,123 @@
+"""add table versions
+
+Revision ID: f3b8d1a6c9e2
+Revises: d2a7f5c9e4b1
+Create Date: 2026-10-19 10:14:37.251904
+
+"""
+import random
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3b8d1a6c9e2'
+down_revision = 'd2a7f5c9e4b1'
+branch_labels = None
+depends_on = None
+
+# Version bumped by writes to each table, the delta store counts as
+# auctions
+TRACKED_TABLES = {
+    'items': 'items',
+    'auctions': 'auctions',
+    'auction_snapshots': 'auctions',
+    'auction_listings': 'auctions',
+    'auction_changes': 'auctions',
+    'item_price_stats': 'item_price_stats',
+    'snapshot_diffs': 'snapshot_diffs',
+}
+
+# Queues the version of a table to be bumped as the transaction commits,
+# at most once per transaction
+QUEUE_TABLE_VERSION_BUMP = '''
+CREATE FUNCTION queue_table_version_bump() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('table_versions.queued_' || TG_ARGV[0], true)
+       IS DISTINCT FROM 'on' THEN
+        PERFORM set_config('table_versions.queued_' || TG_ARGV[0], 'on',
+                           true);
+        INSERT INTO table_version_bumps (name) VALUES (TG_ARGV[0]);
+    END IF;
+
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+'''
+
+# Deferred until commit, so readers cannot see the new version before the
+# rows it stands for. The application bumps the tables of its own
+# transactions once they have committed, and flags them to be skipped
+BUMP_QUEUED_TABLE_VERSION = '''
+CREATE FUNCTION bump_queued_table_version() RETURNS trigger AS $$
+BEGIN
+    IF current_setting('table_versions.bumped_after_commit_' || NEW.name,
+                       true) IS DISTINCT FROM 'on' THEN
+        PERFORM nextval(format('table_version_%s', NEW.name));
+    END IF;
+
+    DELETE FROM table_version_bumps WHERE ctid = NEW.ctid;
+    RETURN NULL;
+END
+$$ LANGUAGE plpgsql
+'''
+
+
+def upgrade():
+    versions = sorted(set(TRACKED_TABLES.values()))
+
+    # Sequences take no lock that would serialize the writers of a table,
+    # and their values survive rollbacks. Called once, so their last value
+    # is a version
+    for name in versions:
+        op.execute(f'CREATE SEQUENCE table_version_{name}')
+        op.execute(f"SELECT nextval('table_version_{name}')")
+
+    # The epoch tells versions of different databases apart
+    op.execute(
+        'CREATE VIEW table_versions (name, version) AS '
+        f"SELECT '__epoch__', {random.getrandbits(31)}::bigint" + ''.join(
+            f" UNION ALL SELECT '{name}', last_value "
+            f'FROM table_version_{name}' for name in versions
+        )
+    )
+
+    # Rows only live until the commit of the transaction inserting them
+    op.create_table(
+        'table_version_bumps',
+        sa.Column('name', sa.Text(), nullable=False),
+        prefixes=['UNLOGGED']
+    )
+
+    op.execute(QUEUE_TABLE_VERSION_BUMP)
+    op.execute(BUMP_QUEUED_TABLE_VERSION)
+
+    op.execute(
+        'CREATE CONSTRAINT TRIGGER table_version_bumps_apply '
+        'AFTER INSERT ON table_version_bumps '
+        'DEFERRABLE INITIALLY DEFERRED '
+        'FOR EACH ROW EXECUTE FUNCTION bump_queued_table_version()'
+    )
+
+    # Statement level, a bulk load queues a single bump
+    for table, name in TRACKED_TABLES.items():
+        op.execute(
+            f'CREATE TRIGGER {table}_bump_version '
+            f'AFTER INSERT OR UPDATE OR DELETE OR TRUNCATE ON {table} '
+            f'FOR EACH STATEMENT '
+            f"EXECUTE FUNCTION queue_table_version_bump('{name}')"
+        )
+
+
+def downgrade():
+    for table in TRACKED_TABLES:
+        op.execute(f'DROP TRIGGER {table}_bump_version ON {table}')
+
+    op.drop_table('table_version_bumps')
+    op.execute('DROP FUNCTION bump_queued_table_version()')
+    op.execute('DROP FUNCTION queue_table_version_bump()')
+    op.execute('DROP VIEW table_versions')
+
+    for name in sorted(set(TRACKED_TABLES.values())):
+        op.execute(f'DROP SEQUENCE table_version_{name}')
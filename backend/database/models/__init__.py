@@ -1,2 +1,10 @@
 from backend.database.models.auction import Auction
+from backend.database.models.auction_delta import (
+    AuctionChange,
+    AuctionListing,
+    AuctionSnapshot,
+    DeltaAuction
+)
 from backend.database.models.item import Item
+from backend.database.models.item_price_stats import ItemPriceStats
+from backend.database.models.snapshot_diff import SnapshotDiff
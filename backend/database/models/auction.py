@@ -1,16 +1,61 @@
-from sqlalchemy.sql.schema import Column, ForeignKey
+from sqlalchemy.sql.schema import Column, ForeignKey, Index
 from sqlalchemy.sql.sqltypes import String, Integer, DateTime
 
 from backend.database import db
 
+TIME_LEFT_VALUES = ('SHORT', 'MEDIUM', 'LONG', 'VERY_LONG')
 
-class Auction(db.Model):  # type: ignore
+
+class AuctionMixin:
+    """Serialization shared by the models auctions are read through."""
+
+    @classmethod
+    def columns(cls) -> tuple:
+        """Columns `serialize` returns, for reads that skip the ORM."""
+        return (cls.id, cls.timestamp, cls.bid, cls.buyout, cls.unit_price,
+                cls.quantity, cls.time_left, cls.item_id)
+
+    def serialize(self):
+        return {
+            'id': self.id,
+            'timestamp': self.timestamp,
+            'bid': self.bid,
+            'buyout': self.buyout,
+            'unit_price': self.unit_price,
+            'quantity': self.quantity,
+            'time_left': self.time_left,
+            'item_id': self.item_id
+        }
+
+    def __repr__(self):
+        return (
+            f'<Auction id:int:{self.id}, timestamp:datetime:{self.timestamp}, '
+            f'bid:int:{self.bid}, buyout:int:{self.buyout}, '
+            f'unit_price:int:{self.unit_price}, quantity:int:{self.quantity}, '
+            f'time_left:str:{self.time_left}, item_id:int:{self.item_id}>'
+        )
+
+
+class Auction(AuctionMixin, db.Model):  # type: ignore
     """Models the data of a single auction."""
 
     __tablename__ = 'auctions'
+    __table_args__ = (
+        # Keyset pagination order of GET /auctions and time range reads
+        Index('ix_auctions_timestamp_id', 'timestamp', 'id'),
+        # Per-item reads and the ON DELETE CASCADE from items
+        Index('ix_auctions_item_id_timestamp', 'item_id', 'timestamp'),
+        # Cheapest listings of an item
+        Index('ix_auctions_item_id_unit_price', 'item_id', 'unit_price'),
+        Index('ix_auctions_item_id_buyout', 'item_id', 'buyout'),
+        # One partition per week, see backend.database.partitions
+        {'postgresql_partition_by': 'RANGE (timestamp)'},
+    )
 
+    # The partition key has to be part of the primary key, so an auction
+    # seen in several snapshots is stored once per snapshot
     id = Column(Integer, primary_key=True, autoincrement=False)
-    timestamp = Column(DateTime, nullable=False)
+    timestamp = Column(DateTime, primary_key=True)
     bid = Column(Integer)
     buyout = Column(Integer)
     unit_price = Column(Integer)
@@ -29,23 +74,3 @@ class Auction(db.Model):  # type: ignore
 
     def update(self):
         db.session.commit()
-
-    def serialize(self):
-        return {
-            'id': self.id,
-            'timestamp': self.timestamp,
-            'bid': self.bid,
-            'buyout': self.buyout,
-            'unit_price': self.unit_price,
-            'quantity': self.quantity,
-            'time_left': self.time_left,
-            'item_id': self.item_id
-        }
-
-    def __repr__(self):
-        return (
-            f'<Auction id:int:{self.id}, timestamp:datetime:{self.timestamp}, '
-            f'bid:int:{self.bid}, buyout:int:{self.buyout}, '
-            f'unit_price:int:{self.unit_price}, quantity:int:{self.quantity}, '
-            f'time_left:str:{self.time_left}, item_id:int:{self.item_id}>'
-        )
@@ -0,0 +1,117 @@
+from sqlalchemy import MetaData, Table, func
+from sqlalchemy.sql.schema import Column, ForeignKey, Index
+from sqlalchemy.sql.sqltypes import DateTime, Integer, String
+
+from backend.database import db
+from backend.database.models.auction import AuctionMixin
+
+# Values of a listing that are versioned by `AuctionChange`
+CHANGE_COLUMNS = ('bid', 'buyout', 'unit_price', 'quantity', 'time_left')
+
+
+class AuctionSnapshot(db.Model):  # type: ignore
+    """Models a snapshot held by the delta store."""
+
+    __tablename__ = 'auction_snapshots'
+
+    timestamp = Column(DateTime, primary_key=True)
+
+    def __repr__(self):
+        return f'<AuctionSnapshot timestamp:datetime:{self.timestamp}>'
+
+
+class AuctionListing(db.Model):  # type: ignore
+    """Models an auction of the delta store, stored once however often it
+    is seen.
+
+    The auction is listed in every snapshot from `first_seen` through
+    `last_seen`, with the values of the `AuctionChange` valid at the time.
+    `last_seen` is only set once the auction is missing from a snapshot,
+    so listings that did not change are not written to.
+    """
+
+    __tablename__ = 'auction_listings'
+    __table_args__ = (
+        Index('ix_auction_listings_item_id', 'item_id'),
+        # Retention, see backend.database.storage
+        Index('ix_auction_listings_last_seen', 'last_seen'),
+    )
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    item_id = Column(Integer, ForeignKey('items.id', ondelete='CASCADE'),
+                     nullable=False)
+    first_seen = Column(DateTime, nullable=False)
+    # None while listed in the newest snapshot
+    last_seen = Column(DateTime)
+
+    def __repr__(self):
+        return (
+            f'<AuctionListing id:int:{self.id}, item_id:int:{self.item_id}, '
+            f'first_seen:datetime:{self.first_seen}, '
+            f'last_seen:datetime:{self.last_seen}>'
+        )
+
+
+class AuctionChange(db.Model):  # type: ignore
+    """Models the values of a listing from a snapshot until they change.
+
+    A new row is only written when the bid, buyout, unit price, quantity
+    or time left of the listing differ from the previous snapshot.
+    """
+
+    __tablename__ = 'auction_changes'
+
+    id = Column(Integer, ForeignKey('auction_listings.id', ondelete='CASCADE'),
+                primary_key=True, autoincrement=False)
+    # First snapshot the values hold in
+    timestamp = Column(DateTime, primary_key=True)
+    # First snapshot they no longer hold in, None while they do
+    until = Column(DateTime)
+    bid = Column(Integer)
+    buyout = Column(Integer)
+    unit_price = Column(Integer)
+    quantity = Column(Integer, nullable=False)
+    time_left = Column(String(10), nullable=False)
+
+    __table_args__ = (
+        # One open row per listing, looked up by every ingested auction
+        Index('ix_auction_changes_open', id, unique=True,
+              postgresql_where=until.is_(None)),
+        # Rows valid at a given snapshot, as read by delta_auctions
+        Index('ix_auction_changes_validity', func.tsrange(timestamp, until),
+              postgresql_using='gist'),
+    )
+
+    def __repr__(self):
+        return (
+            f'<AuctionChange id:int:{self.id}, '
+            f'timestamp:datetime:{self.timestamp}, '
+            f'until:datetime:{self.until}, bid:int:{self.bid}, '
+            f'buyout:int:{self.buyout}, unit_price:int:{self.unit_price}, '
+            f'quantity:int:{self.quantity}, time_left:str:{self.time_left}>'
+        )
+
+
+# A view created by the migrations rather than `create_all`, hence the
+# separate metadata
+delta_auctions = Table(
+    'delta_auctions', MetaData(),
+    Column('id', Integer, primary_key=True, autoincrement=False),
+    Column('timestamp', DateTime, primary_key=True),
+    Column('bid', Integer),
+    Column('buyout', Integer),
+    Column('unit_price', Integer),
+    Column('quantity', Integer, nullable=False),
+    Column('time_left', String(10), nullable=False),
+    Column('item_id', Integer, nullable=False),
+)
+
+
+class DeltaAuction(AuctionMixin, db.Model):  # type: ignore
+    """Read-only model of the auctions of the delta store.
+
+    Rows of the `delta_auctions` view have the shape of `Auction`, one per
+    auction and snapshot it was listed in.
+    """
+
+    __table__ = delta_auctions
@@ -12,8 +12,11 @@ class Item(db.Model):  # type: ignore
 
     id = Column(Integer, primary_key=True, autoincrement=False)
     name = Column(String(180), nullable=False)
+    # Deleting an item leaves its auctions to ON DELETE CASCADE instead of
+    # loading every one of them into the session first
     auctions = relationship('Auction', backref='item',
-                            lazy=True, cascade='all, delete-orphan')
+                            lazy=True, cascade='all, delete-orphan',
+                            passive_deletes=True)
 
     def insert(self):
         db.session.add(self)
@@ -26,6 +29,11 @@ class Item(db.Model):  # type: ignore
     def update(self):
         db.session.commit()
 
+    @classmethod
+    def columns(cls) -> tuple:
+        """Columns `serialize` returns, for reads that skip the ORM."""
+        return (cls.id, cls.name)
+
     def serialize(self):
         return {
             'id': self.id,
@@ -33,14 +41,17 @@ class Item(db.Model):  # type: ignore
         }
 
     def serialize_with_auctions(self):
+        """Serializes the item with the ids of its auctions.
+
+        Loads the auctions unless they were eagerly loaded, e.g. with
+        `selectinload(Item.auctions)`.
+        """
         return {
             'id': self.id,
             'name': self.name,
-            'auctions': [auction.id for auction in self.auctions]
+            # An auction is stored once per snapshot it was seen in
+            'auctions': sorted({auction.id for auction in self.auctions})
         }
 
     def __repr__(self):
-        return (
-            f'<Item id:int:{self.id}, name:str:{self.name}, auctions:list:'
-            f'{[auction.serialize() for auction in self.auctions]}>'
-        )
+        return f'<Item id:int:{self.id}, name:str:{self.name}>'
@@ -0,0 +1,45 @@
+from sqlalchemy.sql.schema import Column, ForeignKey
+from sqlalchemy.sql.sqltypes import BigInteger, DateTime, Float, Integer
+
+from backend.database import db
+
+
+class ItemPriceStats(db.Model):  # type: ignore
+    """Models the price statistics of an item in a single snapshot.
+
+    Rows are derived from `auctions` and kept up to date by
+    `backend.services.history.rollup`.
+    """
+
+    __tablename__ = 'item_price_stats'
+
+    item_id = Column(Integer, ForeignKey('items.id', ondelete='CASCADE'),
+                     primary_key=True, autoincrement=False)
+    timestamp = Column(DateTime, primary_key=True)
+    min_price = Column(Float)
+    p25_price = Column(Float)
+    median_price = Column(Float)
+    mean_price = Column(Float)
+    quantity = Column(BigInteger, nullable=False)
+    auctions = Column(Integer, nullable=False)
+
+    def serialize(self):
+        return {
+            'item_id': self.item_id,
+            'timestamp': self.timestamp,
+            'min': self.min_price,
+            'p25': self.p25_price,
+            'median': self.median_price,
+            'mean': self.mean_price,
+            'quantity': self.quantity,
+            'auctions': self.auctions
+        }
+
+    def __repr__(self):
+        return (
+            f'<ItemPriceStats item_id:int:{self.item_id}, '
+            f'timestamp:datetime:{self.timestamp}, '
+            f'min_price:float:{self.min_price}, '
+            f'median_price:float:{self.median_price}, '
+            f'auctions:int:{self.auctions}>'
+        )
@@ -0,0 +1,42 @@
+from sqlalchemy.dialects.postgresql import ARRAY
+from sqlalchemy.sql.schema import Column
+from sqlalchemy.sql.sqltypes import DateTime, Integer
+
+from backend.database import db
+
+# Columns holding the auction ids of each kind of change, in that order
+DIFF_KINDS = ('new', 'sold', 'expired', 'relisted', 'price_changed')
+
+
+class SnapshotDiff(db.Model):  # type: ignore
+    """Models the changes between a snapshot and the one before it.
+
+    Each kind of change is a sorted array of auction ids. Rows are derived
+    from `auctions` by `backend.services.snapshots`.
+    """
+
+    __tablename__ = 'snapshot_diffs'
+
+    timestamp = Column(DateTime, primary_key=True)
+    previous_timestamp = Column(DateTime, nullable=False)
+    new = Column(ARRAY(Integer), nullable=False)
+    sold = Column(ARRAY(Integer), nullable=False)
+    expired = Column(ARRAY(Integer), nullable=False)
+    relisted = Column(ARRAY(Integer), nullable=False)
+    price_changed = Column(ARRAY(Integer), nullable=False)
+
+    def serialize(self):
+        return {
+            'timestamp': self.timestamp,
+            'previous_timestamp': self.previous_timestamp,
+            'counts': {kind: len(getattr(self, kind)) for kind in DIFF_KINDS},
+            **{kind: getattr(self, kind) for kind in DIFF_KINDS}
+        }
+
+    def __repr__(self):
+        return (
+            f'<SnapshotDiff timestamp:datetime:{self.timestamp}, '
+            f'previous_timestamp:datetime:{self.previous_timestamp}, '
+            f'new:int[]:{len(self.new)}, sold:int[]:{len(self.sold)}, '
+            f'expired:int[]:{len(self.expired)}>'
+        )
@@ -0,0 +1,189 @@
+from datetime import datetime, timedelta, timezone
+from itertools import chain
+from typing import Iterable, List, Optional, Tuple
+
+from sqlalchemy import event, text
+
+from backend.database import db
+from backend.database.models import Auction
+from backend.database.versions import mark_changed
+
+# auctions is range partitioned by timestamp into one table per week,
+# named after the Monday the week starts on
+PARTITION_INTERVAL = timedelta(weeks=1)
+PARTITION_PREFIX = 'auctions_p'
+
+# Whether auctions is partitioned, by database URL. Only migrations change
+# it, so the catalog is not queried again on every flush
+_partitioned = {}
+
+
+def partition_start(timestamp: datetime) -> datetime:
+    """Gets the start of the partition a timestamp falls into."""
+    day = datetime(timestamp.year, timestamp.month, timestamp.day)
+
+    return day - timedelta(days=day.weekday())
+
+
+def partition_name(start: datetime) -> str:
+    return f'{PARTITION_PREFIX}{start:%Y%m%d}'
+
+
+def _as_datetime(value) -> Optional[datetime]:
+    # Models may still hold the string a client sent before they are flushed
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace('Z', '+00:00'))
+        except ValueError:
+            return None
+
+    if not isinstance(value, datetime):
+        return None
+
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return value
+
+
+def is_partitioned(connection=None) -> bool:
+    connection = connection or db.session.connection()
+
+    if connection.dialect.name != 'postgresql':
+        return False
+
+    url = str(connection.engine.url)
+
+    if url not in _partitioned:
+        _partitioned[url] = bool(connection.execute(text(
+            "SELECT EXISTS (SELECT FROM pg_partitioned_table "
+            "WHERE partrelid = to_regclass('auctions'))"
+        )).scalar())
+
+    return _partitioned[url]
+
+
+def ensure_partitions(timestamps: Iterable, connection=None) -> List[str]:
+    """Creates the partitions that rows with the given timestamps need.
+
+    auctions has no default partition, so a row whose partition was not
+    created beforehand is rejected by the database with a check
+    violation. Timestamps must therefore be datetimes or ISO-8601 strings,
+    others are skipped here and their rows rejected.
+
+    Args:
+        timestamps (Iterable): Timestamps about to be written.
+        connection (Connection, optional): Connection to write through.
+        Defaults to the one of the current session.
+
+    Returns:
+        list: Names of the partitions created.
+    """
+    starts = {
+        partition_start(timestamp) for timestamp in map(_as_datetime,
+                                                        timestamps)
+        if timestamp is not None
+    }
+    connection = connection or db.session.connection()
+
+    if not starts or not is_partitioned(connection):
+        return []
+
+    created = []
+
+    for start in sorted(starts):
+        name = partition_name(start)
+
+        if connection.execute(text('SELECT to_regclass(:name)'),
+                              {'name': name}).scalar():
+            continue
+
+        connection.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {name} PARTITION OF auctions "
+            f"FOR VALUES FROM ('{start.isoformat()}') "
+            f"TO ('{(start + PARTITION_INTERVAL).isoformat()}')"
+        ))
+        created.append(name)
+
+    return created
+
+
+def list_partitions(connection=None) -> List[Tuple[str, datetime]]:
+    """Lists the partitions of auctions.
+
+    Returns:
+        list: Name and start of each partition, oldest first.
+    """
+    connection = connection or db.session.connection()
+
+    if not is_partitioned(connection):
+        return []
+
+    names = connection.execute(text(
+        "SELECT c.relname FROM pg_inherits AS i "
+        "JOIN pg_class AS c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = 'auctions'::regclass"
+    )).scalars()
+
+    return sorted(
+        (name, datetime.strptime(name[len(PARTITION_PREFIX):], '%Y%m%d'))
+        for name in names if name.startswith(PARTITION_PREFIX)
+    )
+
+
+def prune_partitions(max_age: timedelta,
+                     now: Optional[datetime] = None) -> List[str]:
+    """Drops the partitions whose newest possible row is older than max_age.
+
+    Auctions in a partition that have no price statistics yet are rolled
+    up before it is dropped, so price history outlives the raw rows.
+
+    Args:
+        max_age (timedelta): Retention period of raw auctions.
+        now (datetime, optional): Reference time. Defaults to UTC now.
+
+    Returns:
+        list: Names of the partitions dropped.
+    """
+    # Imported here so the database package does not depend on the
+    # services when it is set up
+    from backend.services.history import refresh_price_stats
+
+    cutoff = (now or datetime.utcnow()) - max_age
+    dropped = []
+
+    try:
+        for name, start in list_partitions():
+            if start + PARTITION_INTERVAL > cutoff:
+                continue
+
+            missing = db.session.execute(text(
+                f'SELECT DISTINCT a.item_id, a.timestamp FROM {name} AS a '
+                f'LEFT JOIN item_price_stats AS s '
+                f'USING (item_id, timestamp) WHERE s.item_id IS NULL'
+            )).all()
+            refresh_price_stats(missing, model=Auction)
+
+            db.session.execute(text(f'DROP TABLE {name}'))
+            mark_changed('auctions')
+            dropped.append(name)
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return dropped
+
+
+@event.listens_for(db.session, 'before_flush')
+def _ensure_flushed_partitions(session, flush_context, instances):
+    # Auctions written through the models, e.g. by the blueprints. Bulk
+    # loads create the partitions of each batch themselves
+    timestamps = {
+        obj.timestamp for obj in chain(session.new, session.dirty)
+        if isinstance(obj, Auction)
+    }
+
+    if timestamps:
+        ensure_partitions(timestamps, session.connection())
@@ -0,0 +1,204 @@
+import logging
+import threading
+import time
+from typing import Callable, Optional
+
+from flask import g, has_request_context, request
+from flask_sqlalchemy import SignallingSession
+from sqlalchemy import event, exc
+
+logger = logging.getLogger(__name__)
+
+# Bind key of the replica in SQLALCHEMY_BINDS
+REPLICA_BIND = 'replica'
+
+_READ_METHODS = ('GET', 'HEAD')
+
+
+class ReplicaRouter:
+    """Decides whether the reads of a request may go to the read replica.
+
+    Reads are sent to the primary for `sticky_seconds` after a client
+    wrote, so it reads its own writes despite the replication lag, and
+    for `retry_interval` seconds after the replica failed. The replica is
+    probed with a connection before being used again.
+
+    Sticky clients are kept in a cache backend, set by `configure`, so
+    workers sharing the backend also share them. Without one, reads are
+    never sticky.
+    """
+
+    def __init__(self, engine, sticky_seconds: float = 5.0,
+                 retry_interval: float = 30.0,
+                 clock: Callable[[], float] = time.monotonic):
+        """Class constructor.
+
+        Args:
+            engine (Engine): Engine of the read replica.
+            sticky_seconds (float, optional): Seconds a client reads from
+            the primary after a write. Defaults to 5.
+            retry_interval (float, optional): Seconds before a failed
+            replica is probed again. Defaults to 30.
+            clock (Callable, optional): Monotonic time source. Defaults to
+            `time.monotonic`.
+        """
+        self.engine = engine
+        self.sticky_seconds = sticky_seconds
+        self.retry_interval = retry_interval
+        self.backend = None
+        self._clock = clock
+        self._healthy = False
+        self._down_until: Optional[float] = None
+        # Reentrant, as a failing probe marks the replica down
+        self._lock = threading.RLock()
+
+        self.stats = {
+            'probes': 0,
+            'failures': 0
+        }
+
+        event.listen(engine, 'handle_error', self._handle_error)
+
+    def configure(self, backend):
+        """Keeps sticky clients in a cache backend."""
+        self.backend = backend
+
+    def _handle_error(self, context):
+        # Statement errors say nothing about the health of the replica
+        if context.is_disconnect or context.connection is None:
+            self.mark_down()
+
+    def mark_down(self):
+        """Sends reads to the primary until the replica is probed again."""
+        with self._lock:
+            if self._healthy or self._down_until is None:
+                logger.warning('Read replica unavailable, reading from the '
+                               'primary for %s seconds', self.retry_interval)
+
+            self._healthy = False
+            self._down_until = self._clock() + self.retry_interval
+            self.stats['failures'] += 1
+
+    def _probe(self) -> bool:
+        self.stats['probes'] += 1
+
+        try:
+            with self.engine.connect() as conn:
+                conn.exec_driver_sql('SELECT 1')
+        except exc.DBAPIError:
+            # Unless _handle_error already did
+            if self._down_until is None or \
+               self._clock() >= self._down_until:
+                self.mark_down()
+
+            return False
+
+        self._healthy = True
+        self._down_until = None
+        return True
+
+    def is_available(self) -> bool:
+        """Whether the replica is believed to be up, probing it if needed.
+        """
+        if self._healthy:
+            return True
+
+        # A single request probes, the others read from the primary
+        with self._lock:
+            if self._healthy:
+                return True
+
+            if self._down_until is not None and \
+               self._clock() < self._down_until:
+                return False
+
+            return self._probe()
+
+    @staticmethod
+    def _key(subject: str) -> str:
+        return f'sticky:{subject}'
+
+    def stick(self, subject: str):
+        """Sends the reads of a client to the primary for a while."""
+        if self.backend is not None:
+            self.backend.set(self._key(subject), b'1',
+                             ttl=self.sticky_seconds)
+
+    def is_sticky(self, subject: str) -> bool:
+        return self.backend is not None and \
+            self.backend.get(self._key(subject)) is not None
+
+    def reads_from_replica(self) -> bool:
+        """Whether the statements of the current request go to the replica.
+        """
+        if not has_request_context() or not g.get('read_from_replica'):
+            return False
+
+        # Known once requires_auth ran, which happens before any query
+        subject = g.get('auth_subject')
+
+        if subject is not None:
+            if 'replica_sticky' not in g:
+                g.replica_sticky = self.is_sticky(subject)
+
+            if g.replica_sticky:
+                return False
+
+        return self.is_available()
+
+
+class RoutingSession(SignallingSession):
+    """Session sending the reads of replica routes to the read replica."""
+
+    def get_bind(self, mapper=None, clause=None, **kwargs):
+        router = self.app.extensions.get('replica')
+
+        if router is not None and not self._flushing and \
+           router.reads_from_replica():
+            return router.engine
+
+        return super().get_bind(mapper, clause)
+
+
+def read_from_primary():
+    """Sends the remaining reads of the current request to the primary."""
+    if has_request_context():
+        g.read_from_replica = False
+
+
+def read_from_replica(blueprint):
+    """Routes the GET and HEAD requests of a blueprint to the replica.
+
+    Args:
+        blueprint (Blueprint): Blueprint whose reads may be served from
+        the replica.
+    """
+    @blueprint.before_request
+    def use_replica():
+        if request.method in _READ_METHODS:
+            g.read_from_replica = True
+
+
+def setup_replica(app, engine):
+    """Attaches a read replica router to a Flask application.
+
+    Clients that successfully sent a write read from the primary for
+    `SQL_REPLICA_STICKY_SECONDS` afterwards.
+
+    Args:
+        app (Flask): The application to configure.
+        engine (Engine): Engine of the read replica.
+    """
+    app.extensions['replica'] = router = ReplicaRouter(
+        engine,
+        sticky_seconds=app.config['SQL_REPLICA_STICKY_SECONDS'],
+        retry_interval=app.config['SQL_REPLICA_RETRY_INTERVAL']
+    )
+
+    @app.after_request
+    def stick_writers(response):
+        if request.method not in _READ_METHODS and \
+           response.status_code < 400 and 'auth_subject' in g:
+            router.stick(g.auth_subject)
+
+        return response
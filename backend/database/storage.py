@@ -0,0 +1,117 @@
+from datetime import datetime, timedelta
+from typing import Optional
+
+from sqlalchemy import func, select, text
+
+from backend.database import db
+from backend.database.models import (
+    Auction,
+    AuctionChange,
+    AuctionListing,
+    AuctionSnapshot,
+    DeltaAuction
+)
+from backend.database.versions import mark_changed
+
+# rows stores every auction once per snapshot in `auctions`, delta stores
+# it once in `auction_listings` with the changes of its values
+STORAGE_MODES = ('rows', 'delta')
+
+# Why writes other than snapshot ingests fail in delta mode
+READ_ONLY_MESSAGE = ('Auctions are stored as deltas, which only '
+                     '`flask ingest snapshot` can write to.')
+
+
+def storage_mode(app=None) -> str:
+    """Gets the `AUCTIONS_STORAGE` setting of an application.
+
+    Args:
+        app (Flask, optional): Defaults to the current application.
+
+    Raises:
+        ValueError: The setting names an unknown mode.
+    """
+    mode = (app or db.get_app()).config['AUCTIONS_STORAGE']
+
+    if mode not in STORAGE_MODES:
+        raise ValueError(f"Unknown auction storage '{mode}', expected one "
+                         f"of {', '.join(STORAGE_MODES)}.")
+
+    return mode
+
+
+def auction_model():
+    """Gets the model auctions are read through in the current storage mode.
+
+    Both models have the same columns, `DeltaAuction` is read-only.
+    """
+    return DeltaAuction if storage_mode() == 'delta' else Auction
+
+
+def snapshot_timestamps():
+    """Gets a column whose values are the timestamps of the snapshots.
+
+    The delta store keeps them in a table of their own, which is far
+    cheaper to search than the auctions.
+    """
+    if storage_mode() == 'delta':
+        return AuctionSnapshot.timestamp
+
+    return Auction.timestamp
+
+
+def latest_snapshot(connection=None) -> Optional[datetime]:
+    """Gets the timestamp of the newest snapshot of the delta store."""
+    connection = connection or db.session.connection()
+
+    return connection.scalar(select(func.max(AuctionSnapshot.timestamp)))
+
+
+def prune_deltas(max_age: timedelta,
+                 now: Optional[datetime] = None) -> int:
+    """Drops the snapshots of the delta store older than max_age.
+
+    Listings last seen before the cutoff are deleted with their changes,
+    as are the changes of other listings that no longer held by then.
+    Like `prune_partitions`, auctions without price statistics are rolled
+    up first.
+
+    Args:
+        max_age (timedelta): Retention period of raw auctions.
+        now (datetime, optional): Reference time. Defaults to UTC now.
+
+    Returns:
+        int: Number of snapshots dropped.
+    """
+    from backend.services.history import refresh_price_stats
+
+    cutoff = (now or datetime.utcnow()) - max_age
+    snapshots = AuctionSnapshot.__table__
+
+    try:
+        missing = db.session.execute(text(
+            'SELECT DISTINCT a.item_id, a.timestamp FROM delta_auctions AS a '
+            'LEFT JOIN item_price_stats AS s USING (item_id, timestamp) '
+            'WHERE a.timestamp < :cutoff AND s.item_id IS NULL'
+        ), {'cutoff': cutoff}).all()
+        refresh_price_stats(missing, model=DeltaAuction)
+
+        db.session.execute(AuctionListing.__table__.delete().where(
+            AuctionListing.last_seen < cutoff
+        ))
+        db.session.execute(AuctionChange.__table__.delete().where(
+            AuctionChange.until <= cutoff
+        ))
+        dropped = db.session.execute(snapshots.delete().where(
+            snapshots.c.timestamp < cutoff
+        )).rowcount
+
+        if dropped:
+            mark_changed('auctions')
+
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return dropped
@@ -0,0 +1,268 @@
+import random
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+from sqlalchemy import event, text
+
+from backend.database import db
+
+# Row of `table_versions` telling the versions of different databases apart
+_EPOCH = '__epoch__'
+
+# Tables whose rows change when rows of the key table do, through
+# ON DELETE CASCADE or the rollups derived from auctions
+DEPENDENT_TABLES = {
+    'items': ('auctions', 'item_price_stats'),
+    'auctions': ('item_price_stats', 'snapshot_diffs'),
+}
+
+# Tables with a version, as named by `table_versions`. The tables of the
+# delta store count as auctions
+VERSIONED_TABLES = {
+    'items': 'items',
+    'auctions': 'auctions',
+    'auction_snapshots': 'auctions',
+    'auction_listings': 'auctions',
+    'auction_changes': 'auctions',
+    'item_price_stats': 'item_price_stats',
+    'snapshot_diffs': 'snapshot_diffs',
+}
+
+
+def _is_shared(engine) -> bool:
+    # The versions are kept in sequences, which only Postgres has
+    return engine.dialect.name == 'postgresql'
+
+
+class TableVersions:
+    """Per-table counters bumped whenever a transaction changes a table.
+
+    Caches derive their keys from the versions of the tables a response
+    was read from, so a bump invalidates every response built on the
+    table without having to track them individually.
+
+    On Postgres the counters are sequences of the primary, read through
+    the `table_versions` view. Writes made without the application, e.g.
+    from psql, are bumped by triggers as they commit, and the application
+    bumps the tables of its own transactions right after they commit.
+    Each process reads the versions again at most every `poll_interval`
+    seconds, and learns the versions of its own commits right away.
+
+    Other databases have no sequences, and each process counts the
+    commits it makes itself. Its epoch is drawn at random, so versions
+    are never mistaken for those of another process.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic):
+        self.poll_interval = 0.0
+        self._clock = clock
+        self._url: Optional[str] = None
+        self._polled_at: Optional[float] = None
+        self._versions: dict = {}
+        # When this process first saw each version
+        self._changed_at: dict = {}
+        self._lock = threading.Lock()
+
+    def configure(self, poll_interval: float = 1.0):
+        """Sets how long the versions of other processes may go unseen.
+
+        Args:
+            poll_interval (float, optional): Maximum number of seconds
+            before a bump made by another process is seen. Defaults to 1.
+        """
+        self.poll_interval = poll_interval
+
+    def _reset(self, url: str, shared: bool):
+        self._url = url
+        self._polled_at = None
+        self._versions = {} if shared else {_EPOCH: random.getrandbits(31)}
+        self._changed_at = {}
+
+    def update(self, rows: Iterable, url: Optional[str] = None):
+        """Records versions read from the database.
+
+        Versions never go back, rows read before a concurrent bump are
+        left out.
+
+        Args:
+            rows (Iterable): Every row of `table_versions`, as pairs of
+            table name and version.
+            url (str, optional): URL of the database they were read from.
+            Defaults to the one of the current application.
+        """
+        url = url or str(db.engine.url)
+        now = self._clock()
+
+        with self._lock:
+            # Versions of another database tell nothing about this one
+            if url != self._url:
+                self._reset(url, shared=True)
+
+            for table, version in rows:
+                known = self._versions.get(table)
+
+                if known is None or version > known:
+                    self._versions[table] = version
+
+                    # The first version seen of a table is no change
+                    if known is not None:
+                        self._changed_at[table] = now
+
+            self._polled_at = now
+
+    def bump(self, tables: Iterable[str]):
+        """Counts a commit changing the tables, on databases without
+        shared versions."""
+        url = str(db.engine.url)
+        now = self._clock()
+
+        with self._lock:
+            if url != self._url:
+                self._reset(url, shared=False)
+
+            for table in tables:
+                self._versions[table] = self._versions.get(table, 0) + 1
+                self._changed_at[table] = now
+
+    def _poll(self):
+        engine = db.engine
+        url = str(engine.url)
+
+        if not _is_shared(engine):
+            if url != self._url:
+                with self._lock:
+                    self._reset(url, shared=False)
+
+            return
+
+        if url == self._url and self._polled_at is not None and \
+           self._clock() - self._polled_at < self.poll_interval:
+            return
+
+        with engine.connect() as connection:
+            rows = connection.execute(text(
+                'SELECT name, version FROM table_versions'
+            )).all()
+
+        self.update(rows, url)
+
+    @property
+    def epoch(self) -> str:
+        self._poll()
+        return '%08x' % self._versions.get(_EPOCH, 0)
+
+    def get(self, table: str) -> int:
+        self._poll()
+        return self._versions.get(table, 0)
+
+    def changed_within(self, tables: Iterable[str], seconds: float) -> bool:
+        """Whether one of the tables changed in the last `seconds`, as
+        far as this process knows."""
+        self._poll()
+        since = self._clock() - seconds
+
+        return any(self._changed_at.get(table, since) > since
+                   for table in tables)
+
+    def token(self, tables: Iterable[str]) -> str:
+        """Summarises the versions of the given tables in a string."""
+        return self.epoch + ''.join(
+            f';{table}={self.get(table)}' for table in tables
+        )
+
+
+table_versions = TableVersions()
+
+
+def _mark(tables: Iterable[str], session):
+    changed = session.info.setdefault('changed_tables', set())
+
+    for table in tables:
+        if table in VERSIONED_TABLES:
+            table = VERSIONED_TABLES[table]
+            changed.add(table)
+            changed.update(DEPENDENT_TABLES.get(table, ()))
+
+
+def mark_changed(*tables: str, session=None):
+    """Records tables changed outside of the ORM, e.g. through Core.
+
+    Their versions are bumped when the current transaction commits.
+
+    Args:
+        tables (str): Names of the changed tables.
+        session (Session, optional): Session whose transaction changed
+        them. Defaults to the current session.
+    """
+    session = session or db.session
+    _mark(tables, session)
+    # Changes of flushed objects can be followed, these cannot
+    session.info.setdefault('changed_outside_orm', set()).update(tables)
+
+
+@event.listens_for(db.session, 'after_flush')
+def _mark_flushed_tables(session, flush_context):
+    _mark((obj.__table__.name for obj in
+           (*session.new, *session.dirty, *session.deleted)), session)
+
+
+@event.listens_for(db.session, 'after_bulk_update')
+@event.listens_for(db.session, 'after_bulk_delete')
+def _mark_bulk_tables(context):
+    mark_changed(context.mapper.local_table.name, session=context.session)
+
+
+@event.listens_for(db.session, 'before_commit')
+def _flag_changed_tables(session):
+    # Objects still pending mark their tables as they are flushed
+    session.flush()
+    tables = session.info.get('changed_tables')
+
+    if not tables or not _is_shared(db.engine):
+        return
+
+    # Their versions are bumped once the commit is visible. Bumped before,
+    # another process could cache rows it read meanwhile under the new
+    # version. The triggers of the tables are told to leave them alone
+    session.execute(text(
+        "SELECT set_config('table_versions.bumped_after_commit_' || name, "
+        "'on', true) FROM unnest(CAST(:tables AS text[])) AS name"
+    ), {'tables': sorted(tables)}, bind_arguments={'bind': db.engine})
+
+
+@event.listens_for(db.session, 'after_commit')
+def _bump_committed_tables(session):
+    tables = session.info.pop('changed_tables', ())
+    versions = {}
+
+    if tables and _is_shared(db.engine):
+        # Outside of the committed transaction, sequences need no lock.
+        # Every version is read back, so this process is up to date
+        with db.engine.connect() as connection:
+            rows = connection.execute(text(
+                "WITH bumped AS (SELECT name, nextval(format("
+                "'table_version_%s', name)) AS version "
+                "FROM unnest(CAST(:tables AS text[])) AS name) "
+                "SELECT name, coalesce(b.version, v.version) "
+                "FROM table_versions AS v LEFT JOIN bumped AS b USING (name)"
+            ), {'tables': sorted(tables)}).all()
+
+        table_versions.update(rows)
+        versions = {table: version for table, version in rows
+                    if table in tables}
+    elif tables:
+        table_versions.bump(tables)
+        versions = {table: table_versions.get(table) for table in tables}
+
+    # Read by the listeners registered after this one, see
+    # backend.services.catalogue
+    session.info['committed_versions'] = versions
+    session.info['committed_outside_orm'] = \
+        session.info.pop('changed_outside_orm', set())
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_rolled_back_tables(session):
+    session.info.pop('changed_tables', None)
+    session.info.pop('changed_outside_orm', None)
@@ -1 +1,3 @@
-from backend.services.auth.auth import AuthError, requires_auth
+from backend.services.auth.auth import AuthError, requires_auth, setup_auth
+from backend.services.auth.jwks import JWKSKeyStore
+from backend.services.auth.token_cache import TokenCache
@@ -1,10 +1,18 @@
 import os
-import json
+import time
 from functools import wraps
 
-from flask import request, current_app
+from flask import g, request, current_app
 from jose import jwt
-from urllib.request import urlopen
+
+from backend.services.auth.jwks import JWKSKeyStore
+from backend.services.auth.token_cache import TokenCache
+from backend.services.cache.backends import (
+    MemoryBackend,
+    create_backend,
+    get_cache_url
+)
+from backend.services.metrics import AUTH_VERIFICATION
 
 
 class AuthError(Exception):
@@ -22,6 +30,36 @@ class AuthError(Exception):
         self.status_code = status_code
 
 
+def setup_auth(app):
+    """Attaches the JWKS key store and token cache to a Flask application.
+
+    The JWKS keys are shared through `CACHE_URL`. Verified token payloads
+    stay in each process unless `AUTH_TOKEN_CACHE_SHARED` is set.
+
+    Args:
+        app (Flask): The application to configure.
+    """
+    url = get_cache_url(app)
+    token_bounds = {'max_entries': app.config['AUTH_TOKEN_CACHE_SIZE']}
+
+    if app.config['AUTH_TOKEN_CACHE_SHARED']:
+        token_backend = create_backend(url, 'tokens', **token_bounds)
+    else:
+        token_backend = MemoryBackend(**token_bounds)
+
+    app.extensions['jwks'] = JWKSKeyStore(
+        app.config['AUTH_JWKS_URL'],
+        ttl=app.config['AUTH_JWKS_TTL'],
+        min_refresh_interval=app.config['AUTH_JWKS_MIN_REFRESH_INTERVAL'],
+        backend=create_backend(url, 'jwks')
+    )
+    app.extensions['token_cache'] = TokenCache(
+        max_size=app.config['AUTH_TOKEN_CACHE_SIZE'],
+        max_age=app.config['AUTH_TOKEN_CACHE_MAX_AGE'],
+        backend=token_backend
+    )
+
+
 def _get_token_auth_header():
     """Get a token from an Authorization header.
 
@@ -93,9 +131,6 @@ def _verify_decode_jwt(token):
         # Raised of the token is not a self-signed token
         pass
 
-    jsonurl = urlopen(f"https://{current_app.config['AUTH_DOMAIN']}"
-                      "/.well-known/jwks.json")
-    jwks = json.loads(jsonurl.read())
     unverified_header = jwt.get_unverified_header(token)
     rsa_key = {}
 
@@ -105,15 +140,16 @@ def _verify_decode_jwt(token):
             'description': 'Authorization malformed.'
         }, 401)
 
-    for key in jwks['keys']:
-        if key['kid'] == unverified_header['kid']:
-            rsa_key = {
-                'kty': key['kty'],
-                'kid': key['kid'],
-                'use': key['use'],
-                'n': key['n'],
-                'e': key['e']
-            }
+    key = current_app.extensions['jwks'].get_key(unverified_header['kid'])
+
+    if key:
+        rsa_key = {
+            'kty': key['kty'],
+            'kid': key['kid'],
+            'use': key['use'],
+            'n': key['n'],
+            'e': key['e']
+        }
 
     if rsa_key:
         try:
@@ -187,7 +223,30 @@ def requires_auth(permission=''):
         @wraps(f)
         def wrapper(*args, **kwargs):
             token = _get_token_auth_header()
-            payload = _verify_decode_jwt(token)
+            token_cache = current_app.extensions['token_cache']
+            start = time.perf_counter()
+            payload = token_cache.get(token)
+            result = 'cached'
+
+            if payload is None:
+                # Raises for rejected tokens, so those never get cached
+                try:
+                    payload = _verify_decode_jwt(token)
+                except Exception:
+                    AUTH_VERIFICATION.observe(time.perf_counter() - start,
+                                              ('rejected',))
+                    raise
+
+                token_cache.put(token, payload)
+                result = 'verified'
+
+            AUTH_VERIFICATION.observe(time.perf_counter() - start, (result,))
+
+            # Keys per-client state such as reads sticking to the primary.
+            # Tokens without a subject are keyed by themselves
+            g.auth_subject = payload['sub'] if 'sub' in payload \
+                else f'token:{token_cache.digest(token)}'
+
             _check_permissions(permission, payload)
             return f(payload, *args, **kwargs)
         return wrapper
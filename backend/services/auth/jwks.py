@@ -0,0 +1,209 @@
+import json
+import logging
+import threading
+import time
+from typing import Callable, Optional
+from urllib.request import urlopen
+
+from backend.services.cache.backends import CacheBackend
+
+logger = logging.getLogger(__name__)
+
+
+def _fetch_url(url: str, timeout: float) -> dict:
+    """Fetches and parses a JWKS document.
+
+    Any scheme supported by `urlopen` works, so tests can point the store at
+    a `file://` path or a local stub server.
+
+    Args:
+        url (str): Location of the JWKS document.
+        timeout (float): Socket timeout in seconds.
+
+    Returns:
+        dict: The parsed JWKS document.
+    """
+    with urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+class JWKSKeyStore:
+    """In-process cache of the identity provider's signing keys.
+
+    Keys are indexed by `kid` and kept for `ttl` seconds. A lookup for an
+    unknown `kid` triggers at most one refresh, and concurrent misses share
+    that refresh instead of each hitting the identity provider. When a
+    refresh fails the previously fetched keys keep being served.
+
+    With a shared cache backend, fetched documents are published to it and
+    a refresh first adopts a document another process fetched recently.
+    """
+
+    def __init__(self, url: str, ttl: float = 3600,
+                 min_refresh_interval: float = 30, timeout: float = 5,
+                 fetch: Optional[Callable[[str, float], dict]] = None,
+                 clock: Callable[[], float] = time.monotonic,
+                 backend: Optional[CacheBackend] = None):
+        """Class constructor.
+
+        Args:
+            url (str): Location of the JWKS document.
+            ttl (float, optional): Seconds before fetched keys are considered
+            stale. Defaults to 3600.
+            min_refresh_interval (float, optional): Minimum seconds between
+            two refreshes caused by unknown `kid`s or failed fetches.
+            Defaults to 30.
+            timeout (float, optional): Fetch timeout in seconds. Defaults
+            to 5.
+            fetch (callable, optional): Replaces the HTTP fetch, mostly for
+            tests. Defaults to None.
+            clock (callable, optional): Monotonic clock. Defaults to
+            `time.monotonic`.
+            backend (CacheBackend, optional): Backend shared with other
+            processes. Defaults to None, each process fetches on its own.
+        """
+        self.url = url
+        self.ttl = ttl
+        self.min_refresh_interval = min_refresh_interval
+        self.timeout = timeout
+        self._fetch = fetch or _fetch_url
+        self._clock = clock
+        self.backend = backend
+
+        self._keys: dict = {}
+        self._shared_at: Optional[float] = None
+        self._fetched_at: Optional[float] = None
+        self._attempted_at: Optional[float] = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0,
+            'refreshes': 0,
+            'shared_loads': 0,
+            'refresh_failures': 0,
+            'refresh_seconds_total': 0.0,
+            'last_refresh_seconds': 0.0
+        }
+
+    def _is_fresh(self) -> bool:
+        return (self._fetched_at is not None and
+                self._clock() - self._fetched_at < self.ttl)
+
+    @staticmethod
+    def _index(jwks: dict) -> dict:
+        return {key['kid']: key for key in jwks['keys'] if 'kid' in key}
+
+    def _load_shared(self) -> bool:
+        """Adopts a document another process published since the last one.
+
+        Returns:
+            bool: Whether a document was adopted.
+        """
+        if self.backend is None:
+            return False
+
+        try:
+            value = self.backend.get(self.url)
+        except Exception:
+            logger.exception('Unable to read shared JWKS for %s', self.url)
+            return False
+
+        if value is None:
+            return False
+
+        document = json.loads(value)
+
+        if self._shared_at is not None and \
+           document['fetched_at'] <= self._shared_at:
+            return False
+
+        # The backend stores wall clock times, the store a monotonic clock
+        age = max(time.time() - document['fetched_at'], 0)
+
+        self._keys = self._index(document['jwks'])
+        self._fetched_at = self._clock() - age
+        self._shared_at = document['fetched_at']
+        self._generation += 1
+        self.stats['shared_loads'] += 1
+        return True
+
+    def _publish(self, jwks: dict):
+        fetched_at = time.time()
+
+        try:
+            self.backend.set(self.url, json.dumps({
+                'fetched_at': fetched_at,
+                'jwks': jwks
+            }).encode(), ttl=self.ttl)
+        except Exception:
+            logger.exception('Unable to share JWKS for %s', self.url)
+            return
+
+        self._shared_at = fetched_at
+
+    def get_key(self, kid: str) -> Optional[dict]:
+        """Returns the JWK with the given `kid`.
+
+        Args:
+            kid (str): Key id taken from the token header.
+
+        Returns:
+            dict: The matching JWK, or None if the key is unknown even after
+            a refresh.
+        """
+        key = self._keys.get(kid)
+
+        if key is not None and self._is_fresh():
+            self.stats['hits'] += 1
+            return key
+
+        self.stats['misses'] += 1
+        self._refresh(self._generation)
+
+        # Stale keys are preferred over no keys at all if the refresh failed
+        return self._keys.get(kid)
+
+    def _refresh(self, seen_generation: int):
+        """Fetches the JWKS document unless another thread just did.
+
+        Args:
+            seen_generation (int): Generation observed by the caller before
+            it decided to refresh.
+        """
+        with self._lock:
+            # Someone else refreshed while we were waiting for the lock
+            if self._generation != seen_generation or self._load_shared():
+                return
+
+            now = self._clock()
+
+            # Unknown kids and failing fetches must not turn every request
+            # into a round trip to the identity provider
+            if self._attempted_at is not None and \
+               now - self._attempted_at < self.min_refresh_interval:
+                return
+
+            self._attempted_at = now
+            start = time.perf_counter()
+
+            try:
+                jwks = self._fetch(self.url, self.timeout)
+                keys = self._index(jwks)
+            except Exception:
+                self.stats['refresh_failures'] += 1
+                logger.exception('Unable to refresh JWKS from %s', self.url)
+                return
+            finally:
+                elapsed = time.perf_counter() - start
+                self.stats['refreshes'] += 1
+                self.stats['refresh_seconds_total'] += elapsed
+                self.stats['last_refresh_seconds'] = elapsed
+
+            self._keys = keys
+            self._fetched_at = now
+            self._generation += 1
+
+            if self.backend is not None:
+                self._publish(jwks)
@@ -0,0 +1,104 @@
+import hashlib
+import json
+import threading
+import time
+from typing import Callable, Optional
+
+from backend.services.cache.backends import CacheBackend, MemoryBackend
+
+
+class TokenCache:
+    """Bounded LRU cache of verified JWT payloads.
+
+    Entries are keyed by a SHA-256 digest of the raw token so the tokens
+    themselves are never stored. An entry lives until the token's `exp`
+    claim or `max_age` seconds, whichever comes first.
+    """
+
+    def __init__(self, max_size: int = 1024, max_age: float = 300,
+                 clock: Callable[[], float] = time.time,
+                 backend: Optional[CacheBackend] = None):
+        """Class constructor.
+
+        Args:
+            max_size (int, optional): Maximum number of cached payloads. A
+            size of 0 disables the cache. Defaults to 1024.
+            max_age (float, optional): Maximum seconds a payload is cached
+            for. Defaults to 300.
+            clock (callable, optional): Wall clock, comparable to the `exp`
+            claim. Defaults to `time.time`.
+            backend (CacheBackend, optional): Where payloads are stored.
+            Defaults to an LRU local to the process bounded by max_size.
+        """
+        self.max_size = max_size
+        self.max_age = max_age
+        self._clock = clock
+        self.backend = backend or MemoryBackend(max_entries=max_size,
+                                                clock=clock)
+        self._lock = threading.Lock()
+
+        self.stats = {
+            'hits': 0,
+            'misses': 0
+        }
+
+    @staticmethod
+    def digest(token: str) -> str:
+        """Key of a token, which does not reveal it."""
+        return hashlib.sha256(token.encode()).hexdigest()
+
+    def get(self, token: str) -> Optional[dict]:
+        """Returns the cached payload of a previously verified token.
+
+        Args:
+            token (str): A JSON Web Token.
+
+        Returns:
+            dict: The verified payload, or None on a miss.
+        """
+        if not self.max_size:
+            return None
+
+        key = self.digest(token)
+        value = self.backend.get(key)
+
+        if value is not None:
+            payload, expires_at = json.loads(value)
+
+            if self._clock() < expires_at:
+                with self._lock:
+                    self.stats['hits'] += 1
+                return payload
+
+            self.backend.delete(key)
+
+        with self._lock:
+            self.stats['misses'] += 1
+
+        return None
+
+    def put(self, token: str, payload: dict):
+        """Caches the payload of a token that passed verification.
+
+        Args:
+            token (str): A JSON Web Token.
+            payload (dict): Its verified payload.
+        """
+        if not self.max_size:
+            return
+
+        expires_at = self._clock() + self.max_age
+
+        if isinstance(payload.get('exp'), (int, float)):
+            expires_at = min(expires_at, payload['exp'])
+
+        if expires_at <= self._clock():
+            return
+
+        self.backend.set(self.digest(token),
+                         json.dumps([payload, expires_at]).encode(),
+                         ttl=expires_at - self._clock())
+
+    def clear(self):
+        """Drops every cached payload."""
+        self.backend.clear()
@@ -0,0 +1,9 @@
+from backend.services.cache.backends import (
+    CacheBackend,
+    MemoryBackend,
+    SQLiteBackend,
+    create_backend,
+    get_cache_url
+)
+from backend.services.cache.cache import cached_response, setup_cache
+from backend.services.cache.response_cache import ResponseCache
@@ -0,0 +1,368 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+
+class CacheBackend:
+    """Key-value store the caches of the application are built on.
+
+    Values are bytes, optionally with a time to live in seconds.
+    """
+
+    def get(self, key: str) -> Optional[bytes]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        raise NotImplementedError
+
+    def clear(self):
+        raise NotImplementedError
+
+    @property
+    def stats(self) -> dict:
+        """Number of entries, their total size and evictions so far."""
+        raise NotImplementedError
+
+
+class MemoryBackend(CacheBackend):
+    """LRU store local to the process."""
+
+    def __init__(self, max_bytes: Optional[int] = None,
+                 max_entries: Optional[int] = None,
+                 clock: Callable[[], float] = time.time):
+        """Class constructor.
+
+        Args:
+            max_bytes (int, optional): Maximum total size of the values.
+            Defaults to None, unbounded.
+            max_entries (int, optional): Maximum number of values. Defaults
+            to None, unbounded.
+            clock (callable, optional): Clock the time to live is measured
+            with. Defaults to `time.time`.
+        """
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self._clock = clock
+        self._entries: OrderedDict = OrderedDict()
+        self._bytes = 0
+        self._evictions = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _pop(self, key: str):
+        value, _ = self._entries.pop(key)
+        self._bytes -= len(value)
+
+    def get(self, key: str) -> Optional[bytes]:
+        with self._lock:
+            entry = self._entries.get(key)
+
+            if entry is None:
+                return None
+
+            value, expires_at = entry
+
+            if expires_at is not None and self._clock() >= expires_at:
+                self._pop(key)
+                return None
+
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if self.max_bytes is not None and len(value) > self.max_bytes:
+            return
+
+        expires_at = self._clock() + ttl if ttl is not None else None
+
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+            self._entries[key] = (value, expires_at)
+            self._bytes += len(value)
+
+            while (self.max_bytes is not None and
+                   self._bytes > self.max_bytes) or \
+                  (self.max_entries is not None and
+                   len(self._entries) > self.max_entries):
+                self._pop(next(iter(self._entries)))
+                self._evictions += 1
+
+    def delete(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._pop(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    @property
+    def stats(self) -> dict:
+        return {
+            'entries': len(self._entries),
+            'bytes': self._bytes,
+            'evictions': self._evictions
+        }
+
+
+class SQLiteBackend(CacheBackend):
+    """Store in an SQLite file shared by every process on the host.
+
+    Gunicorn workers pointed at the same file share their cache entries.
+    The file is created readable by its owner only, and a file owned by
+    another user is refused.
+    Entries are evicted oldest first once a bound is exceeded. Each
+    namespace is a table of its own, so the bounds of one cache do not
+    evict the entries of another.
+    """
+
+    def __init__(self, path: str, namespace: str = 'default',
+                 max_bytes: Optional[int] = None,
+                 max_entries: Optional[int] = None, timeout: float = 5):
+        """Class constructor.
+
+        Args:
+            path (str): Location of the database file.
+            namespace (str, optional): Name of the table the entries are
+            kept in. Defaults to 'default'.
+            max_bytes (int, optional): Maximum total size of the values.
+            Defaults to None, unbounded.
+            max_entries (int, optional): Maximum number of values. Defaults
+            to None, unbounded.
+            timeout (float, optional): Seconds to wait for a lock held by
+            another process. Defaults to 5.
+        """
+        if not re.match(r'^\w+$', namespace):
+            raise ValueError(f"'{namespace}' is not a valid namespace.")
+
+        self.path = path
+        self._create_private_file()
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.timeout = timeout
+        self._entries = f'cache_{namespace}'
+        self._meta = f'cache_{namespace}_meta'
+        self._local = threading.local()
+
+        with self._transaction() as connection:
+            connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {self._entries} ('
+                f' key TEXT PRIMARY KEY, value BLOB NOT NULL,'
+                f' size INTEGER NOT NULL, stored_at REAL NOT NULL,'
+                f' expires_at REAL)'
+            )
+            connection.execute(
+                f'CREATE INDEX IF NOT EXISTS ix_{self._entries}_stored_at'
+                f' ON {self._entries} (stored_at)'
+            )
+            connection.execute(
+                f'CREATE TABLE IF NOT EXISTS {self._meta} ('
+                f' id INTEGER PRIMARY KEY CHECK (id = 0),'
+                f' bytes INTEGER NOT NULL, entries INTEGER NOT NULL,'
+                f' evictions INTEGER NOT NULL)'
+            )
+            connection.execute(
+                f'INSERT OR IGNORE INTO {self._meta} VALUES (0, 0, 0, 0)'
+            )
+
+    def _create_private_file(self):
+        # Entries hold verified token payloads and response bodies, so the
+        # file is readable by its owner only. SQLite gives the -wal and
+        # -shm files the mode of the database file.
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+
+        try:
+            if os.fstat(fd).st_uid != os.geteuid():
+                raise ValueError(
+                    f"Cache file '{self.path}' is owned by another user."
+                )
+
+            os.fchmod(fd, 0o600)
+        finally:
+            os.close(fd)
+
+    def _connect(self) -> sqlite3.Connection:
+        # Connections must not cross threads, nor processes after a fork
+        connection = getattr(self._local, 'connection', None)
+
+        if connection is None or self._local.pid != os.getpid():
+            # Autocommit, transactions are opened explicitly
+            connection = sqlite3.connect(self.path, timeout=self.timeout,
+                                         isolation_level=None)
+            connection.execute('PRAGMA journal_mode = WAL')
+            connection.execute('PRAGMA synchronous = NORMAL')
+            self._local.connection = connection
+            self._local.pid = os.getpid()
+
+        return connection
+
+    @contextmanager
+    def _transaction(self):
+        # IMMEDIATE takes the write lock upfront, so a read followed by a
+        # write cannot interleave with another process doing the same
+        connection = self._connect()
+        connection.execute('BEGIN IMMEDIATE')
+
+        try:
+            yield connection
+        except BaseException:
+            connection.execute('ROLLBACK')
+            raise
+
+        connection.execute('COMMIT')
+
+    def get(self, key: str) -> Optional[bytes]:
+        row = self._connect().execute(
+            f'SELECT value, expires_at FROM {self._entries} WHERE key = ?',
+            (key,)
+        ).fetchone()
+
+        if row is None:
+            return None
+
+        value, expires_at = row
+
+        if expires_at is not None and time.time() >= expires_at:
+            self.delete(key)
+            return None
+
+        return value
+
+    def _remove(self, connection, keys_and_sizes, evicted: bool = False):
+        if not keys_and_sizes:
+            return
+
+        connection.executemany(
+            f'DELETE FROM {self._entries} WHERE key = ?',
+            [(key,) for key, _ in keys_and_sizes]
+        )
+        connection.execute(
+            f'UPDATE {self._meta} SET bytes = bytes - ?,'
+            f' entries = entries - ?, evictions = evictions + ?',
+            (sum(size for _, size in keys_and_sizes), len(keys_and_sizes),
+             len(keys_and_sizes) if evicted else 0)
+        )
+
+    def set(self, key: str, value: bytes, ttl: Optional[float] = None):
+        if self.max_bytes is not None and len(value) > self.max_bytes:
+            return
+
+        now = time.time()
+
+        with self._transaction() as connection:
+            self._remove(connection, connection.execute(
+                f'SELECT key, size FROM {self._entries} WHERE key = ?',
+                (key,)
+            ).fetchall())
+            connection.execute(
+                f'INSERT INTO {self._entries} VALUES (?, ?, ?, ?, ?)',
+                (key, value, len(value), now,
+                 now + ttl if ttl is not None else None)
+            )
+            connection.execute(
+                f'UPDATE {self._meta} SET bytes = bytes + ?,'
+                f' entries = entries + 1', (len(value),)
+            )
+
+            total, entries = connection.execute(
+                f'SELECT bytes, entries FROM {self._meta}'
+            ).fetchone()
+            evicted = []
+            oldest = connection.execute(
+                f'SELECT key, size FROM {self._entries} WHERE key != ?'
+                f' ORDER BY stored_at, rowid', (key,)
+            )
+
+            while (self.max_bytes is not None and total > self.max_bytes) or \
+                  (self.max_entries is not None and
+                   entries > self.max_entries):
+                row = oldest.fetchone()
+                evicted.append(row)
+                total -= row[1]
+                entries -= 1
+
+            self._remove(connection, evicted, evicted=True)
+
+    def delete(self, key: str):
+        with self._transaction() as connection:
+            self._remove(connection, connection.execute(
+                f'SELECT key, size FROM {self._entries} WHERE key = ?',
+                (key,)
+            ).fetchall())
+
+    def clear(self):
+        with self._transaction() as connection:
+            connection.execute(f'DELETE FROM {self._entries}')
+            connection.execute(
+                f'UPDATE {self._meta} SET bytes = 0, entries = 0'
+            )
+
+    @property
+    def stats(self) -> dict:
+        total, entries, evictions = self._connect().execute(
+            f'SELECT bytes, entries, evictions FROM {self._meta}'
+        ).fetchone()
+
+        return {
+            'entries': entries,
+            'bytes': total,
+            'evictions': evictions
+        }
+
+
+def create_backend(url: str, namespace: str, **bounds) -> CacheBackend:
+    """Creates the backend a `CACHE_URL` setting points at.
+
+    Args:
+        url (str): `memory://` for a store local to each process, or
+        `sqlite:///path/to/file` for one shared through an SQLite file.
+        namespace (str): Name of the cache using the backend.
+        bounds: `max_bytes` and `max_entries` of the cache.
+
+    Raises:
+        ValueError: The URL scheme is not supported.
+
+    Returns:
+        CacheBackend: A backend for the cache.
+    """
+    if url == 'memory://':
+        return MemoryBackend(**bounds)
+
+    if url.startswith('sqlite:///'):
+        return SQLiteBackend(url[len('sqlite:///'):], namespace, **bounds)
+
+    raise ValueError(f"Unsupported cache URL '{url}'.")
+
+
+def get_cache_url(app) -> str:
+    """Returns the `CACHE_URL` of a Flask application.
+
+    When the setting is empty, caches are shared through `cache.sqlite`
+    in the instance folder of the application, which is created readable
+    by its owner only.
+
+    Args:
+        app (Flask): The configured application.
+
+    Returns:
+        str: The URL to pass to `create_backend`.
+    """
+    if app.config.get('CACHE_URL'):
+        return app.config['CACHE_URL']
+
+    os.makedirs(app.instance_path, mode=0o700, exist_ok=True)
+
+    return 'sqlite:///' + os.path.join(app.instance_path, 'cache.sqlite')
@@ -0,0 +1,117 @@
+import hashlib
+from functools import wraps
+
+from flask import current_app, make_response, request
+
+from backend.database.replica import read_from_primary
+from backend.database.versions import table_versions
+from backend.services.cache.backends import create_backend, get_cache_url
+from backend.services.cache.response_cache import (
+    CachedResponse,
+    ResponseCache
+)
+from backend.services.export import wants_ndjson
+
+
+def setup_cache(app):
+    """Attaches the response cache to a Flask application.
+
+    Responses are kept in the backend `CACHE_URL` points at, so workers
+    sharing it also share cached responses. Clients reading from the
+    primary after a write are kept there too. Table versions live in the
+    database, and writes made by other processes invalidate responses
+    within `CACHE_VERSION_POLL_INTERVAL` seconds.
+
+    Args:
+        app (Flask): The application to configure.
+    """
+    url = get_cache_url(app)
+    max_bytes = app.config['RESPONSE_CACHE_MAX_BYTES']
+
+    table_versions.configure(app.config['CACHE_VERSION_POLL_INTERVAL'])
+
+    if 'replica' in app.extensions:
+        app.extensions['replica'].configure(create_backend(url, 'replica'))
+
+    app.extensions['response_cache'] = ResponseCache(
+        max_bytes=max_bytes,
+        backend=create_backend(url, 'responses', max_bytes=max_bytes)
+    )
+
+
+def _etag(key: str, tables: tuple) -> str:
+    version = table_versions.token(tables)
+
+    return hashlib.sha256(f'{key}|{version}'.encode()).hexdigest()[:32]
+
+
+def cached_response(*tables: str):
+    """Caches the responses of a GET route until one of its tables changes.
+
+    Responses carry a strong ETag derived from the request and the
+    versions of `tables`. A matching `If-None-Match` is answered with
+    304 Not Modified, and an unchanged representation is served from the
+    response cache, both without running the route. Streamed NDJSON
+    responses are passed through.
+
+    While one of `tables` changed within `SQL_REPLICA_STICKY_SECONDS`,
+    the route reads from the primary rather than the read replica.
+
+    Must be applied below `requires_auth` so permissions are checked on
+    every request.
+
+    Args:
+        tables (str): Tables the route reads from.
+    """
+    def cached_response_decorator(f):
+        @wraps(f)
+        def wrapper(*args, **kwargs):
+            if request.method != 'GET' or wants_ndjson():
+                return f(*args, **kwargs)
+
+            cache = current_app.extensions['response_cache']
+            key = request.full_path
+            etag = _etag(key, tables)
+
+            if request.if_none_match.contains(etag):
+                cache.not_modified(key)
+                response = current_app.response_class(status=304)
+                response.set_etag(etag)
+                return response
+
+            cached = cache.get(key, etag)
+
+            if cached is not None:
+                response = current_app.response_class(
+                    cached.body, status=cached.status,
+                    mimetype=cached.mimetype
+                )
+                response.headers['X-Cache'] = 'HIT'
+            else:
+                # The replica may lag behind a recent change, and what it
+                # returns would be cached under the new ETag
+                router = current_app.extensions.get('replica')
+
+                if router is not None and table_versions.changed_within(
+                    tables, router.sticky_seconds
+                ):
+                    read_from_primary()
+
+                response = make_response(f(*args, **kwargs))
+
+                if response.status_code == 200 and \
+                   not response.is_streamed:
+                    cache.put(key, CachedResponse(
+                        etag, response.get_data(), response.status_code,
+                        response.mimetype
+                    ))
+
+                response.headers['X-Cache'] = 'MISS'
+
+            response.set_etag(etag)
+            response.headers['Cache-Control'] = 'private, no-cache'
+            return response
+
+        return wrapper
+
+    return cached_response_decorator
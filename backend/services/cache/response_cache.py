@@ -0,0 +1,118 @@
+import threading
+from typing import NamedTuple, Optional
+
+from backend.services.cache.backends import CacheBackend, MemoryBackend
+
+
+class CachedResponse(NamedTuple):
+    etag: str
+    body: bytes
+    status: int
+    mimetype: str
+
+    def pack(self) -> bytes:
+        return f'{self.etag}\n{self.status}\n{self.mimetype}\n'.encode() + \
+            self.body
+
+    @classmethod
+    def unpack(cls, value: bytes) -> 'CachedResponse':
+        etag, status, mimetype, body = value.split(b'\n', 3)
+
+        return cls(etag.decode(), body, int(status), mimetype.decode())
+
+
+class ResponseCache:
+    """Bounded cache of serialized response bodies.
+
+    The cache is bounded by the total size of the bodies rather than by
+    the number of entries, since a page of auctions and a single item
+    differ in size by orders of magnitude. Entries live in a
+    `CacheBackend`, so workers sharing a backend share their entries,
+    while hit and miss counters are kept per process.
+    """
+
+    def __init__(self, max_bytes: int = 64 << 20,
+                 backend: Optional[CacheBackend] = None):
+        """Class constructor.
+
+        Args:
+            max_bytes (int, optional): Maximum total size of the cached
+            responses. A size of 0 disables the cache. Defaults to 64 MiB.
+            backend (CacheBackend, optional): Where entries are stored.
+            Defaults to an LRU local to the process bounded by max_bytes.
+        """
+        self.max_bytes = max_bytes
+        self.backend = backend or MemoryBackend(max_bytes=max_bytes)
+        self._lock = threading.Lock()
+
+        self._stats = {
+            'hits': 0,
+            'misses': 0,
+            'not_modified': 0,
+            'bytes_saved': 0
+        }
+
+    @property
+    def stats(self) -> dict:
+        """Counters plus the current size and hit ratio of the cache.
+
+        `bytes_saved` counts the body bytes that were not sent because a
+        client's copy was still current.
+        """
+        with self._lock:
+            stats = dict(self._stats)
+
+        lookups = stats['hits'] + stats['misses']
+
+        return {
+            **stats,
+            'hit_ratio': stats['hits'] / lookups if lookups else 0,
+            **self.backend.stats
+        }
+
+    def _count(self, name: str, amount: int = 1):
+        with self._lock:
+            self._stats[name] += amount
+
+    def get(self, key: str, etag: str) -> Optional[CachedResponse]:
+        """Returns the cached response for a key if it is still current.
+
+        Args:
+            key (str): Identifies the request.
+            etag (str): ETag of the current representation.
+
+        Returns:
+            CachedResponse: The cached response, or None on a miss.
+        """
+        value = self.backend.get(key) if self.max_bytes else None
+
+        if value is not None:
+            entry = CachedResponse.unpack(value)
+
+            if entry.etag == etag:
+                self._count('hits')
+                return entry
+
+        self._count('misses')
+        return None
+
+    def put(self, key: str, response: CachedResponse):
+        """Caches a response, evicting the least recently used ones.
+
+        Args:
+            key (str): Identifies the request.
+            response (CachedResponse): The response to cache.
+        """
+        if self.max_bytes:
+            self.backend.set(key, response.pack())
+
+    def not_modified(self, key: str):
+        """Counts a conditional request answered with 304 Not Modified."""
+        value = self.backend.get(key) if self.max_bytes else None
+        self._count('not_modified')
+
+        if value is not None:
+            self._count('bytes_saved', len(CachedResponse.unpack(value).body))
+
+    def clear(self):
+        self.backend.clear()
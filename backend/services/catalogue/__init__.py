@@ -0,0 +1,4 @@
+from backend.services.catalogue.catalogue import (
+    ItemCatalogue,
+    item_catalogue
+)
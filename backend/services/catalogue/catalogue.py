@@ -0,0 +1,153 @@
+import threading
+from typing import Dict, Iterable, Optional
+
+from sqlalchemy import event, inspect, select
+
+from backend.database import db
+from backend.database.models import Item
+from backend.database.versions import table_versions
+
+
+def _changed_in_transaction(session) -> bool:
+    """Whether the transaction of a session changed items, which only it
+    sees until it commits."""
+    return 'items' in session.info.get('changed_tables', ()) or any(
+        isinstance(obj, Item)
+        for obj in (*session.new, *session.dirty, *session.deleted)
+    )
+
+
+class ItemCatalogue:
+    """Ids and names of every item, kept in memory.
+
+    The catalogue is loaded from the primary on first use and stamped with
+    the version of `items`. Items changed through the ORM by this process
+    are applied as their transaction commits. Any other change, by another
+    process or through Core, reloads the whole catalogue on the next
+    lookup.
+
+    Lookups made while the current transaction has changes to items of
+    its own are answered by the database instead. Otherwise the catalogue
+    is authoritative, misses included: it is at the version of `items`
+    last read, so an item created by another process is only missed
+    until the versions are read again, at most
+    `CACHE_VERSION_POLL_INTERVAL` seconds later.
+    """
+
+    def __init__(self):
+        self._names: Dict[int, str] = {}
+        self._url: Optional[str] = None
+        self._epoch: Optional[str] = None
+        self._version: Optional[int] = None
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._current())
+
+    def load(self):
+        """Loads every item from the primary."""
+        engine = db.engine
+        # Read first, a change committed meanwhile reloads once more
+        epoch = table_versions.epoch
+        version = table_versions.get('items')
+
+        with engine.connect() as connection:
+            names = dict(connection.execute(select(Item.id, Item.name)).all())
+
+        with self._lock:
+            self._names = names
+            self._url = str(engine.url)
+            self._epoch = epoch
+            self._version = version
+
+    def _current(self) -> Dict[int, str]:
+        if self._url != str(db.engine.url) or \
+           self._epoch != table_versions.epoch or \
+           self._version != table_versions.get('items'):
+            self.load()
+
+        return self._names
+
+    def apply(self, changes: Dict[int, Optional[str]], version: int):
+        """Applies the changes of a committed transaction.
+
+        They are only applied when the catalogue is at the version the
+        transaction started from, otherwise it is left to reload.
+
+        Args:
+            changes (dict): New names by item id, None for deleted items.
+            version (int): Version of `items` after the transaction.
+        """
+        with self._lock:
+            if self._url != str(db.engine.url) or \
+               self._epoch != table_versions.epoch or \
+               self._version != version - 1:
+                return
+
+            for id, name in changes.items():
+                if name is None:
+                    self._names.pop(id, None)
+                else:
+                    self._names[id] = name
+
+            self._version = version
+
+    def get_names(self, ids: Iterable[int]) -> Dict[int, str]:
+        """Gets the names of several items at once.
+
+        Args:
+            ids (Iterable): Item ids.
+
+        Returns:
+            dict: Names by id, for the items that exist.
+        """
+        ids = set(ids)
+
+        if _changed_in_transaction(db.session):
+            return dict(db.session.query(Item.id, Item.name)
+                        .filter(Item.id.in_(ids))) if ids else {}
+
+        names = self._current()
+
+        return {id: names[id] for id in ids if id in names}
+
+    def get_name(self, id: int) -> Optional[str]:
+        """Gets the name of an item, None if it does not exist."""
+        return self.get_names((id,)).get(id)
+
+    def exists(self, id: int) -> bool:
+        return id in self.get_names((id,))
+
+
+item_catalogue = ItemCatalogue()
+
+
+@event.listens_for(db.session, 'after_flush')
+def _record_item_changes(session, flush_context):
+    changes = session.info.setdefault('item_changes', {})
+
+    for obj in (*session.new, *session.dirty, *session.deleted):
+        if not isinstance(obj, Item):
+            continue
+
+        for id in inspect(obj).attrs.id.history.deleted:
+            changes[id] = None
+
+        changes[obj.id] = None if obj in session.deleted else obj.name
+
+
+# Registered after the listener of backend.database.versions, which
+# leaves the committed versions in the session info
+@event.listens_for(db.session, 'after_commit')
+def _apply_item_changes(session):
+    changes = session.info.pop('item_changes', {})
+    version = session.info['committed_versions'].get('items')
+
+    if version is not None and \
+       'items' not in session.info['committed_outside_orm']:
+        item_catalogue.apply(changes, version)
+
+
+@event.listens_for(db.session, 'after_rollback')
+def _forget_item_changes(session):
+    session.info.pop('item_changes', None)
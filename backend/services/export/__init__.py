@@ -0,0 +1,5 @@
+from backend.services.export.export import (
+    NDJSON_MIMETYPE,
+    ndjson_response,
+    wants_ndjson
+)
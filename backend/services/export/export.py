@@ -0,0 +1,62 @@
+from itertools import islice
+from typing import Optional, Sequence
+
+from flask import Response, current_app, request, stream_with_context
+from flask_sqlalchemy import BaseQuery
+
+from backend.services.serialization import serialize_rows
+
+NDJSON_MIMETYPE = 'application/x-ndjson'
+
+
+def wants_ndjson() -> bool:
+    """Checks whether the client asked for a streamed NDJSON response.
+
+    Either `?format=ndjson` or an `Accept` header preferring
+    `application/x-ndjson` over JSON selects the streaming mode.
+
+    Returns:
+        bool: True if the response should be streamed as NDJSON.
+    """
+    if request.args.get('format') == 'ndjson':
+        return True
+
+    return request.accept_mimetypes.best_match(
+        ['application/json', NDJSON_MIMETYPE]
+    ) == NDJSON_MIMETYPE
+
+
+def ndjson_response(query: BaseQuery,
+                    fields: Optional[Sequence[str]] = None) -> Response:
+    """Streams the rows of a column query as newline delimited JSON.
+
+    Rows are read through a server-side cursor in batches of
+    `API_EXPORT_BATCH_SIZE` and written out one batch at a time, so memory
+    use does not depend on the size of the result.
+
+    Args:
+        query (BaseQuery): The query to export, selecting columns.
+        fields (Sequence, optional): Names of the columns to write out.
+        Defaults to None, every column.
+
+    Returns:
+        Response: A streamed response.
+    """
+    batch_size = current_app.config['API_EXPORT_BATCH_SIZE']
+    encode = current_app.extensions['json'].dumps
+
+    def generate():
+        rows = iter(query.yield_per(batch_size))
+
+        while True:
+            batch = list(islice(rows, batch_size))
+
+            if not batch:
+                break
+
+            yield b'\n'.join(
+                map(encode, serialize_rows(batch, fields))
+            ) + b'\n'
+
+    return Response(stream_with_context(generate()),
+                    mimetype=NDJSON_MIMETYPE)
@@ -0,0 +1,5 @@
+from backend.services.history.history import get_price_history, parse_bucket
+from backend.services.history.rollup import (
+    rebuild_price_stats,
+    refresh_price_stats
+)
@@ -0,0 +1,132 @@
+import re
+from datetime import datetime
+from typing import List, Optional
+
+from sqlalchemy import func, literal
+
+from backend.database import db
+from backend.database.models import ItemPriceStats
+
+BUCKET_UNITS = {
+    's': 1,
+    'm': 60,
+    'h': 3600,
+    'd': 86400,
+    'w': 604800
+}
+
+_BUCKET = re.compile(r'^(\d+)([smhdw]?)$')
+
+
+def parse_bucket(value: Optional[str]) -> Optional[int]:
+    """Parses a bucket width such as `30m`, `6h`, `1d` or plain seconds.
+
+    Args:
+        value (str, optional): The `bucket` query parameter.
+
+    Raises:
+        ValueError: The bucket is malformed or zero.
+
+    Returns:
+        int: Bucket width in seconds, or None when not given.
+    """
+    if value is None:
+        return None
+
+    match = _BUCKET.match(value.strip().lower())
+
+    if not match or not int(match.group(1)):
+        raise ValueError(f"'{value}' is not a valid bucket.")
+
+    return int(match.group(1)) * BUCKET_UNITS[match.group(2) or 's']
+
+
+def _weighted(column):
+    """Averages per-snapshot values weighted by their number of auctions."""
+    weight = ItemPriceStats.auctions
+
+    return func.sum(column * weight) / func.nullif(
+        func.sum(weight).filter(column.isnot(None)), 0
+    )
+
+
+def get_price_history(item_id: int, start: Optional[datetime] = None,
+                      end: Optional[datetime] = None,
+                      bucket: Optional[int] = None) -> List[dict]:
+    """Reads the price statistics of an item per snapshot or per bucket.
+
+    Statistics come from the `item_price_stats` rollup, so the cost
+    depends on the number of snapshots rather than auctions. Within a
+    bucket, the mean is that of every auction, while percentiles cannot
+    be combined exactly and are returned as `p25_avg` and `median_avg`,
+    averages of the snapshot values weighted by auction count. Raw
+    auctions are pruned before their statistics, so they cannot be
+    computed again. Quantities and auction counts are averaged over the
+    snapshots so buckets of different sizes stay comparable.
+
+    Args:
+        item_id (int): Item id.
+        start (datetime, optional): Inclusive lower timestamp bound.
+        end (datetime, optional): Exclusive upper timestamp bound.
+        bucket (int, optional): Bucket width in seconds. Each snapshot is
+        its own bucket when omitted.
+
+    Returns:
+        list: One dict per bucket, ordered by timestamp.
+    """
+    stats = ItemPriceStats
+
+    if bucket:
+        epoch = func.floor(
+            func.extract('epoch', stats.timestamp) / bucket
+        ) * bucket
+        period = func.timezone('UTC', func.to_timestamp(epoch))
+        snapshots = func.count()
+        columns = (
+            func.min(stats.min_price),
+            _weighted(stats.p25_price),
+            _weighted(stats.median_price),
+            _weighted(stats.mean_price),
+            func.sum(stats.quantity) / snapshots,
+            func.sum(stats.auctions) / snapshots,
+            snapshots
+        )
+    else:
+        period = stats.timestamp
+        columns = (stats.min_price, stats.p25_price, stats.median_price,
+                   stats.mean_price, stats.quantity, stats.auctions,
+                   literal(1))
+
+    period = period.label('timestamp')
+    query = db.session.query(period, *columns) \
+        .filter(stats.item_id == item_id)
+
+    if start:
+        query = query.filter(stats.timestamp >= start)
+
+    if end:
+        query = query.filter(stats.timestamp < end)
+
+    if bucket:
+        query = query.group_by(period)
+
+    rows = query.order_by(period)
+
+    # Averaged percentiles are named as such, they are not those of the
+    # auctions in the bucket
+    suffix = '_avg' if bucket else ''
+
+    return [
+        {
+            'timestamp': timestamp,
+            'min': min_price,
+            'p25' + suffix: p25,
+            'median' + suffix: median,
+            'mean': mean,
+            'quantity': int(quantity),
+            'auctions': int(auctions),
+            'snapshots': snapshot_count
+        }
+        for (timestamp, min_price, p25, median, mean, quantity, auctions,
+             snapshot_count) in rows
+    ]
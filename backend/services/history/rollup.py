@@ -0,0 +1,163 @@
+from collections import defaultdict
+from datetime import datetime
+from itertools import chain
+from typing import Iterable, Optional, Set, Tuple
+
+from sqlalchemy import Float, Integer, any_, bindparam, cast, event, func
+from sqlalchemy import inspect, select
+from sqlalchemy.dialects.postgresql import ARRAY
+
+from backend.database import db
+from backend.database.models import Auction, ItemPriceStats
+from backend.database.storage import auction_model, snapshot_timestamps
+from backend.database.versions import mark_changed
+
+STATS_COLUMNS = ('item_id', 'timestamp', 'min_price', 'p25_price',
+                 'median_price', 'mean_price', 'quantity', 'auctions')
+
+
+def unit_price(model=Auction):
+    """Price per item of an auction.
+
+    Commodities carry a `unit_price`, other auctions only a `buyout` for
+    the whole stack, so the latter is divided by the quantity.
+
+    Args:
+        model (Model, optional): Model the auctions are read through.
+        Defaults to `Auction`.
+    """
+    return func.coalesce(
+        cast(func.nullif(model.unit_price, 0), Float),
+        cast(func.nullif(model.buyout, 0), Float) /
+        func.nullif(model.quantity, 0)
+    )
+
+
+def _aggregate(model, *criteria):
+    """Selects one `item_price_stats` row per item and snapshot."""
+    price = unit_price(model)
+
+    return select(
+        model.item_id,
+        model.timestamp,
+        func.min(price),
+        func.percentile_cont(0.25).within_group(price),
+        func.percentile_cont(0.5).within_group(price),
+        func.avg(price),
+        func.sum(model.quantity),
+        func.count()
+    ).where(*criteria).group_by(model.item_id, model.timestamp)
+
+
+def refresh_price_stats(keys: Iterable[Tuple[int, datetime]],
+                        connection=None, model=None):
+    """Recomputes the statistics of the given items and snapshots.
+
+    Args:
+        keys (Iterable): `(item_id, timestamp)` pairs whose auctions were
+        inserted, changed or deleted.
+        connection (Connection, optional): Connection to write through.
+        Defaults to the one of the current session.
+        model (Model, optional): Model the auctions are read through.
+        Defaults to the one of the storage mode.
+    """
+    item_ids_by_timestamp = defaultdict(set)
+
+    for item_id, timestamp in keys:
+        if item_id is not None and timestamp is not None:
+            item_ids_by_timestamp[timestamp].add(item_id)
+
+    if not item_ids_by_timestamp:
+        return
+
+    connection = connection or db.session.connection()
+    model = model or auction_model()
+    stats = ItemPriceStats.__table__
+
+    # Snapshots share one timestamp, so this is usually a single pair of
+    # statements no matter how many items a batch touched
+    for timestamp, item_ids in item_ids_by_timestamp.items():
+        item_ids = bindparam(None, sorted(item_ids), type_=ARRAY(Integer))
+
+        connection.execute(stats.delete().where(
+            stats.c.timestamp == timestamp,
+            stats.c.item_id == any_(item_ids)
+        ))
+        connection.execute(stats.insert().from_select(
+            STATS_COLUMNS,
+            _aggregate(model, model.timestamp == timestamp,
+                       model.item_id == any_(item_ids))
+        ))
+
+
+def rebuild_price_stats(start: Optional[datetime] = None,
+                        end: Optional[datetime] = None) -> int:
+    """Recomputes the statistics of every snapshot in a time range.
+
+    Statistics older than the oldest stored auction are kept, as their
+    auctions may have been dropped by `prune_partitions` or
+    `prune_deltas`.
+
+    Args:
+        start (datetime, optional): Inclusive lower timestamp bound.
+        end (datetime, optional): Exclusive upper timestamp bound.
+
+    Returns:
+        int: Number of rows written.
+    """
+    stats = ItemPriceStats.__table__
+    model = auction_model()
+    oldest = db.session.query(func.min(snapshot_timestamps())).scalar()
+
+    if oldest is None:
+        return 0
+
+    start = max(start, oldest) if start else oldest
+    deleted = [stats.c.timestamp >= start]
+    criteria = [model.timestamp >= start]
+
+    if end:
+        deleted.append(stats.c.timestamp < end)
+        criteria.append(model.timestamp < end)
+
+    try:
+        db.session.execute(stats.delete().where(*deleted))
+        rows = db.session.execute(stats.insert().from_select(
+            STATS_COLUMNS, _aggregate(model, *criteria)
+        )).rowcount
+        mark_changed('item_price_stats')
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return rows
+
+
+def _auction_keys(state) -> Set[Tuple[int, datetime]]:
+    """Gets the keys an auction is stored under before and after a flush."""
+    item_id = state.attrs.item_id.history
+    timestamp = state.attrs.timestamp.history
+
+    keys = {(state.obj().item_id, state.obj().timestamp)}
+
+    if item_id.deleted or timestamp.deleted:
+        keys.add((
+            (item_id.deleted or item_id.unchanged or [None])[0],
+            (timestamp.deleted or timestamp.unchanged or [None])[0]
+        ))
+
+    return keys
+
+
+@event.listens_for(db.session, 'after_flush')
+def _refresh_flushed_auctions(session, flush_context):
+    # Auctions written through the models, e.g. by the blueprints. Bulk
+    # loads write through Core and refresh the keys they touched themselves
+    keys = set()
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Auction):
+            keys |= _auction_keys(inspect(obj))
+
+    refresh_price_stats(keys, session.connection(), model=Auction)
@@ -0,0 +1,12 @@
+from backend.services.ingest.bulk import BulkResult, iter_ndjson, load_auctions
+from backend.services.ingest.cli import ingest_cli
+from backend.services.ingest.delta import (
+    finish_delta_snapshot,
+    load_delta_batch,
+    start_delta_snapshot
+)
+from backend.services.ingest.snapshot import (
+    ensure_items,
+    ingest_snapshot,
+    iter_snapshot_auctions
+)
@@ -0,0 +1,421 @@
+import csv
+import io
+import json
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from itertools import islice
+from typing import IO, Iterable, Iterator, List, Optional, Set, Tuple
+
+from sqlalchemy import text, tuple_
+
+from backend.database import db
+from backend.database.models import Auction
+from backend.database.models.auction import TIME_LEFT_VALUES
+from backend.database.partitions import ensure_partitions
+from backend.database.storage import READ_ONLY_MESSAGE, storage_mode
+from backend.database.versions import mark_changed
+from backend.services.catalogue import item_catalogue
+from backend.services.history.rollup import refresh_price_stats
+from backend.services.snapshots import invalidate_snapshot_diffs
+
+COLUMNS = ('id', 'timestamp', 'bid', 'buyout', 'unit_price', 'quantity',
+           'time_left', 'item_id')
+
+KEY_COLUMNS = tuple(column.name for column in Auction.__table__.primary_key)
+
+_ITEM_ID = COLUMNS.index('item_id')
+_TIMESTAMP = COLUMNS.index('timestamp')
+
+# Keeps responses small when a whole file is rejected
+MAX_REPORTED_ERRORS = 100
+
+
+@dataclass
+class BulkResult:
+    """Outcome of a bulk auction load."""
+
+    inserted: int = 0
+    updated: int = 0
+    rejected: int = 0
+    errors: List[dict] = field(default_factory=list)
+    # (item_id, timestamp) pairs whose price statistics need a refresh
+    affected: Set[tuple] = field(default_factory=set, repr=False)
+
+    def merge(self, other: 'BulkResult'):
+        self.inserted += other.inserted
+        self.updated += other.updated
+        self.rejected += other.rejected
+        self.affected |= other.affected
+        self.errors.extend(
+            other.errors[:MAX_REPORTED_ERRORS - len(self.errors)]
+        )
+
+    def reject(self, index: int, auction_id, reason: str):
+        self.rejected += 1
+
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({
+                'index': index,
+                'id': auction_id,
+                'reason': reason
+            })
+
+    def serialize(self):
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'rejected': self.rejected,
+            'errors': self.errors
+        }
+
+
+def iter_ndjson(stream: IO) -> Iterator[Optional[dict]]:
+    """Parses a newline delimited JSON body one line at a time.
+
+    Args:
+        stream (IO): A binary or text stream.
+
+    Yields:
+        dict: One parsed object per non-empty line, or None for lines that
+        are not valid JSON so they can be reported as rejected.
+    """
+    for line in stream:
+        if not line.strip():
+            continue
+
+        try:
+            yield json.loads(line)
+        except ValueError:
+            yield None
+
+
+def _parse_timestamp(value) -> datetime:
+    if isinstance(value, datetime):
+        timestamp = value
+    elif isinstance(value, str):
+        timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    else:
+        raise ValueError(value)
+
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return timestamp
+
+
+def _is_int(value) -> bool:
+    # `type` rather than `isinstance` so booleans are rejected
+    return type(value) is int
+
+
+def _validate(row, known_item_ids: set,
+              timestamps: dict) -> Tuple[Optional[tuple], str]:
+    """Turns a request row into a tuple ordered like `COLUMNS`.
+
+    Args:
+        row: One auction as received from the client.
+        known_item_ids (set): Item ids known to exist.
+        timestamps (dict): Already parsed timestamps. Snapshots share one
+        timestamp, so parsing it once per batch is enough.
+
+    Returns:
+        tuple: The row and an empty reason, or None and why it was rejected.
+    """
+    if type(row) is not dict:
+        return None, 'Not a JSON object.'
+
+    get = row.get
+
+    for name in ('id', 'quantity', 'item_id'):
+        if type(get(name)) is not int:
+            return None, f"'{name}' must be an integer."
+
+    for name in ('bid', 'buyout', 'unit_price'):
+        value = get(name)
+
+        if value is not None and type(value) is not int:
+            return None, f"'{name}' must be an integer or null."
+
+    time_left = get('time_left')
+
+    if type(time_left) is not str or \
+       time_left.upper() not in TIME_LEFT_VALUES:
+        return None, (f"'time_left' must be one of: "
+                      f"{', '.join(TIME_LEFT_VALUES)}.")
+
+    raw_timestamp = get('timestamp')
+    timestamp = timestamps.get(raw_timestamp) \
+        if type(raw_timestamp) is str else None
+
+    if timestamp is None:
+        try:
+            timestamp = _parse_timestamp(raw_timestamp)
+        except ValueError:
+            return None, "'timestamp' must be an ISO-8601 datetime."
+
+        if type(raw_timestamp) is str:
+            timestamps[raw_timestamp] = timestamp
+
+    if row['item_id'] not in known_item_ids:
+        return None, f"Item with id '{row['item_id']}' does not exist."
+
+    return (row['id'], timestamp, get('bid'), get('buyout'),
+            get('unit_price'), row['quantity'], time_left.upper(),
+            row['item_id']), ''
+
+
+def _known_item_ids(rows: list) -> set:
+    """Looks up which of the items referenced by a batch exist."""
+    return set(item_catalogue.get_names(
+        row.get('item_id') for row in rows
+        if type(row) is dict and _is_int(row.get('item_id'))
+    ))
+
+
+def stage_rows(rows: List[tuple]):
+    """Writes rows through COPY into the `auctions_staging` temp table.
+
+    The table is emptied first and dropped on commit.
+
+    Args:
+        rows (list): Validated rows, ordered like `COLUMNS`.
+
+    Returns:
+        Connection: The connection the table was created on.
+    """
+    connection = db.session.connection()
+    connection.execute(text(
+        'CREATE TEMP TABLE IF NOT EXISTS auctions_staging '
+        '(LIKE auctions INCLUDING DEFAULTS) ON COMMIT DROP'
+    ))
+    connection.execute(text('TRUNCATE auctions_staging'))
+
+    # None becomes an empty unquoted field, which COPY reads as NULL, and
+    # datetimes are written by str() in a format Postgres parses
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    buffer.seek(0)
+    columns = ', '.join(COLUMNS)
+
+    with connection.connection.cursor() as cursor:
+        cursor.copy_expert(
+            f'COPY auctions_staging ({columns}) FROM STDIN WITH (FORMAT csv)',
+            buffer
+        )
+
+    return connection
+
+
+def _copy_upsert(rows: List[tuple]) -> Tuple[int, int, set]:
+    """Writes rows through COPY into a staging table and upserts from there.
+
+    Returns:
+        tuple: Number of inserted and updated rows, and the
+        `(item_id, timestamp)` pairs updated rows were moved away from.
+    """
+    connection = stage_rows(rows)
+    columns = ', '.join(COLUMNS)
+    key = ', '.join(KEY_COLUMNS)
+    updates = ', '.join(
+        f'{column} = EXCLUDED.{column}' for column in COLUMNS
+        if column not in KEY_COLUMNS
+    )
+    returned = ', '.join(dict.fromkeys(KEY_COLUMNS + ('item_id', 'timestamp')))
+    joined = ' AND '.join(f'a.{column} = u.{column}' for column in KEY_COLUMNS)
+
+    # Every part of the statement reads the snapshot taken before the
+    # upsert, so joining the upserted rows back to auctions finds the rows
+    # they replaced, if any, with their previous item and timestamp.
+    # xmax cannot tell inserts from updates on a partitioned table. The
+    # LIMIT keeps the lookup a primary key probe per row, a plain join is
+    # planned as a hash join over all of auctions
+    inserted, updated, moved_item_ids, moved_timestamps = connection.execute(
+        text(
+            f'WITH upserted AS ('
+            f' INSERT INTO auctions ({columns})'
+            f' SELECT {columns} FROM auctions_staging'
+            f' ON CONFLICT ({key}) DO UPDATE SET {updates}'
+            f' RETURNING {returned}'
+            f'), replaced AS ('
+            f' SELECT a.item_id, a.timestamp,'
+            f' (a.item_id, a.timestamp) <> (u.item_id, u.timestamp) AS moved'
+            f' FROM upserted AS u LEFT JOIN LATERAL ('
+            f'  SELECT item_id, timestamp FROM auctions AS a WHERE {joined}'
+            f'  LIMIT 1'
+            f' ) AS a ON true'
+            f'), moved AS ('
+            f' SELECT DISTINCT item_id, timestamp FROM replaced WHERE moved'
+            f') SELECT count(*) FILTER (WHERE item_id IS NULL),'
+            f' count(*) FILTER (WHERE item_id IS NOT NULL),'
+            f' (SELECT array_agg(item_id ORDER BY item_id, timestamp)'
+            f' FROM moved),'
+            f' (SELECT array_agg(timestamp ORDER BY item_id, timestamp)'
+            f' FROM moved) FROM replaced'
+        )
+    ).one()
+    moved = set(zip(moved_item_ids or (), moved_timestamps or ()))
+
+    return inserted, updated, moved
+
+
+def _orm_upsert(rows: List[tuple]) -> Tuple[int, int, set]:
+    """Portable fallback for databases without COPY.
+
+    Returns:
+        tuple: Number of inserted and updated rows, and the
+        `(item_id, timestamp)` pairs updated rows were moved away from.
+    """
+    mappings = [dict(zip(COLUMNS, row)) for row in rows]
+    key_columns = [getattr(Auction, column) for column in KEY_COLUMNS]
+    keys = [tuple(mapping[column] for column in KEY_COLUMNS)
+            for mapping in mappings]
+    existing = {
+        tuple(row[:-2]): tuple(row[-2:]) for row in
+        db.session.query(*key_columns, Auction.item_id, Auction.timestamp)
+        .filter(tuple_(*key_columns).in_(keys))
+    }
+
+    new = [mapping for key, mapping in zip(keys, mappings)
+           if key not in existing]
+    old = [mapping for key, mapping in zip(keys, mappings)
+           if key in existing]
+
+    if new:
+        db.session.execute(Auction.__table__.insert(), new)
+
+    if old:
+        db.session.bulk_update_mappings(Auction, old)
+
+    moved = {
+        existing[key] for key, mapping in zip(keys, mappings)
+        if key in existing and
+        existing[key] != (mapping['item_id'], mapping['timestamp'])
+    }
+
+    return len(new), len(old), moved
+
+
+def validate_batch(rows: list, offset: int = 0,
+                   known_item_ids: Optional[set] = None
+                   ) -> Tuple[BulkResult, List[Tuple[int, tuple]]]:
+    """Validates one batch of auctions.
+
+    Args:
+        rows (list): Auction objects as received from the client.
+        offset (int, optional): Position of the first row in the whole
+        upload, used in error reports. Defaults to 0.
+        known_item_ids (set, optional): Item ids known to exist. Looked up
+        in the item catalogue when omitted. Defaults to None.
+
+    Returns:
+        tuple: The rejections of the batch, and the position and values of
+        its valid rows, ordered like `COLUMNS`. Only the last row of each
+        key is kept.
+    """
+    result = BulkResult()
+
+    if known_item_ids is None:
+        known_item_ids = _known_item_ids(rows)
+
+    valid = {}
+    timestamps: dict = {}
+    key_indexes = [COLUMNS.index(column) for column in KEY_COLUMNS]
+
+    for index, row in enumerate(rows, start=offset):
+        values, reason = _validate(row, known_item_ids, timestamps)
+
+        if values is None:
+            result.reject(index, row.get('id') if isinstance(row, dict)
+                          else None, reason)
+            continue
+
+        # ON CONFLICT cannot touch the same row twice in one statement
+        key = tuple([values[i] for i in key_indexes])
+
+        if key in valid:
+            result.reject(valid[key][0], values[0],
+                          'Superseded by a later row with the same key.')
+
+        valid[key] = (index, values)
+
+    return result, list(valid.values())
+
+
+def load_batch(rows: list, offset: int = 0,
+               known_item_ids: Optional[set] = None) -> BulkResult:
+    """Validates and writes one batch of auctions without committing.
+
+    The price statistics and snapshot diffs of the written rows are not
+    refreshed, callers pass `BulkResult.affected` to `refresh_price_stats`
+    and its timestamps to `invalidate_snapshot_diffs` before committing.
+
+    Args:
+        rows (list): Auction objects as received from the client.
+        offset (int, optional): Position of the first row in the whole
+        upload, used in error reports. Defaults to 0.
+        known_item_ids (set, optional): Item ids known to exist. Looked up
+        in the item catalogue when omitted. Defaults to None.
+
+    Returns:
+        BulkResult: Counts for this batch.
+    """
+    result, valid = validate_batch(rows, offset, known_item_ids)
+    rows = [values for _, values in valid]
+
+    if rows:
+        ensure_partitions({values[_TIMESTAMP] for values in rows})
+
+        if db.engine.dialect.name == 'postgresql':
+            result.inserted, result.updated, moved = _copy_upsert(rows)
+        else:
+            result.inserted, result.updated, moved = _orm_upsert(rows)
+
+        result.affected = moved | {
+            (values[_ITEM_ID], values[_TIMESTAMP]) for values in rows
+        }
+        mark_changed('auctions')
+
+    return result
+
+
+def load_auctions(rows: Iterable, batch_size: int = 10000) -> BulkResult:
+    """Bulk loads auctions in batches inside a single transaction.
+
+    Args:
+        rows (Iterable): Auction objects as received from the client.
+        batch_size (int, optional): Rows validated and written at a time.
+        Defaults to 10000.
+
+    Raises:
+        ValueError: Auctions are stored as deltas, which only whole
+        snapshots can be appended to.
+
+    Returns:
+        BulkResult: Counts of inserted, updated and rejected rows.
+    """
+    if storage_mode() == 'delta':
+        raise ValueError(READ_ONLY_MESSAGE)
+
+    result = BulkResult()
+    rows = iter(rows)
+    offset = 0
+
+    try:
+        while True:
+            batch = list(islice(rows, batch_size))
+
+            if not batch:
+                break
+
+            result.merge(load_batch(batch, offset))
+            offset += len(batch)
+
+        refresh_price_stats(result.affected)
+        invalidate_snapshot_diffs(
+            timestamp for _, timestamp in result.affected)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return result
@@ -0,0 +1,74 @@
+from datetime import datetime, timedelta
+
+import click
+from flask import current_app
+from flask.cli import AppGroup
+
+from backend.database.partitions import prune_partitions
+from backend.database.storage import prune_deltas, storage_mode
+from backend.services.history import rebuild_price_stats
+from backend.services.ingest.snapshot import ingest_snapshot
+
+ingest_cli = AppGroup('ingest', help='Loads and maintains auction data.')
+
+
+@ingest_cli.command('snapshot')
+@click.argument('path', type=click.Path(exists=True, dir_okay=False))
+@click.option('--timestamp', type=click.DateTime(),
+              help='Snapshot timestamp in UTC. Defaults to now.')
+@click.option('--batch-size', type=int, default=10000, show_default=True,
+              help='Auctions written per batch.')
+def ingest_snapshot_command(path, timestamp, batch_size):
+    """Ingests a Blizzard connected-realm auctions dump from PATH."""
+    timestamp = timestamp or datetime.utcnow()
+
+    with open(path, encoding='utf-8') as fp:
+        try:
+            result, items_created = ingest_snapshot(fp, timestamp,
+                                                    batch_size)
+        except ValueError as error:
+            raise click.ClickException(str(error))
+
+    click.echo(f'Snapshot {timestamp.isoformat()}: '
+               f'{result.inserted} inserted, {result.updated} updated, '
+               f'{result.rejected} rejected, {items_created} items created.')
+
+    for error in result.errors:
+        click.echo(f"  #{error['index']} (id {error['id']}): "
+                   f"{error['reason']}", err=True)
+
+
+@ingest_cli.command('rebuild-stats')
+@click.option('--from', 'start', type=click.DateTime(),
+              help='Only rebuild snapshots at or after this timestamp.')
+@click.option('--to', 'end', type=click.DateTime(),
+              help='Only rebuild snapshots before this timestamp.')
+def rebuild_stats_command(start, end):
+    """Recomputes the item price statistics from the stored auctions."""
+    rows = rebuild_price_stats(start, end)
+
+    click.echo(f'Rebuilt {rows} item price statistics.')
+
+
+@ingest_cli.command('prune')
+@click.option('--max-age', type=int,
+              help='Retention period in days. Defaults to '
+              'AUCTIONS_RETENTION_DAYS.')
+def prune_command(max_age):
+    """Drops the weekly auction partitions older than the retention period.
+
+    With AUCTIONS_STORAGE=delta, the older snapshots and the listings last
+    seen in them are dropped instead. Price statistics of the dropped
+    auctions are kept.
+    """
+    max_age = max_age or current_app.config['AUCTIONS_RETENTION_DAYS']
+
+    if storage_mode() == 'delta':
+        dropped = prune_deltas(timedelta(days=max_age))
+        click.echo(f'Dropped {dropped} snapshots.')
+        return
+
+    dropped = prune_partitions(timedelta(days=max_age))
+
+    click.echo(f"Dropped {len(dropped)} partitions: "
+               f"{', '.join(dropped) or 'none'}.")
@@ -0,0 +1,177 @@
+from datetime import datetime
+from typing import Optional
+
+from sqlalchemy import text
+
+from backend.database import db
+from backend.database.models import AuctionSnapshot
+from backend.database.storage import latest_snapshot
+from backend.database.versions import mark_changed
+from backend.services.ingest.bulk import (
+    COLUMNS,
+    BulkResult,
+    stage_rows,
+    validate_batch
+)
+
+_ITEM_ID = COLUMNS.index('item_id')
+_TIMESTAMP = COLUMNS.index('timestamp')
+
+_CHANGED = ('(c.bid, c.buyout, c.unit_price, c.quantity, c.time_left) '
+            'IS DISTINCT FROM '
+            '(s.bid, s.buyout, s.unit_price, s.quantity, s.time_left)')
+
+# Auctions seen twice in one snapshot, the last values win
+_OVERWRITE = text(
+    'UPDATE auction_changes AS c SET bid = s.bid, buyout = s.buyout, '
+    'unit_price = s.unit_price, quantity = s.quantity, '
+    'time_left = s.time_left '
+    'FROM auctions_staging AS s '
+    'WHERE c.id = s.id AND c.until IS NULL AND c.timestamp = :timestamp'
+)
+
+# Closes the values that changed since the previous snapshot
+_CLOSE = text(
+    'UPDATE auction_changes AS c SET until = :timestamp '
+    'FROM auctions_staging AS s '
+    'WHERE c.id = s.id AND c.until IS NULL AND c.timestamp < :timestamp '
+    f'AND {_CHANGED}'
+)
+
+_REOPEN = text(
+    'UPDATE auction_listings AS l SET last_seen = NULL, item_id = s.item_id '
+    'FROM auctions_staging AS s WHERE l.id = s.id AND l.last_seen IS NOT NULL'
+)
+
+_NEW = text(
+    'INSERT INTO auction_listings (id, item_id, first_seen) '
+    'SELECT id, item_id, :timestamp FROM auctions_staging '
+    'ON CONFLICT (id) DO NOTHING'
+)
+
+# New listings and the ones closed above
+_OPEN = text(
+    'INSERT INTO auction_changes '
+    '(id, timestamp, bid, buyout, unit_price, quantity, time_left) '
+    'SELECT s.id, :timestamp, s.bid, s.buyout, s.unit_price, s.quantity, '
+    's.time_left FROM auctions_staging AS s WHERE NOT EXISTS ('
+    ' SELECT FROM auction_changes AS c WHERE c.id = s.id AND c.until IS NULL'
+    ')'
+)
+
+_SEEN = text(
+    'INSERT INTO auctions_seen SELECT id FROM auctions_staging '
+    'ON CONFLICT DO NOTHING'
+)
+
+# Listings of the previous snapshot missing from this one. Their values
+# are closed at this snapshot, so the range index on the changes only
+# finds the auctions a snapshot lists, and a listing seen again opens new
+# values
+_GONE = text(
+    'WITH gone AS ('
+    ' UPDATE auction_listings AS l SET last_seen = :previous'
+    ' WHERE l.last_seen IS NULL AND NOT EXISTS ('
+    '  SELECT FROM auctions_seen AS s WHERE s.id = l.id'
+    ' ) RETURNING l.id'
+    ') '
+    'UPDATE auction_changes AS c SET until = ('
+    ' SELECT min(timestamp) FROM auction_snapshots'
+    ' WHERE timestamp > :previous'
+    ') FROM gone WHERE c.id = gone.id AND c.until IS NULL'
+)
+
+
+def start_delta_snapshot(timestamp: datetime) -> Optional[datetime]:
+    """Adds a snapshot to the delta store, without committing.
+
+    Snapshots can only be appended, so concurrent ingests wait for each
+    other until the first one commits.
+
+    Args:
+        timestamp (datetime): Timestamp of the new snapshot.
+
+    Raises:
+        ValueError: The timestamp is not after the newest snapshot.
+
+    Returns:
+        datetime: Timestamp of the snapshot before it, None for the first.
+    """
+    db.session.execute(text(
+        'LOCK TABLE auction_snapshots IN SHARE ROW EXCLUSIVE MODE'
+    ))
+    previous = latest_snapshot()
+
+    if previous is not None and timestamp <= previous:
+        raise ValueError(f'Snapshots are stored as deltas and can only be '
+                         f'appended, {timestamp.isoformat()} is not after '
+                         f'{previous.isoformat()}.')
+
+    db.session.execute(AuctionSnapshot.__table__.insert(),
+                       {'timestamp': timestamp})
+    db.session.execute(text(
+        'CREATE TEMP TABLE auctions_seen (id integer PRIMARY KEY) '
+        'ON COMMIT DROP'
+    ))
+
+    return previous
+
+
+def finish_delta_snapshot(previous: Optional[datetime]):
+    """Marks the listings missing from a new snapshot as gone.
+
+    They were last seen in the previous snapshot. To be called once every
+    batch of the snapshot has been loaded, without committing.
+
+    Args:
+        previous (datetime): The timestamp `start_delta_snapshot` returned.
+    """
+    if previous is not None:
+        db.session.execute(_GONE, {'previous': previous})
+
+
+def load_delta_batch(rows: list, timestamp: datetime, offset: int = 0,
+                     known_item_ids: Optional[set] = None) -> BulkResult:
+    """Validates and writes one batch of a snapshot to the delta store.
+
+    Only the listings that are new, changed since the previous snapshot
+    or are listed again are written. Like `load_batch`, nothing is
+    committed or refreshed.
+
+    Args:
+        rows (list): Auction objects as received from the client.
+        timestamp (datetime): Timestamp of the snapshot, as passed to
+        `start_delta_snapshot`.
+        offset (int, optional): Position of the first row in the whole
+        upload, used in error reports. Defaults to 0.
+        known_item_ids (set, optional): Item ids known to exist. Looked up
+        in the item catalogue when omitted. Defaults to None.
+
+    Returns:
+        BulkResult: Counts for this batch, auctions seen earlier in the
+        same snapshot count as updated.
+    """
+    result, valid = validate_batch(rows, offset, known_item_ids)
+    rows = []
+
+    for index, values in valid:
+        if values[_TIMESTAMP] == timestamp:
+            rows.append(values)
+        else:
+            result.reject(index, values[0],
+                          f"Not part of snapshot {timestamp.isoformat()}.")
+
+    if rows:
+        connection = stage_rows(rows)
+        parameters = {'timestamp': timestamp}
+
+        result.updated = connection.execute(_OVERWRITE, parameters).rowcount
+        result.inserted = len(rows) - result.updated
+
+        for statement in (_CLOSE, _REOPEN, _NEW, _OPEN, _SEEN):
+            connection.execute(statement, parameters)
+
+        result.affected = {(values[_ITEM_ID], timestamp) for values in rows}
+        mark_changed('auctions')
+
+    return result
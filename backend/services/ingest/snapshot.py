@@ -0,0 +1,289 @@
+import json
+import re
+from datetime import datetime
+from itertools import islice
+from typing import IO, Iterable, Iterator, Tuple
+
+from sqlalchemy import text
+
+from backend.database import db
+from backend.database.models import Item
+from backend.database.storage import storage_mode
+from backend.database.versions import mark_changed
+from backend.services.history.rollup import refresh_price_stats
+from backend.services.ingest.bulk import BulkResult, load_batch
+from backend.services.ingest.delta import (
+    finish_delta_snapshot,
+    load_delta_batch,
+    start_delta_snapshot
+)
+from backend.services.snapshots import (
+    invalidate_snapshot_diffs,
+    refresh_snapshot_diff
+)
+
+# Blizzard's auction dumps only reference items by id
+UNKNOWN_ITEM_NAME = 'Unknown item {}'
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+
+class _StreamReader:
+    """Minimal pull parser over a text stream.
+
+    Only the parts of the document being decoded are kept in memory, which
+    lets us walk a multi-hundred megabyte snapshot one auction at a time.
+    """
+
+    def __init__(self, fp: IO[str], chunk_size: int):
+        self.fp = fp
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+        self.decoder = json.JSONDecoder()
+
+    def _fill(self) -> bool:
+        if self.eof:
+            return False
+
+        chunk = self.fp.read(self.chunk_size)
+
+        if not chunk:
+            self.eof = True
+            return False
+
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        while True:
+            self.pos = _WHITESPACE.match(self.buffer, self.pos).end()
+
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+
+            if not self._fill():
+                return ''
+
+    def next(self, expected: str) -> str:
+        char = self.peek()
+
+        if not char or char not in expected:
+            raise ValueError(f"Expected one of '{expected}' at offset "
+                             f"{self.pos}, found '{char}'.")
+
+        self.pos += 1
+        return char
+
+    def decode(self):
+        self.peek()
+
+        while True:
+            try:
+                value, end = self.decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+
+            # A number at the end of the buffer may continue in the next chunk
+            if end == len(self.buffer) and self._fill():
+                continue
+
+            self.pos = end
+            return value
+
+
+def iter_snapshot_auctions(fp: IO[str],
+                           chunk_size: int = 1 << 20) -> Iterator[dict]:
+    """Yields the entries of the `auctions` array of a Blizzard dump.
+
+    Other top-level keys are decoded and discarded, the auctions themselves
+    are decoded one at a time.
+
+    Args:
+        fp (IO): A text stream over a connected-realm auctions document.
+        chunk_size (int, optional): Characters read at a time. Defaults to
+        1 MiB.
+
+    Raises:
+        ValueError: The document is not a JSON object.
+
+    Yields:
+        dict: One auction as found in the dump.
+    """
+    reader = _StreamReader(fp, chunk_size)
+    reader.next('{')
+
+    if reader.peek() == '}':
+        return
+
+    while True:
+        key = reader.decode()
+        reader.next(':')
+
+        if key != 'auctions':
+            reader.decode()
+        else:
+            reader.next('[')
+
+            if reader.peek() == ']':
+                reader.next(']')
+            else:
+                while True:
+                    yield reader.decode()
+
+                    if reader.next(',]') == ']':
+                        break
+
+        if reader.next(',}') == '}':
+            return
+
+
+def map_auction(record, timestamp: datetime):
+    """Maps a Blizzard auction onto the columns of `Auction`.
+
+    Args:
+        record (dict): One entry of the dump's `auctions` array.
+        timestamp (datetime): Timestamp of the snapshot.
+
+    Returns:
+        dict: An auction in the shape `load_batch` expects, or the record
+        itself if it is not an object so it gets rejected.
+    """
+    if type(record) is not dict:
+        return record
+
+    item = record.get('item')
+
+    return {
+        'id': record.get('id'),
+        'timestamp': timestamp,
+        'bid': record.get('bid'),
+        'buyout': record.get('buyout'),
+        'unit_price': record.get('unit_price'),
+        'quantity': record.get('quantity'),
+        'time_left': record.get('time_left'),
+        'item_id': item.get('id') if type(item) is dict else None
+    }
+
+
+def ensure_items(item_ids: Iterable[int]) -> int:
+    """Creates placeholder rows for items that do not exist yet.
+
+    Args:
+        item_ids (Iterable): Item ids referenced by a batch of auctions.
+
+    Returns:
+        int: Number of items created.
+    """
+    item_ids = sorted(set(item_ids))
+
+    if not item_ids:
+        return 0
+
+    if db.engine.dialect.name == 'postgresql':
+        # A single array parameter keeps the statement small no matter how
+        # many items the batch references
+        return db.session.execute(text(
+            'INSERT INTO items (id, name) '
+            'SELECT id, replace(:name, \'{}\', id::text) '
+            'FROM unnest(CAST(:ids AS integer[])) AS id '
+            'ON CONFLICT DO NOTHING'
+        ), {'ids': item_ids, 'name': UNKNOWN_ITEM_NAME}).rowcount
+
+    existing = {
+        item_id for item_id, in
+        db.session.query(Item.id).filter(Item.id.in_(item_ids))
+    }
+    rows = [
+        {'id': item_id, 'name': UNKNOWN_ITEM_NAME.format(item_id)}
+        for item_id in item_ids if item_id not in existing
+    ]
+
+    if rows:
+        db.session.execute(Item.__table__.insert(), rows)
+
+    return len(rows)
+
+
+def ingest_snapshot(fp: IO[str], timestamp: datetime,
+                    batch_size: int = 10000,
+                    chunk_size: int = 1 << 20) -> Tuple[BulkResult, int]:
+    """Loads a Blizzard auction dump under a single snapshot timestamp.
+
+    The dump is parsed incrementally and written in batches inside one
+    transaction, so memory use depends on `batch_size` rather than on the
+    size of the file. With `AUCTIONS_STORAGE=delta` the snapshot is
+    appended to the delta store instead of `auctions`.
+
+    Args:
+        fp (IO): A text stream over a connected-realm auctions document.
+        timestamp (datetime): Timestamp stored on every auction.
+        batch_size (int, optional): Auctions written at a time. Defaults to
+        10000.
+        chunk_size (int, optional): Characters read at a time. Defaults to
+        1 MiB.
+
+    Raises:
+        ValueError: Snapshots are stored as deltas and the timestamp is not
+        after the newest one.
+
+    Returns:
+        tuple: Counts of inserted, updated and rejected auctions, and the
+        number of placeholder items created.
+    """
+    result = BulkResult()
+    items_created = 0
+    ensured_item_ids: set = set()
+    auctions = (
+        map_auction(record, timestamp)
+        for record in iter_snapshot_auctions(fp, chunk_size)
+    )
+    offset = 0
+    delta = storage_mode() == 'delta'
+
+    try:
+        if delta:
+            previous = start_delta_snapshot(timestamp)
+
+        while True:
+            batch = list(islice(auctions, batch_size))
+
+            if not batch:
+                break
+
+            item_ids = {
+                auction['item_id'] for auction in batch
+                if type(auction) is dict and type(auction['item_id']) is int
+            }
+            items_created += ensure_items(item_ids - ensured_item_ids)
+            ensured_item_ids |= item_ids
+
+            if delta:
+                result.merge(load_delta_batch(batch, timestamp, offset,
+                                              known_item_ids=item_ids))
+            else:
+                result.merge(load_batch(batch, offset,
+                                        known_item_ids=item_ids))
+
+            offset += len(batch)
+
+        if delta:
+            finish_delta_snapshot(previous)
+
+        if items_created:
+            mark_changed('items')
+
+        refresh_price_stats(result.affected)
+        invalidate_snapshot_diffs(
+            timestamp for _, timestamp in result.affected)
+        refresh_snapshot_diff(timestamp)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return result, items_created
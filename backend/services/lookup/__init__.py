@@ -0,0 +1,5 @@
+from backend.services.lookup.lookup import (
+    IdsError,
+    get_lookup_ids,
+    lookup_response
+)
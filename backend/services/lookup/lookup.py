@@ -0,0 +1,69 @@
+from typing import List
+
+from flask import current_app, request
+
+from backend.services.serialization import jsonify
+
+
+class IdsError(ValueError):
+    """Raised when the ids of a batch lookup are malformed or too many."""
+
+
+def get_lookup_ids() -> List[int]:
+    """Reads the ids of a batch lookup from the request.
+
+    GET requests pass them as `?ids=1,2,3` and POST requests as a JSON
+    body like `{"ids": [1, 2, 3]}`. At most `API_MAX_LOOKUP_IDS` ids are
+    accepted.
+
+    Raises:
+        IdsError: The ids are missing, malformed or too many.
+
+    Returns:
+        list: The ids in request order, without duplicates.
+    """
+    if request.method == 'GET':
+        raw = request.args.get('ids', '')
+
+        try:
+            ids = [int(id) for id in raw.split(',')]
+        except ValueError:
+            raise IdsError(f"'{raw}' is not a comma separated list of ids.")
+    else:
+        data = request.get_json(silent=True)
+        ids = data.get('ids') if isinstance(data, dict) else None
+
+        if not isinstance(ids, list) or \
+           not all(type(id) is int for id in ids):
+            raise IdsError('The body must be a JSON object with a list of '
+                           'integer ids.')
+
+    if not ids:
+        raise IdsError('No ids were given.')
+
+    maximum = current_app.config['API_MAX_LOOKUP_IDS']
+
+    if len(ids) > maximum:
+        raise IdsError(f'At most {maximum} ids can be looked up at once, '
+                       f'got {len(ids)}.')
+
+    return list(dict.fromkeys(ids))
+
+
+def lookup_response(key: str, ids: List[int], found: dict):
+    """Builds the response of a batch lookup.
+
+    Args:
+        key (str): Name of the list of results, e.g. `auctions`.
+        ids (list): Requested ids, in request order.
+        found (dict): Serialized results by id.
+
+    Returns:
+        tuple: The response, with the results and the missing ids both in
+        request order.
+    """
+    return jsonify({
+        'success': True,
+        key: [found[id] for id in ids if id in found],
+        'missing': [id for id in ids if id not in found]
+    }), 200
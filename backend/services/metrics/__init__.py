@@ -0,0 +1,15 @@
+from backend.services.metrics.metrics import (
+    AUTH_VERIFICATION,
+    render_metrics,
+    setup_metrics
+)
+from backend.services.metrics.registry import (
+    CONTENT_TYPE,
+    REGISTRY,
+    CallbackMetric,
+    Counter,
+    Gauge,
+    Histogram,
+    MultiProcessStore,
+    Registry
+)
@@ -0,0 +1,156 @@
+import time
+
+from flask import request
+from sqlalchemy.pool import QueuePool
+
+from backend.database import db
+from backend.database.instrumentation import TimedQueuePool
+from backend.services.metrics.registry import (
+    REGISTRY,
+    CallbackMetric,
+    MultiProcessStore
+)
+
+_STARTED = 'backend.metrics.started'
+
+REQUEST_DURATION = REGISTRY.histogram(
+    'http_request_duration_seconds',
+    'Time spent serving HTTP requests.',
+    ('method', 'route', 'status')
+)
+REQUESTS_IN_FLIGHT = REGISTRY.gauge(
+    'http_requests_in_flight',
+    'HTTP requests being served.'
+)
+AUTH_VERIFICATION = REGISTRY.histogram(
+    'auth_verification_seconds',
+    'Time spent resolving bearer tokens, by cached, verified or rejected.',
+    ('result',)
+)
+POOL_CHECKOUT_WAIT = REGISTRY.histogram(
+    'db_pool_checkout_wait_seconds',
+    'Time spent waiting for a database connection from the pool.'
+)
+POOL_CHECKOUT_TIMEOUTS = REGISTRY.counter(
+    'db_pool_checkout_timeouts_total',
+    'Connection checkouts that failed because the pool was exhausted.'
+)
+
+
+def _observe_checkout(wait: float, timed_out: bool):
+    POOL_CHECKOUT_WAIT.observe(wait)
+
+    if timed_out:
+        POOL_CHECKOUT_TIMEOUTS.inc()
+
+
+TimedQueuePool.wait_observers.append(_observe_checkout)
+
+
+def _register_callbacks(app):
+    jwks = app.extensions['jwks']
+    token_cache = app.extensions['token_cache']
+    response_cache = app.extensions['response_cache']
+
+    def jwks_fetches():
+        stats = jwks.stats
+
+        return {
+            ('success',): stats['refreshes'] - stats['refresh_failures'],
+            ('failure',): stats['refresh_failures'],
+            ('shared',): stats['shared_loads']
+        }
+
+    def pool_connections():
+        pool = db.get_engine(app).pool
+
+        if not isinstance(pool, QueuePool):
+            return {}
+
+        return {
+            ('checked_out',): pool.checkedout(),
+            ('idle',): pool.checkedin(),
+            ('overflow',): max(pool.overflow(), 0)
+        }
+
+    def token_cache_lookups():
+        stats = token_cache.stats
+
+        return {(name,): stats[name] for name in ('hits', 'misses')}
+
+    def response_cache_lookups():
+        stats = response_cache.stats
+
+        return {(name,): stats[name]
+                for name in ('hits', 'misses', 'not_modified')}
+
+    for metric in (
+        CallbackMetric('jwks_fetches_total',
+                       'JWKS documents fetched from the identity provider '
+                       'or loaded from another worker.',
+                       'counter', jwks_fetches, ('result',)),
+        CallbackMetric('jwks_fetch_seconds_total',
+                       'Time spent fetching JWKS documents.', 'counter',
+                       lambda: {(): jwks.stats['refresh_seconds_total']}),
+        CallbackMetric('db_pool_connections',
+                       'Database connections of the pool, by state. '
+                       'Overflow connections are also checked out.',
+                       'gauge', pool_connections, ('state',)),
+        CallbackMetric('auth_token_cache_lookups_total',
+                       'Lookups of verified tokens.', 'counter',
+                       token_cache_lookups, ('result',)),
+        CallbackMetric('response_cache_lookups_total',
+                       'Lookups of cached responses.', 'counter',
+                       response_cache_lookups, ('result',))
+    ):
+        REGISTRY.register(metric)
+
+
+def setup_metrics(app):
+    """Records the metrics of the requests served by a Flask application.
+
+    Must run after the auth and cache services are set up, as their
+    counters are exposed too. With `METRICS_DIR` set, every worker
+    publishes its metrics there every `METRICS_FLUSH_INTERVAL` seconds
+    and `/metrics` reports the totals of all of them.
+
+    Args:
+        app (Flask): The application to instrument.
+    """
+    if app.config['METRICS_DIR']:
+        REGISTRY.enable_multiprocess(MultiProcessStore(
+            app.config['METRICS_DIR'], app.config['METRICS_FLUSH_INTERVAL']
+        ))
+
+    _register_callbacks(app)
+
+    # Each context local lookup costs more than recording the metrics, so
+    # the request is resolved once per hook and the start time kept in
+    # its WSGI environment rather than in g
+    @app.before_request
+    def start_request():
+        REGISTRY.start_flusher()
+        REQUESTS_IN_FLIGHT.inc()
+        request._get_current_object().environ[_STARTED] = time.perf_counter()
+
+    @app.after_request
+    def record_request(response):
+        req = request._get_current_object()
+        started = req.environ.pop(_STARTED, None)
+
+        # Requests answered by an earlier before_request hook never started
+        if started is not None:
+            rule = req.url_rule
+            REQUEST_DURATION.observe(
+                time.perf_counter() - started,
+                (req.method, rule.rule if rule else '<unmatched>',
+                 str(response.status_code))
+            )
+            REQUESTS_IN_FLIGHT.dec()
+
+        return response
+
+
+def render_metrics() -> str:
+    """Renders the metrics of every worker in the Prometheus text format."""
+    return REGISTRY.render()
@@ -0,0 +1,360 @@
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds, from a cache hit to a slow export
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1,
+                   0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _escape(value) -> str:
+    return str(value).replace('\\', r'\\').replace('"', r'\"') \
+        .replace('\n', r'\n')
+
+
+def _labels(names: Sequence[str], values: Sequence) -> str:
+    if not names:
+        return ''
+
+    return '{' + ','.join(f'{name}="{_escape(value)}"'
+                          for name, value in zip(names, values)) + '}'
+
+
+def _number(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(value)
+
+
+class Metric:
+    """A named family of values, one per combination of label values.
+
+    Updates take a per-metric lock, which is uncontended unless several
+    threads of a worker record the same metric at once.
+    """
+
+    type = 'untyped'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = ()):
+        """Class constructor.
+
+        Args:
+            name (str): Metric name, e.g. `http_requests_total`.
+            documentation (str): Help text of the metric.
+            labelnames (Sequence, optional): Names of its labels.
+            Defaults to none.
+        """
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values: dict = {}
+        self._lock = threading.Lock()
+
+    def collect(self) -> dict:
+        """Returns the current values by tuple of label values."""
+        with self._lock:
+            return {labels: self._copy(value)
+                    for labels, value in self._values.items()}
+
+    @staticmethod
+    def _copy(value):
+        return value
+
+    @staticmethod
+    def merge(values: Iterable) -> object:
+        """Combines the values of several processes."""
+        return sum(values)
+
+    def render(self, values: dict) -> List[str]:
+        return [f'{self.name}{_labels(self.labelnames, labels)} '
+                f'{_number(value)}' for labels, value in values.items()]
+
+
+class Counter(Metric):
+    type = 'counter'
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+
+class Gauge(Metric):
+    type = 'gauge'
+
+    def inc(self, labels: tuple = (), amount: float = 1):
+        with self._lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def dec(self, labels: tuple = (), amount: float = 1):
+        self.inc(labels, -amount)
+
+    def set(self, value: float, labels: tuple = ()):
+        with self._lock:
+            self._values[labels] = value
+
+
+class Histogram(Metric):
+    type = 'histogram'
+
+    def __init__(self, name: str, documentation: str,
+                 labelnames: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        """Class constructor.
+
+        Args:
+            name (str): Metric name, e.g. `http_request_duration_seconds`.
+            documentation (str): Help text of the metric.
+            labelnames (Sequence, optional): Names of its labels.
+            Defaults to none.
+            buckets (Sequence, optional): Upper bounds of the buckets.
+            Defaults to `DEFAULT_BUCKETS`.
+        """
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value: float, labels: tuple = ()):
+        # Counts are kept per bucket and only accumulated when rendered
+        index = bisect_left(self.buckets, value)
+
+        with self._lock:
+            state = self._values.get(labels)
+
+            if state is None:
+                state = self._values[labels] = [[0] * (len(self.buckets) + 1),
+                                                0.0]
+
+            state[0][index] += 1
+            state[1] += value
+
+    @staticmethod
+    def _copy(value):
+        return [list(value[0]), value[1]]
+
+    @staticmethod
+    def merge(values: Iterable) -> list:
+        counts, total = None, 0.0
+
+        for value in values:
+            counts = value[0] if counts is None else \
+                [a + b for a, b in zip(counts, value[0])]
+            total += value[1]
+
+        return [counts, total]
+
+    def render(self, values: dict) -> List[str]:
+        lines = []
+        names = self.labelnames + ('le',)
+
+        for labels, (counts, total) in values.items():
+            cumulative = 0
+
+            for bound, count in zip(self.buckets + ('+Inf',), counts):
+                cumulative += count
+                le = bound if bound == '+Inf' else _number(bound)
+                lines.append(f'{self.name}_bucket'
+                             f'{_labels(names, labels + (le,))} {cumulative}')
+
+            lines.append(f'{self.name}_sum{_labels(self.labelnames, labels)} '
+                         f'{_number(total)}')
+            lines.append(f'{self.name}_count'
+                         f'{_labels(self.labelnames, labels)} {cumulative}')
+
+        return lines
+
+
+class CallbackMetric(Metric):
+    """A counter or gauge whose values are read from a function."""
+
+    def __init__(self, name: str, documentation: str, type: str,
+                 callback: Callable[[], Dict[tuple, float]],
+                 labelnames: Sequence[str] = ()):
+        """Class constructor.
+
+        Args:
+            name (str): Metric name.
+            documentation (str): Help text of the metric.
+            type (str): `counter` or `gauge`.
+            callback (callable): Returns the values by tuple of label
+            values.
+            labelnames (Sequence, optional): Names of its labels.
+            Defaults to none.
+        """
+        super().__init__(name, documentation, labelnames)
+        self.type = type
+        self.callback = callback
+
+    def collect(self) -> dict:
+        return dict(self.callback())
+
+
+class MultiProcessStore:
+    """Directory where every worker process publishes its metrics.
+
+    Each process writes its values to a file named after its pid at most
+    every `interval` seconds, and reads those of the other processes when
+    scraped. Counters and histograms of exited workers keep counting
+    towards the totals, while their gauges are dropped. The directory
+    should be emptied before the workers start.
+    """
+
+    def __init__(self, directory: str, interval: float = 1.0):
+        """Class constructor.
+
+        Args:
+            directory (str): Directory shared by the workers.
+            interval (float, optional): Seconds between two writes of a
+            process. Defaults to 1.
+        """
+        self.directory = directory
+        self.interval = interval
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, pid: int) -> str:
+        return os.path.join(self.directory, f'{pid}.json')
+
+    def write(self, state: dict):
+        path = self._path(os.getpid())
+
+        with open(f'{path}.tmp', 'w') as f:
+            json.dump(state, f)
+
+        os.replace(f'{path}.tmp', path)
+
+    def read(self) -> List[dict]:
+        """Returns the published states of the other processes."""
+        states = []
+
+        for name in os.listdir(self.directory):
+            pid, ext = os.path.splitext(name)
+
+            if ext != '.json' or not pid.isdigit() or \
+               int(pid) == os.getpid():
+                continue
+
+            try:
+                with open(os.path.join(self.directory, name)) as f:
+                    state = json.load(f)
+            except (OSError, ValueError):
+                continue
+
+            if not _is_alive(int(pid)):
+                state = {name: metric for name, metric in state.items()
+                         if metric['type'] != 'gauge'}
+
+            states.append(state)
+
+        return states
+
+
+def _is_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+
+    return True
+
+
+class Registry:
+    """The metrics of the application and how they are exposed."""
+
+    def __init__(self):
+        self._metrics: Dict[str, Metric] = {}
+        self.store: Optional[MultiProcessStore] = None
+        self._flusher_pid: Optional[int] = None
+
+    def register(self, metric: Metric) -> Metric:
+        """Adds a metric to the registry.
+
+        Callback metrics replace a previous metric of the same name, so
+        they can be bound to the latest application.
+
+        Raises:
+            ValueError: Another metric has the same name.
+        """
+        existing = self._metrics.get(metric.name)
+
+        if existing is not None and not isinstance(metric, CallbackMetric):
+            raise ValueError(f"Metric '{metric.name}' already registered.")
+
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, *args, **kwargs) -> Counter:
+        return self.register(Counter(*args, **kwargs))
+
+    def gauge(self, *args, **kwargs) -> Gauge:
+        return self.register(Gauge(*args, **kwargs))
+
+    def histogram(self, *args, **kwargs) -> Histogram:
+        return self.register(Histogram(*args, **kwargs))
+
+    def state(self) -> dict:
+        """Serializable values of every metric of this process."""
+        return {
+            metric.name: {
+                'type': metric.type,
+                'values': [[list(labels), value]
+                           for labels, value in metric.collect().items()]
+            }
+            for metric in self._metrics.values()
+        }
+
+    def enable_multiprocess(self, store: MultiProcessStore):
+        """Publishes the metrics of this process to a shared directory."""
+        self.store = store
+        self._flusher_pid = None
+
+    def flush(self):
+        if self.store is not None:
+            self.store.write(self.state())
+
+    def start_flusher(self):
+        """Starts publishing the metrics of this process periodically.
+
+        Safe to call on every request, a thread is started once per
+        process, i.e. again in each forked worker.
+        """
+        if self.store is None or self._flusher_pid == os.getpid():
+            return
+
+        self._flusher_pid = os.getpid()
+
+        def run(store):
+            while self.store is store:
+                time.sleep(store.interval)
+                self.flush()
+
+        threading.Thread(target=run, args=(self.store,), daemon=True,
+                         name='metrics-flusher').start()
+
+    def render(self) -> str:
+        """Renders the metrics of every process in the text format."""
+        states = [self.state()] + (self.store.read() if self.store else [])
+        lines = []
+
+        for metric in self._metrics.values():
+            values: Dict[tuple, list] = {}
+
+            for state in states:
+                for labels, value in state.get(metric.name,
+                                               {}).get('values', ()):
+                    values.setdefault(tuple(labels), []).append(value)
+
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            lines.extend(metric.render({
+                labels: metric.merge(merged)
+                for labels, merged in sorted(values.items())
+            }))
+
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
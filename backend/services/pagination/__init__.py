@@ -0,0 +1,7 @@
+from backend.services.pagination.pagination import (
+    CursorError,
+    after_cursor,
+    decode_cursor,
+    encode_cursor,
+    get_page_limit
+)
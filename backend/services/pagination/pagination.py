@@ -0,0 +1,121 @@
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Optional, Sequence
+
+from flask import current_app
+from sqlalchemy import and_, or_, tuple_
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor cannot be decoded."""
+
+
+def _default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f'{type(value).__name__} is not cursor serializable')
+
+
+def encode_cursor(*values) -> str:
+    """Encodes the sort key of the last row of a page into an opaque cursor.
+
+    Args:
+        values: Sort key values, datetimes are stored as ISO-8601 strings.
+
+    Returns:
+        str: A URL-safe cursor.
+    """
+    raw = json.dumps(values, default=_default, separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> list:
+    """Decodes a cursor created by `encode_cursor`.
+
+    Args:
+        cursor (str): The cursor received from a client.
+        size (int): Expected number of sort key values.
+
+    Raises:
+        CursorError: The cursor is malformed.
+
+    Returns:
+        list: The sort key values.
+    """
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise CursorError(f"'{cursor}' is not a valid cursor.")
+
+    if not isinstance(values, list) or len(values) != size:
+        raise CursorError(f"'{cursor}' is not a valid cursor.")
+
+    return values
+
+
+def get_page_limit(limit: Optional[str]) -> int:
+    """Parses a requested page size and caps it to the server-side maximum.
+
+    Args:
+        limit (str, optional): The `limit` query parameter.
+
+    Raises:
+        ValueError: The limit is not a positive integer.
+
+    Returns:
+        int: Number of rows to return.
+    """
+    if limit is None:
+        return current_app.config['API_DEFAULT_PAGE_SIZE']
+
+    value = int(limit)
+
+    if value < 1:
+        raise ValueError(f"'{limit}' is not a valid page size.")
+
+    return min(value, current_app.config['API_MAX_PAGE_SIZE'])
+
+
+def after_cursor(columns: Sequence, values: Sequence,
+                 descending: bool = False):
+    """Builds the predicate selecting the rows that follow a cursor.
+
+    Rows are expected to be ordered by `columns`, all ascending or all
+    descending. The first column may be nullable, its NULLs sorting last
+    when ascending and first when descending as Postgres does. The other
+    columns must not be nullable.
+
+    Args:
+        columns (Sequence): Table columns of the sort key.
+        values (Sequence): Sort key of the last row of the previous page.
+        descending (bool, optional): Whether the order is descending.
+        Defaults to False.
+
+    Returns:
+        ColumnElement: A predicate to filter the query by.
+    """
+    def follows(left, right):
+        if descending:
+            bound, rest = left[0] <= right[0], tuple_(*left) < tuple_(*right)
+        else:
+            bound, rest = left[0] >= right[0], tuple_(*left) > tuple_(*right)
+
+        # The row comparison alone is not matched to an index through a
+        # join or a view, the bound on its first column is
+        return and_(bound, rest) if len(left) > 1 else rest
+
+    first = columns[0]
+
+    if not first.nullable:
+        return follows(columns, values)
+
+    if values[0] is None:
+        rest = follows(columns[1:], values[1:])
+        predicate = and_(first.is_(None), rest)
+        return or_(predicate, first.isnot(None)) if descending else predicate
+
+    predicate = follows(columns, values)
+    return predicate if descending else or_(predicate, first.is_(None))
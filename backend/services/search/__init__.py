@@ -0,0 +1,9 @@
+from backend.services.search.search import (
+    SIMILARITY_THRESHOLD,
+    SearchResult,
+    TrigramIndex,
+    find_items,
+    get_trigram_index,
+    has_trigram_index,
+    trigrams
+)
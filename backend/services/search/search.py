@@ -0,0 +1,347 @@
+import heapq
+import re
+import threading
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from itertools import chain
+from typing import Iterable, List, NamedTuple, Optional, Sequence, Tuple
+
+from sqlalchemy import (
+    Integer,
+    case,
+    cast,
+    func,
+    or_,
+    select,
+    text,
+    tuple_
+)
+
+from backend.database import db
+from backend.database.models import Item
+from backend.database.versions import table_versions
+
+# Least word similarity of a fuzzy match, where pg_trgm defaults to 0.6
+SIMILARITY_THRESHOLD = 0.5
+
+# Kinds of match, best first
+EXACT, PREFIX, SUBSTRING, FUZZY = range(4)
+
+# pg_trgm splits text into words of alphanumeric characters
+_WORD = re.compile(r'[^\W_]+')
+
+
+class SearchResult(NamedTuple):
+    id: int
+    name: str
+    # Kind of match, 1000 - 1000 * similarity for fuzzy matches and 0
+    # otherwise, length of the name and id, ascending
+    key: Tuple[int, int, int, int]
+
+
+def trigrams(value: str) -> set:
+    """Splits a string into trigrams the way pg_trgm does.
+
+    Every word is lowercased and padded with two spaces in front and one
+    behind, so `'Tidal'` gives `'  t'`, `' ti'`, `'tid'`, `'ida'`, `'dal'`
+    and `'al '`.
+
+    Args:
+        value (str): The string to split.
+
+    Returns:
+        set: Its trigrams.
+    """
+    result = set()
+
+    for word in _WORD.findall(value.lower()):
+        padded = f'  {word} '
+        result.update(padded[i:i + 3] for i in range(len(padded) - 2))
+
+    return result
+
+
+def inner_trigrams(value: str) -> set:
+    """Trigrams within the words of a string, which any string containing
+    it contains too.
+
+    Args:
+        value (str): The string to split.
+
+    Returns:
+        set: Its unpadded trigrams, empty without a word of at least three
+        characters.
+    """
+    return {
+        word[i:i + 3]
+        for word in _WORD.findall(value.lower())
+        for i in range(len(word) - 2)
+    }
+
+
+def _escape_like(value: str) -> str:
+    return re.sub(r'([\\%_])', r'\\\1', value)
+
+
+class TrigramIndex:
+    """In-memory index of item names, for databases without pg_trgm.
+
+    Matches and ranks names like `find_items` does on Postgres, except
+    that the similarity of a fuzzy match is the share of the trigrams of
+    the query found anywhere in the name, rather than in its closest part.
+    """
+
+    def __init__(self, items: Iterable[Tuple[int, str]]):
+        """Class constructor.
+
+        Args:
+            items (Iterable): Pairs of item id and name.
+        """
+        self._ids = array('q')
+        self._names: List[str] = []
+        self._lowered: List[str] = []
+        # Positions of the names containing each trigram, in order
+        self._postings: dict = {}
+        postings = self._postings
+
+        for position, (id, name) in enumerate(items):
+            self._ids.append(id)
+            self._names.append(name)
+            self._lowered.append(name.lower())
+
+            for trigram in trigrams(name):
+                if trigram not in postings:
+                    postings[trigram] = array('I')
+
+                postings[trigram].append(position)
+
+        # Prefixes without a trigram of their own are found by bisection
+        order = sorted(range(len(self._lowered)),
+                       key=self._lowered.__getitem__)
+        self._sorted_positions = array('I', order)
+        self._sorted_names = [self._lowered[position] for position in order]
+
+    def __len__(self) -> int:
+        return len(self._names)
+
+    def _prefixed(self, prefix: str) -> set:
+        start = bisect_left(self._sorted_names, prefix)
+        end = bisect_left(self._sorted_names, prefix + '\U0010ffff', start)
+
+        return set(self._sorted_positions[start:end])
+
+    def _containing(self, query: str, inner: set) -> set:
+        postings = sorted((self._postings.get(trigram, ()) for trigram in
+                           inner), key=len)
+        candidates = set(postings[0]).intersection(*postings[1:])
+
+        return {position for position in candidates
+                if query in self._lowered[position]}
+
+    def _similar(self, query: str, threshold: float, excluded: set) -> dict:
+        query_trigrams = trigrams(query)
+
+        if not query_trigrams:
+            return {}
+
+        shared = Counter(chain.from_iterable(
+            self._postings.get(trigram, ()) for trigram in query_trigrams
+        ))
+        least = threshold * len(query_trigrams)
+
+        return {position: count / len(query_trigrams)
+                for position, count in shared.items()
+                if count >= least and position not in excluded}
+
+    def _result(self, position: int, kind: int,
+                similarity: float = 1.0) -> SearchResult:
+        name = self._names[position]
+        id = self._ids[position]
+        distance = 1000 - round(similarity * 1000) if kind == FUZZY else 0
+
+        return SearchResult(id, name, (kind, distance, len(name), id))
+
+    def search(self, query: str, limit: int,
+               after: Optional[Sequence[int]] = None,
+               threshold: float = SIMILARITY_THRESHOLD) -> List[SearchResult]:
+        """Finds the names matching a query.
+
+        Args:
+            query (str): Searched text, matched case insensitively.
+            limit (int): Maximum number of results.
+            after (Sequence, optional): Key of the last result of the
+            previous page. Defaults to None.
+            threshold (float, optional): Least similarity of a fuzzy
+            match. Defaults to `SIMILARITY_THRESHOLD`.
+
+        Returns:
+            list: The best matches after `after`, best first.
+        """
+        query = query.lower()
+        inner = inner_trigrams(query)
+        after = tuple(after) if after is not None else (-1,)
+        results: List[SearchResult] = []
+
+        # Found even on pages of fuzzy matches, which must leave them out
+        positions = self._containing(query, inner) if inner \
+            else self._prefixed(query)
+
+        if after[0] < FUZZY:
+            for position in positions:
+                lowered = self._lowered[position]
+
+                if lowered == query:
+                    kind = EXACT
+                elif lowered.startswith(query):
+                    kind = PREFIX
+                else:
+                    kind = SUBSTRING
+
+                results.append(self._result(position, kind))
+
+        results = heapq.nsmallest(
+            limit, (result for result in results if result.key > after),
+            key=lambda result: result.key
+        )
+
+        # Fuzzy matches rank last, they are only looked for when the
+        # others do not fill the page
+        if inner and len(results) < limit:
+            similar = self._similar(query, threshold, positions)
+            results += heapq.nsmallest(
+                limit - len(results),
+                (result for result in (
+                    self._result(position, FUZZY, similarity)
+                    for position, similarity in similar.items()
+                ) if result.key > after),
+                key=lambda result: result.key
+            )
+
+        return results
+
+
+_indexes: dict = {}
+_indexes_lock = threading.Lock()
+
+
+def get_trigram_index() -> TrigramIndex:
+    """Gets the in-memory index of the item names of the current database.
+
+    The index is kept per process and rebuilt from the primary on first
+    use after items change.
+
+    Returns:
+        TrigramIndex: The index.
+    """
+    url = str(db.engine.url)
+    token = table_versions.token(('items',))
+
+    with _indexes_lock:
+        cached = _indexes.get(url)
+
+    if cached and cached[0] == token:
+        return cached[1]
+
+    # Built outside of the lock, a concurrent rebuild only costs time.
+    # Read from the primary, as a lagging replica would leave an outdated
+    # index stamped with the current version
+    connection = db.session.connection(bind_arguments={'bind': db.engine})
+    index = TrigramIndex(connection.execute(
+        select(Item.id, Item.name).order_by(Item.id)
+    ))
+
+    with _indexes_lock:
+        _indexes[url] = (token, index)
+
+    return index
+
+
+# Whether ix_items_name_trgm exists, by database URL. Only migrations
+# create it, so searches do not query the catalog for it
+_trigram_index_exists: dict = {}
+
+
+def has_trigram_index(connection=None) -> bool:
+    connection = connection or db.session.connection()
+
+    if connection.dialect.name != 'postgresql':
+        return False
+
+    url = str(connection.engine.url)
+
+    if url not in _trigram_index_exists:
+        _trigram_index_exists[url] = bool(connection.execute(text(
+            "SELECT to_regclass('ix_items_name_trgm') IS NOT NULL"
+        )).scalar())
+
+    return _trigram_index_exists[url]
+
+
+def _find_items_postgres(query: str, limit: int,
+                         after: Optional[Sequence[int]]) -> List[SearchResult]:
+    lowered = func.lower(Item.name)
+    pattern = _escape_like(query.lower())
+    contains = lowered.like('%' + pattern + '%', escape='\\')
+    similarity = func.word_similarity(query, Item.name)
+    key = (
+        case(
+            (lowered == query.lower(), EXACT),
+            (lowered.like(pattern + '%', escape='\\'), PREFIX),
+            (contains, SUBSTRING),
+            else_=FUZZY
+        ),
+        case(
+            (contains, 0),
+            else_=1000 - cast(func.round(similarity * 1000), Integer)
+        ),
+        func.length(Item.name),
+        Item.id
+    )
+
+    if inner_trigrams(query):
+        # Both served by ix_items_name_trgm
+        db.session.execute(text(
+            "SELECT set_config('pg_trgm.word_similarity_threshold', "
+            ":threshold, true)"
+        ), {'threshold': str(SIMILARITY_THRESHOLD)})
+        match = or_(Item.name.ilike('%' + pattern + '%', escape='\\'),
+                    Item.name.op('%>')(query))
+    else:
+        # Too short for trigrams, served by ix_items_name_prefix
+        match = lowered.like(pattern + '%', escape='\\')
+
+    rows = db.session.query(Item.id, Item.name, *key).filter(match)
+
+    if after is not None:
+        rows = rows.filter(tuple_(*key) > tuple_(*after))
+
+    return [SearchResult(id, name, tuple(values))
+            for id, name, *values in rows.order_by(*key).limit(limit)]
+
+
+def find_items(query: str, limit: int,
+               after: Optional[Sequence[int]] = None) -> List[SearchResult]:
+    """Finds the items whose name matches a query, best matches first.
+
+    Names equal to the query come first, then names starting with it,
+    containing it, and last names similar to it. Matches are case
+    insensitive. Queries without a word of at least three characters only
+    match names starting with them.
+
+    On Postgres with pg_trgm the matches are found through the trigram
+    index of `items.name`, elsewhere through an in-memory `TrigramIndex`.
+
+    Args:
+        query (str): Searched text.
+        limit (int): Maximum number of results.
+        after (Sequence, optional): Key of the last result of the
+        previous page. Defaults to None.
+
+    Returns:
+        list: The matching items.
+    """
+    if has_trigram_index():
+        return _find_items_postgres(query, limit, after)
+
+    return get_trigram_index().search(query, limit, after)
@@ -0,0 +1,16 @@
+from backend.services.serialization.fields import (
+    FieldError,
+    get_fields,
+    with_columns
+)
+from backend.services.serialization.serialization import (
+    JSONEncoder,
+    JSONProvider,
+    ORJSONProvider,
+    create_provider,
+    dumps,
+    jsonify,
+    parse_timestamp,
+    serialize_rows,
+    setup_json
+)
@@ -0,0 +1,52 @@
+from typing import Optional, Sequence
+
+
+class FieldError(ValueError):
+    """Raised when a `fields` parameter names an unknown field."""
+
+
+def get_fields(fields: Optional[str], columns: Sequence) -> tuple:
+    """Picks the columns a `fields` query parameter asks for.
+
+    Args:
+        fields (str, optional): Comma separated field names, e.g.
+        `id,unit_price,quantity`. None selects every column.
+        columns (Sequence): Columns a client may ask for.
+
+    Raises:
+        FieldError: No field or an unknown field was requested.
+
+    Returns:
+        tuple: The requested columns, in the order they were asked for.
+    """
+    if fields is None:
+        return tuple(columns)
+
+    available = {column.key: column for column in columns}
+    names = [name.strip() for name in fields.split(',') if name.strip()]
+
+    if not names:
+        raise FieldError('No fields requested.')
+
+    unknown = [name for name in names if name not in available]
+
+    if unknown:
+        raise FieldError(f"Unknown fields: {', '.join(unknown)}.")
+
+    return tuple(available[name] for name in dict.fromkeys(names))
+
+
+def with_columns(columns: tuple, *required) -> tuple:
+    """Adds the columns a route needs itself, e.g. for its cursor.
+
+    Args:
+        columns (tuple): Columns returned by `get_fields`.
+        required: Columns to select even if they were not requested.
+
+    Returns:
+        tuple: The columns to select.
+    """
+    keys = {column.key for column in columns}
+
+    return columns + tuple(column for column in required
+                           if column.key not in keys)
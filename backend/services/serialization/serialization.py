@@ -0,0 +1,196 @@
+import json
+from datetime import date, datetime, time, timezone
+from decimal import Decimal
+from typing import Any, Optional, Sequence
+
+from flask import Response, current_app
+from flask.json import JSONEncoder as FlaskJSONEncoder
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None
+
+
+def _default(value: Any):
+    """Encodes the values the JSON encoders do not support natively."""
+    if isinstance(value, (datetime, date, time)):
+        return value.isoformat()
+
+    # Aggregates such as sum() over integer columns come back as numerics
+    if isinstance(value, Decimal):
+        return int(value) if value == value.to_integral_value() \
+            else float(value)
+
+    raise TypeError(f'{type(value).__name__} is not JSON serializable')
+
+
+def parse_timestamp(value: str) -> datetime:
+    """Parses an ISO-8601 timestamp sent by a client.
+
+    Timestamps are stored as naive UTC, those with an offset or a trailing
+    `Z` are converted to it.
+
+    Args:
+        value (str): The timestamp.
+
+    Raises:
+        ValueError: The timestamp is malformed.
+
+    Returns:
+        datetime: The naive UTC timestamp.
+    """
+    timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+    if timestamp.tzinfo is not None:
+        timestamp = timestamp.astimezone(timezone.utc).replace(tzinfo=None)
+
+    return timestamp
+
+
+class JSONEncoder(FlaskJSONEncoder):
+    """Flask's encoder, with timestamps in ISO-8601 like the providers."""
+
+    def default(self, o):
+        try:
+            return _default(o)
+        except TypeError:
+            return super().default(o)
+
+
+class JSONProvider:
+    """Encodes responses with the standard library's `json` module."""
+
+    name = 'stdlib'
+
+    def __init__(self, sort_keys: bool = False):
+        """Class constructor.
+
+        Args:
+            sort_keys (bool, optional): Whether object keys are sorted.
+            Defaults to False.
+        """
+        self.sort_keys = sort_keys
+
+    def dumps(self, obj: Any) -> bytes:
+        return json.dumps(obj, default=_default, sort_keys=self.sort_keys,
+                          ensure_ascii=False,
+                          separators=(',', ':')).encode()
+
+    def loads(self, data):
+        return json.loads(data)
+
+    def response(self, *args, **kwargs) -> Response:
+        """Serializes the arguments like `flask.jsonify` does.
+
+        Returns:
+            Response: An `application/json` response.
+        """
+        if args and kwargs:
+            raise TypeError('jsonify() behavior undefined when passed both '
+                            'args and kwargs')
+
+        data = args[0] if len(args) == 1 else args or kwargs
+
+        return current_app.response_class(self.dumps(data) + b'\n',
+                                          mimetype='application/json')
+
+
+class ORJSONProvider(JSONProvider):
+    """Encodes responses with orjson, several times faster than stdlib."""
+
+    name = 'orjson'
+
+    def __init__(self, sort_keys: bool = False):
+        super().__init__(sort_keys)
+        self._option = orjson.OPT_NON_STR_KEYS
+
+        if sort_keys:
+            self._option |= orjson.OPT_SORT_KEYS
+
+    def dumps(self, obj: Any) -> bytes:
+        # Naive datetimes are written like datetime.isoformat() does
+        return orjson.dumps(obj, default=_default, option=self._option)
+
+    def loads(self, data):
+        return orjson.loads(data)
+
+
+def create_provider(name: str = 'auto', sort_keys: bool = False) \
+        -> JSONProvider:
+    """Creates the provider a `JSON_PROVIDER` setting names.
+
+    Args:
+        name (str, optional): `orjson`, `stdlib`, or `auto` for orjson when
+        it is installed and the standard library otherwise. Defaults to
+        'auto'.
+        sort_keys (bool, optional): Whether object keys are sorted.
+        Defaults to False.
+
+    Raises:
+        ValueError: The provider is unknown or its library not installed.
+
+    Returns:
+        JSONProvider: The JSON provider.
+    """
+    if name == 'auto':
+        name = 'orjson' if orjson is not None else 'stdlib'
+
+    if name == 'orjson' and orjson is not None:
+        return ORJSONProvider(sort_keys)
+
+    if name == 'stdlib':
+        return JSONProvider(sort_keys)
+
+    raise ValueError(f"JSON provider '{name}' is not available.")
+
+
+def setup_json(app):
+    """Attaches the JSON provider to a Flask application.
+
+    Args:
+        app (Flask): The application to configure.
+    """
+    app.json_encoder = JSONEncoder
+    app.extensions['json'] = create_provider(
+        app.config['JSON_PROVIDER'], sort_keys=app.config['JSON_SORT_KEYS']
+    )
+
+
+def jsonify(*args, **kwargs) -> Response:
+    """Drop-in replacement for `flask.jsonify` using the app's provider."""
+    return current_app.extensions['json'].response(*args, **kwargs)
+
+
+def dumps(obj: Any) -> bytes:
+    """Serializes an object to JSON with the app's provider."""
+    return current_app.extensions['json'].dumps(obj)
+
+
+def serialize_rows(rows: Sequence,
+                   fields: Optional[Sequence[str]] = None) -> list:
+    """Turns rows of a column query into dicts keyed by column name.
+
+    Selecting columns instead of entities skips building an ORM object per
+    row, which dominates the cost of large list responses.
+
+    Args:
+        rows (list): Rows returned by `Query.with_entities(...).all()`.
+        fields (Sequence, optional): Names of the columns to keep, for rows
+        that carry columns the client did not ask for. Defaults to None,
+        every column.
+
+    Returns:
+        list: One dict per row.
+    """
+    if not rows:
+        return []
+
+    if fields is None or tuple(fields) == rows[0]._fields:
+        fields = rows[0]._fields
+        return [dict(zip(fields, row)) for row in rows]
+
+    indexes = [rows[0]._fields.index(name) for name in fields]
+
+    return [{name: row[index] for name, index in zip(fields, indexes)}
+            for row in rows]
@@ -0,0 +1,8 @@
+from backend.services.snapshots.diff import (
+    TIME_LEFT_MIN,
+    compute_snapshot_diff,
+    fetch_snapshot_diff,
+    invalidate_snapshot_diffs,
+    previous_snapshot,
+    refresh_snapshot_diff
+)
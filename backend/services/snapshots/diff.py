@@ -0,0 +1,244 @@
+from datetime import datetime, timedelta
+from functools import lru_cache
+from itertools import chain
+from typing import Iterable, Optional
+
+from sqlalchemy import String, and_, bindparam, event, func, inspect, or_
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import ARRAY, insert
+
+from backend.database import db
+from backend.database.models import Auction, SnapshotDiff
+from backend.database.models.snapshot_diff import DIFF_KINDS
+from backend.database.storage import auction_model, snapshot_timestamps
+from backend.database.versions import mark_changed
+
+# Least time left of an auction in each bucket of the auctions API
+TIME_LEFT_MIN = {
+    'SHORT': timedelta(0),
+    'MEDIUM': timedelta(minutes=30),
+    'LONG': timedelta(hours=2),
+    'VERY_LONG': timedelta(hours=12),
+}
+
+# One full join of both snapshots on the primary key keeps the auctions
+# that changed, which are then classified. An auction that disappeared
+# while it could not have run out yet was most likely bought, unless it
+# was replaced by the one new stack of the same item and size, which is
+# read as a relisting. Commodities are sold from one shared order book,
+# so they are never considered relisted. Snapshots are read from
+# `auctions` or `delta_auctions` depending on the storage mode.
+_DIFF = '''
+WITH changes AS (
+    SELECT id, prev.id IS NULL AS added, cur.id IS NULL AS gone,
+           prev.time_left = ANY(:expirable) AS expirable,
+           coalesce(cur.item_id, prev.item_id) AS item_id,
+           coalesce(cur.quantity, prev.quantity) AS quantity,
+           coalesce(cur.unit_price, prev.unit_price, 0) = 0 AS stack
+    FROM (
+        SELECT id, item_id, quantity, bid, buyout, unit_price
+        FROM {auctions} WHERE timestamp = :timestamp
+    ) AS cur
+    FULL JOIN (
+        SELECT id, item_id, quantity, time_left, bid, buyout, unit_price
+        FROM {auctions} WHERE timestamp = :previous
+    ) AS prev USING (id)
+    WHERE cur.id IS NULL OR prev.id IS NULL
+    OR (cur.bid, cur.buyout, cur.unit_price) IS DISTINCT FROM
+       (prev.bid, prev.buyout, prev.unit_price)
+), relisted AS (
+    SELECT min(id) FILTER (WHERE gone) AS id
+    FROM changes WHERE (added OR gone) AND stack
+    GROUP BY item_id, quantity
+    HAVING count(*) FILTER (WHERE gone) = 1
+    AND count(*) FILTER (WHERE added) = 1
+), classified AS (
+    SELECT changes.id, added, gone, expirable,
+           relisted.id IS NOT NULL AS relisted
+    FROM changes LEFT JOIN relisted USING (id)
+)
+SELECT
+    array_agg(id ORDER BY id) FILTER (WHERE added) AS new,
+    array_agg(id ORDER BY id) FILTER (
+        WHERE gone AND NOT expirable AND NOT relisted) AS sold,
+    array_agg(id ORDER BY id) FILTER (
+        WHERE gone AND expirable AND NOT relisted) AS expired,
+    array_agg(id ORDER BY id) FILTER (WHERE relisted) AS relisted,
+    array_agg(id ORDER BY id) FILTER (
+        WHERE NOT added AND NOT gone) AS price_changed
+FROM classified
+'''
+
+
+@lru_cache()
+def _diff_statement(table: str):
+    """Builds the diff query over the table or view auctions are read from."""
+    return text(_DIFF.format(auctions=table)).bindparams(
+        bindparam('expirable', type_=ARRAY(String))
+    )
+
+
+def previous_snapshot(timestamp: datetime,
+                      connection=None) -> Optional[datetime]:
+    """Gets the timestamp of the snapshot stored before another one.
+
+    Args:
+        timestamp (datetime): Timestamp of a snapshot.
+        connection (Connection, optional): Connection to read through.
+        Defaults to the one of the current session.
+
+    Returns:
+        datetime: The previous timestamp, None for the first snapshot.
+    """
+    connection = connection or db.session.connection()
+    timestamps = snapshot_timestamps()
+
+    return connection.scalar(
+        select(func.max(timestamps)).where(timestamps < timestamp)
+    )
+
+
+def compute_snapshot_diff(timestamp: datetime,
+                          connection=None) -> Optional[dict]:
+    """Classifies the auctions that changed since the previous snapshot.
+
+    Auctions are `new` when they were not listed before, `sold` when they
+    disappeared before they could have expired, `expired` when their time
+    left may have run out between both snapshots, `relisted` when a stack
+    of the same item and size replaced them, and `price_changed` when
+    their bid, buyout or unit price changed.
+
+    Args:
+        timestamp (datetime): Timestamp of a snapshot.
+        connection (Connection, optional): Connection to read through.
+        Defaults to the one of the current session.
+
+    Returns:
+        dict: Values of the `SnapshotDiff` columns, None if there is no
+        such snapshot or no snapshot before it.
+    """
+    connection = connection or db.session.connection()
+    timestamps = snapshot_timestamps()
+
+    exists = connection.scalar(
+        select(timestamps).where(timestamps == timestamp).limit(1)
+    )
+    previous = previous_snapshot(timestamp, connection)
+
+    if exists is None or previous is None:
+        return None
+
+    gap = timestamp - previous
+    statement = _diff_statement(auction_model().__table__.name)
+    row = connection.execute(statement.bindparams(
+        timestamp=timestamp,
+        previous=previous,
+        expirable=[time_left for time_left, least in TIME_LEFT_MIN.items()
+                   if least < gap]
+    )).one()
+
+    return {
+        'timestamp': timestamp,
+        'previous_timestamp': previous,
+        # Aggregates over no rows are NULL
+        **{kind: row[kind] or [] for kind in DIFF_KINDS}
+    }
+
+
+def refresh_snapshot_diff(timestamp: datetime,
+                          connection=None) -> Optional[dict]:
+    """Computes and stores the diff of a snapshot.
+
+    Args:
+        timestamp (datetime): Timestamp of a snapshot.
+        connection (Connection, optional): Connection to write through.
+        Defaults to the one of the current session.
+
+    Returns:
+        dict: The stored diff, None if there is nothing to diff against.
+    """
+    connection = connection or db.session.connection()
+    diff = compute_snapshot_diff(timestamp, connection)
+
+    if diff is not None:
+        statement = insert(SnapshotDiff.__table__).values(diff)
+        connection.execute(statement.on_conflict_do_update(
+            index_elements=['timestamp'],
+            set_={column: statement.excluded[column]
+                  for column in ('previous_timestamp', *DIFF_KINDS)}
+        ))
+        mark_changed('snapshot_diffs')
+
+    return diff
+
+
+def invalidate_snapshot_diffs(timestamps: Iterable[datetime],
+                              connection=None):
+    """Drops the stored diffs that changes to some snapshots make stale.
+
+    That is the diff of each snapshot and the diff of the snapshot after
+    it, whose previous snapshot may have changed. They are computed again
+    when requested.
+
+    Args:
+        timestamps (Iterable): Timestamps of snapshots whose auctions were
+        inserted, changed or deleted.
+        connection (Connection, optional): Connection to write through.
+        Defaults to the one of the current session.
+    """
+    timestamps = {timestamp for timestamp in timestamps
+                  if timestamp is not None}
+
+    if not timestamps:
+        return
+
+    connection = connection or db.session.connection()
+    diffs = SnapshotDiff.__table__
+    stale = or_(*(
+        and_(diffs.c.timestamp >= timestamp,
+             diffs.c.previous_timestamp <= timestamp)
+        for timestamp in timestamps
+    ))
+
+    if connection.execute(diffs.delete().where(stale)).rowcount:
+        mark_changed('snapshot_diffs')
+
+
+def fetch_snapshot_diff(timestamp: datetime) -> Optional[dict]:
+    """Gets the diff of a snapshot, computing and storing it if needed.
+
+    Args:
+        timestamp (datetime): Timestamp of a snapshot.
+
+    Returns:
+        dict: The diff as serialized by `SnapshotDiff`, None if there is
+        nothing to diff against.
+    """
+    diff = SnapshotDiff.query.get(timestamp)
+
+    if diff is not None:
+        return diff.serialize()
+
+    try:
+        diff = refresh_snapshot_diff(timestamp)
+        db.session.commit()
+    except Exception:
+        db.session.rollback()
+        raise
+
+    return SnapshotDiff(**diff).serialize() if diff else None
+
+
+@event.listens_for(db.session, 'after_flush')
+def _invalidate_flushed_auctions(session, flush_context):
+    # Auctions written through the models, e.g. by the blueprints. Bulk
+    # loads invalidate the snapshots they touched themselves
+    timestamps = set()
+
+    for obj in chain(session.new, session.dirty, session.deleted):
+        if isinstance(obj, Auction):
+            history = inspect(obj).attrs.timestamp.history
+            timestamps.update(history.added or history.unchanged or ())
+            timestamps.update(history.deleted or ())
+
+    invalidate_snapshot_diffs(timestamps, session.connection())
@@ -0,0 +1,66 @@
+"""Measures bulk auction ingestion throughput.
+
+Run from the project root with the same environment as `run_tests.sh`:
+
+    python -m benchmarks.bench_bulk_ingest [rows]
+
+The rows reference a temporary item, which is deleted afterwards together
+with its auctions.
+"""
+import sys
+import time
+from datetime import datetime
+from random import choice, randint
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Auction, Item
+from backend.database.models.auction import TIME_LEFT_VALUES
+from backend.services.ingest import load_auctions
+
+ITEM_ID = 2_000_000_000
+FIRST_AUCTION_ID = 2_000_000_000
+
+
+def generate(rows: int, timestamp: str) -> list:
+    return [
+        {
+            'id': FIRST_AUCTION_ID + i,
+            'timestamp': timestamp,
+            'bid': randint(0, 10000),
+            'buyout': randint(10000, 100000),
+            'unit_price': 0,
+            'quantity': randint(1, 200),
+            'time_left': choice(TIME_LEFT_VALUES),
+            'item_id': ITEM_ID
+        }
+        for i in range(rows)
+    ]
+
+
+def main(rows: int = 100000):
+    app = create_app('config/testing.py')
+
+    with app.app_context():
+        Item(id=ITEM_ID, name='Benchmark item').insert()
+
+        try:
+            # Generated up front so only the load itself is timed
+            auctions = generate(rows, datetime.utcnow().isoformat())
+
+            for label in ('insert', 'update'):
+                start = time.perf_counter()
+                result = load_auctions(auctions)
+                elapsed = time.perf_counter() - start
+
+                print(f'{label}: {result.inserted} inserted, '
+                      f'{result.updated} updated in {elapsed:.2f}s '
+                      f'({rows / elapsed:,.0f} rows/s)')
+        finally:
+            Auction.query.filter(Auction.item_id == ITEM_ID).delete()
+            Item.query.filter(Item.id == ITEM_ID).delete()
+            db.session.commit()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,167 @@
+"""Compares the size and ingest time of both auction storage modes.
+
+Run from the project root with the same environment as `run_tests.sh`:
+
+    python -m benchmarks.bench_delta_storage [auctions] [snapshots]
+
+An auction house of the given number of auctions is polled hourly. Every
+hour a few auctions are bought, run out or are outbid, and are replaced by
+new ones, while the time left of the others goes down. The same snapshots
+are ingested with AUCTIONS_STORAGE=rows and then with delta, and the
+generated items and auctions are deleted afterwards.
+"""
+import io
+import json
+import os
+import sys
+import time
+from datetime import datetime, timedelta
+from random import Random
+from unittest import mock
+
+from sqlalchemy import func, select, text
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import (
+    Auction,
+    AuctionChange,
+    AuctionListing,
+    AuctionSnapshot,
+    DeltaAuction,
+    Item,
+    SnapshotDiff
+)
+from backend.database.partitions import list_partitions
+from backend.services.ingest import ingest_snapshot
+
+FIRST_ITEM_ID = 2_000_000_000
+FIRST_AUCTION_ID = 2_000_000_000
+ITEMS = 1000
+START = datetime(2003, 3, 3)
+# Chances per hour
+BOUGHT = 0.03
+OUTBID = 0.05
+
+DELTA_TABLES = ('auction_listings', 'auction_changes', 'auction_snapshots')
+
+
+def time_left(hours: int) -> str:
+    if hours > 12:
+        return 'VERY_LONG'
+
+    return 'LONG' if hours > 2 else 'MEDIUM'
+
+
+def simulate(auctions: int, snapshots: int, seed: int = 0) -> list:
+    """Generates hourly Blizzard-shaped dumps of one auction house."""
+    random = Random(seed)
+    # id: [item id, bid, buyout, quantity, hour it runs out at]
+    live: dict = {}
+    next_id = FIRST_AUCTION_ID
+    dumps = []
+
+    for hour in range(snapshots):
+        for id, listing in list(live.items()):
+            if listing[4] <= hour or random.random() < BOUGHT:
+                del live[id]
+            elif listing[1] and random.random() < OUTBID:
+                listing[1] += random.randint(1, 100)
+
+        while len(live) < auctions:
+            bid = random.randint(1000, 10000) if random.random() < 0.5 \
+                else None
+            # The first snapshot finds auctions of every age
+            duration = random.randint(1, 48) if not hour \
+                else random.choice((12, 24, 48))
+            live[next_id] = [FIRST_ITEM_ID + random.randrange(ITEMS), bid,
+                             random.randint(10000, 100000),
+                             random.randint(1, 20), hour + duration]
+            next_id += 1
+
+        dumps.append(json.dumps({'auctions': [
+            {'id': id, 'item': {'id': item_id}, 'bid': bid,
+             'buyout': buyout, 'quantity': quantity,
+             'time_left': time_left(ends - hour)}
+            for id, (item_id, bid, buyout, quantity, ends) in live.items()
+        ]}))
+
+    return dumps
+
+
+def table_size(tables) -> int:
+    """Bytes of the given tables and their indexes, once vacuumed."""
+    engine = db.engine.execution_options(isolation_level='AUTOCOMMIT')
+
+    with engine.connect() as connection:
+        for table in tables:
+            connection.execute(text(f'VACUUM {table}'))
+
+        return sum(
+            connection.scalar(text('SELECT pg_total_relation_size(:name)'),
+                              {'name': table})
+            for table in tables
+        )
+
+
+def cleanup():
+    Item.query.filter(Item.id >= FIRST_ITEM_ID).delete()
+    AuctionSnapshot.query.filter(AuctionSnapshot.timestamp >= START).delete()
+    SnapshotDiff.query.filter(SnapshotDiff.timestamp >= START).delete()
+    db.session.commit()
+
+
+def run(app, dumps: list, tables, stored_rows, served) -> float:
+    with app.app_context():
+        cleanup()
+        # Rows mode creates the partitions of the snapshots as it goes
+        before = table_size(tables())
+
+        start = time.perf_counter()
+
+        for hour, dump in enumerate(dumps):
+            ingest_snapshot(io.StringIO(dump), START + timedelta(hours=hour))
+
+        elapsed = time.perf_counter() - start
+        size = table_size(tables()) - before
+        rows = db.session.scalar(stored_rows)
+        served = served.query.filter(served.timestamp >= START).count()
+        cleanup()
+
+    print(f"{app.config['AUCTIONS_STORAGE']:6} {elapsed:8.1f}s "
+          f"{elapsed / len(dumps):8.2f}s {size / 2 ** 20:10.1f} MiB "
+          f"{rows:12,} {served:12,}")
+    return size
+
+
+def main(auctions: int = 10000, snapshots: int = 100):
+    dumps = simulate(auctions, snapshots)
+    rows_app = create_app('config/testing.py')
+
+    with mock.patch.dict(os.environ, {'AUCTIONS_STORAGE': 'delta'}):
+        delta_app = create_app('config/testing.py')
+
+    print(f'{snapshots} snapshots of {auctions} auctions')
+    print(f"{'mode':6} {'ingest':>9} {'per poll':>9} {'table size':>14} "
+          f"{'stored rows':>12} {'served rows':>12}")
+
+    rows_size = run(
+        rows_app, dumps,
+        lambda: ['auctions'] + [name for name, _ in list_partitions()],
+        select(func.count()).select_from(Auction.__table__)
+        .where(Auction.timestamp >= START),
+        Auction
+    )
+    delta_size = run(
+        delta_app, dumps, lambda: DELTA_TABLES,
+        select(func.count()).select_from(AuctionChange.__table__)
+        .join(AuctionListing.__table__)
+        .where(AuctionListing.item_id >= FIRST_ITEM_ID),
+        DeltaAuction
+    )
+
+    print(f'delta storage takes {delta_size / rows_size:.1%} of the space')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
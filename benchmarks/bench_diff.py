@@ -0,0 +1,58 @@
+"""Times the diff of two consecutive snapshots.
+
+Run from the project root with the same environment as `run_tests.sh`:
+
+    python -m benchmarks.bench_diff [auctions]
+
+Both snapshots hold the given number of auctions. A tenth of the first
+one disappears, as many new auctions replace them, and a twentieth of the
+remaining ones are outbid. The rows are generated by a transaction that
+is rolled back at the end.
+"""
+import sys
+import time
+from datetime import timedelta
+
+from sqlalchemy import text
+
+from backend import create_app
+from backend.database import db
+from backend.services.snapshots import compute_snapshot_diff
+from benchmarks.bench_json import FIRST_AUCTION_ID, ITEM_ID, TIMESTAMP, setup
+
+
+def main(auctions: int = 150000):
+    app = create_app('config/testing.py')
+    later = TIMESTAMP + timedelta(hours=1)
+
+    with app.app_context():
+        setup(auctions)
+
+        # Same week, so the partition of the first snapshot holds both
+        db.session.execute(text(
+            "INSERT INTO auctions "
+            "SELECT id + CASE WHEN id % 10 = 0 THEN :rows ELSE 0 END, "
+            ":later, bid + CASE WHEN id % 20 = 1 THEN 1 ELSE 0 END, buyout, "
+            "unit_price, quantity, time_left, item_id "
+            "FROM auctions WHERE timestamp = :timestamp"
+        ), {'rows': auctions, 'later': later, 'timestamp': TIMESTAMP})
+        db.session.execute(text('ANALYZE auctions'))
+
+        try:
+            for _ in range(3):
+                start = time.perf_counter()
+                diff = compute_snapshot_diff(later)
+                elapsed = time.perf_counter() - start
+
+                print(f'{auctions} auctions per snapshot {elapsed:6.3f}s: ' +
+                      ', '.join(f'{len(diff[kind])} {kind}' for kind in (
+                          'new', 'sold', 'expired', 'relisted',
+                          'price_changed')))
+
+            assert diff['new'][0] == FIRST_AUCTION_ID + auctions
+        finally:
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
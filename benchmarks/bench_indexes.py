@@ -0,0 +1,144 @@
+"""Shows query plans and latency of the auction access patterns before and
+after the indexes of migration c5d8e2a1f7b3.
+
+Run from the project root with `FLASK_DATABASE_URL` pointing at a Postgres
+database:
+
+    python -m benchmarks.bench_indexes [rows]
+
+The data is generated inside a scratch `bench_indexes` schema by a
+transaction that is rolled back at the end, so the application tables are
+left untouched.
+"""
+import os
+import sys
+import time
+
+from sqlalchemy import create_engine, text
+
+SCHEMA = 'bench_indexes'
+ITEMS = 10000
+AUCTIONS_PER_SNAPSHOT = 50000
+
+INDEXES = [
+    'CREATE INDEX ix_auctions_timestamp_id ON auctions (timestamp, id)',
+    'CREATE INDEX ix_auctions_item_id_timestamp '
+    'ON auctions (item_id, timestamp)',
+    'CREATE INDEX ix_auctions_item_id_unit_price '
+    'ON auctions (item_id, unit_price)',
+    'CREATE INDEX ix_auctions_item_id_buyout ON auctions (item_id, buyout)',
+]
+
+QUERIES = {
+    'item history': (
+        'SELECT * FROM auctions WHERE item_id = 4242 '
+        'ORDER BY timestamp DESC LIMIT 100'
+    ),
+    'time range': (
+        "SELECT count(*) FROM auctions WHERE timestamp >= "
+        "'2021-07-01 02:00' AND timestamp < '2021-07-01 03:00'"
+    ),
+    'item in time range': (
+        "SELECT * FROM auctions WHERE item_id = 4242 AND timestamp >= "
+        "'2021-07-01 02:00' AND timestamp < '2021-07-01 05:00'"
+    ),
+    'cheapest unit price': (
+        'SELECT * FROM auctions WHERE item_id = 4242 AND unit_price > 0 '
+        'ORDER BY unit_price LIMIT 10'
+    ),
+    'cheapest buyout': (
+        'SELECT * FROM auctions WHERE item_id = 4242 AND buyout > 0 '
+        'ORDER BY buyout LIMIT 10'
+    ),
+    'cascade delete': 'DELETE FROM items WHERE id = 4243',
+}
+
+
+def setup(connection, rows: int):
+    snapshots = max(rows // AUCTIONS_PER_SNAPSHOT, 1)
+
+    connection.execute(text(f'DROP SCHEMA IF EXISTS {SCHEMA} CASCADE'))
+    connection.execute(text(f'CREATE SCHEMA {SCHEMA}'))
+    connection.execute(text(f'SET search_path TO {SCHEMA}'))
+    connection.execute(text(
+        'CREATE TABLE items (id integer PRIMARY KEY, name varchar(180))'
+    ))
+    connection.execute(text(
+        'CREATE TABLE auctions ('
+        ' id integer PRIMARY KEY, timestamp timestamp NOT NULL,'
+        ' bid integer, buyout integer, unit_price integer,'
+        ' quantity integer NOT NULL, time_left varchar(10) NOT NULL,'
+        ' item_id integer NOT NULL REFERENCES items (id) ON DELETE CASCADE)'
+    ))
+    connection.execute(text(
+        f"INSERT INTO items SELECT i, 'Item ' || i "
+        f"FROM generate_series(1, {ITEMS}) AS i"
+    ))
+    connection.execute(text(
+        f"INSERT INTO auctions "
+        f"SELECT i, timestamp '2021-07-01' + "
+        f"(i / {AUCTIONS_PER_SNAPSHOT}) * interval '1 hour', "
+        f"(random() * 1e5)::int, (random() * 1e6)::int, "
+        f"CASE WHEN random() < 0.5 THEN (random() * 1e4)::int ELSE 0 END, "
+        f"1 + (random() * 200)::int, 'LONG', "
+        f"1 + (random() * {ITEMS - 1})::int "
+        f"FROM generate_series(0, {snapshots * AUCTIONS_PER_SNAPSHOT - 1}) "
+        f"AS i"
+    ))
+    connection.execute(text('ANALYZE'))
+
+
+def explain(connection, label: str) -> dict:
+    print(f'\n=== {label} ===')
+    timings = {}
+
+    for name, query in QUERIES.items():
+        # Rolled back so the cascade delete can be measured repeatedly
+        transaction = connection.begin_nested()
+        plan = [row[0] for row in connection.execute(
+            text(f'EXPLAIN (ANALYZE, BUFFERS) {query}')
+        )]
+        transaction.rollback()
+
+        print(f'\n-- {name}: {query}')
+        print('\n'.join(f'   {line}' for line in plan))
+
+        timings[name] = float(plan[-1].split()[-2])
+
+    return timings
+
+
+def main(rows: int = 2000000):
+    engine = create_engine(os.environ['FLASK_DATABASE_URL'])
+
+    with engine.connect() as connection:
+        transaction = connection.begin()
+
+        try:
+            start = time.perf_counter()
+            setup(connection, rows)
+            print(f'generated {rows} auctions in '
+                  f'{time.perf_counter() - start:.1f}s')
+
+            before = explain(connection, 'without indexes')
+
+            start = time.perf_counter()
+
+            for index in INDEXES:
+                connection.execute(text(index))
+
+            connection.execute(text('ANALYZE auctions'))
+            print(f'\ncreated indexes in {time.perf_counter() - start:.1f}s')
+
+            after = explain(connection, 'with indexes')
+
+            print(f'\n{"query":<22}{"before ms":>12}{"after ms":>12}')
+
+            for name in QUERIES:
+                print(f'{name:<22}{before[name]:>12.3f}{after[name]:>12.3f}')
+        finally:
+            transaction.rollback()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
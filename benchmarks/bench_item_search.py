@@ -0,0 +1,107 @@
+"""Times item name searches over a large catalogue.
+
+Run from the project root with the same environment as `run_tests.sh`:
+
+    python -m benchmarks.bench_item_search [items]
+
+Item names are made of random words, like `Zandor's Runed Helm of the
+Owl`. Searches go through the pg_trgm index when the database has one and
+through the in-memory index otherwise. The items are inserted by a
+transaction that is rolled back at the end.
+"""
+import statistics
+import sys
+import time
+from random import Random
+
+from sqlalchemy import text
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Item
+from backend.services.search import (
+    find_items,
+    get_trigram_index,
+    has_trigram_index
+)
+
+FIRST_ITEM_ID = 2_000_000_000
+QUALITIES = ('Lesser', 'Greater', 'Heavy', 'Light', 'Superior', 'Ancient',
+             'Shadowghast', 'Tidespray', 'Desolate', 'Lightless', 'Callous',
+             'Crystalline', 'Enchanted', 'Runed', 'Gilded', 'Frozen')
+NOUNS = ('Shard', 'Potion', 'Leather', 'Hide', 'Silk', 'Dust', 'Elixir',
+         'Greatboots', 'Ring', 'Cloak', 'Ingot', 'Essence', 'Scale', 'Herb',
+         'Gauntlets', 'Helm', 'Staff', 'Blade', 'Flask', 'Tabard', 'Girdle',
+         'Pauldrons', 'Bracers', 'Amulet', 'Shield', 'Wand', 'Robe')
+SUFFIXES = ('the Owl', 'the Bear', 'the Tiger', 'the Monkey', 'Intellect',
+            'Stamina', 'the Tidal Seas', 'Embers')
+SYLLABLES = ('ka', 'zan', 'dor', 'th', 'ul', 'mir', 'val', 'ash', 'gor',
+             'eth', 'ri', 'zul', 'nar', 'ok', 'shi', 'vey', 'lan', 'dra')
+QUERIES = (
+    'Tidespray Silk',   # exact
+    'Ancient Eli',      # prefix
+    'bracers of the',   # substring
+    'Tydespray Silc',   # fuzzy
+    'Gr',               # short prefix
+    'qwerty',           # no match
+)
+
+
+def item_names(count: int, seed: int = 0) -> list:
+    """Names like `Tidespray Silk` and `Zandor's Runed Helm of the Owl`."""
+    random = Random(seed)
+    names = []
+
+    for _ in range(count):
+        name = f'{random.choice(QUALITIES)} {random.choice(NOUNS)}'
+
+        # Most items are named after someone or somewhere
+        if random.random() < 0.8:
+            owner = ''.join(random.choice(SYLLABLES)
+                            for _ in range(random.randint(2, 3)))
+            name = f"{owner.capitalize()}'s {name}"
+
+        if random.random() < 0.3:
+            name += f' of {random.choice(SUFFIXES)}'
+
+        names.append(name)
+
+    return names
+
+
+def main(items: int = 200000):
+    app = create_app('config/testing.py')
+
+    with app.app_context():
+        db.session.execute(Item.__table__.insert(), [
+            {'id': FIRST_ITEM_ID + i, 'name': name}
+            for i, name in enumerate(item_names(items))
+        ])
+        db.session.execute(text('ANALYZE items'))
+
+        try:
+            if has_trigram_index():
+                print(f'{items} items, pg_trgm index')
+            else:
+                # Built on first use, from the uncommitted items too
+                start = time.perf_counter()
+                index = get_trigram_index()
+                print(f'{len(index)} items, in-memory index built in '
+                      f'{time.perf_counter() - start:.2f}s')
+
+            for query in QUERIES:
+                timings = []
+
+                for _ in range(20):
+                    start = time.perf_counter()
+                    results = find_items(query, 50)
+                    timings.append(time.perf_counter() - start)
+
+                print(f'{query!r:30} {len(results):3} results '
+                      f'{statistics.median(timings) * 1000:7.2f} ms median')
+        finally:
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,93 @@
+"""Compares the cost of serializing a large list of auctions to JSON.
+
+Run from the project root with the same environment as `run_tests.sh`:
+
+    python -m benchmarks.bench_json [rows]
+
+Three paths are timed over the same rows: ORM objects serialized with
+`Auction.serialize()` and Flask's encoder (the former list path), row
+tuples encoded with the standard library, and row tuples encoded with
+orjson when it is installed. The rows are generated by a transaction that
+is rolled back at the end.
+"""
+import json
+import sys
+import time
+from datetime import datetime
+
+from flask.json import JSONEncoder as FlaskJSONEncoder
+from sqlalchemy import text
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Auction
+from backend.database.partitions import ensure_partitions
+from backend.services.serialization import (
+    JSONProvider,
+    ORJSONProvider,
+    serialize_rows
+)
+from backend.services.serialization.serialization import orjson
+
+ITEM_ID = 2_000_000_000
+FIRST_AUCTION_ID = 2_000_000_000
+TIMESTAMP = datetime(2021, 7, 1)
+
+
+def setup(rows: int):
+    ensure_partitions([TIMESTAMP])
+    db.session.execute(text(
+        "INSERT INTO items VALUES (:item_id, 'Benchmark item')"
+    ), {'item_id': ITEM_ID})
+    db.session.execute(text(
+        "INSERT INTO auctions "
+        "SELECT :first + i, :timestamp, i % 10000, 10000 + i % 90000, 0, "
+        "1 + i % 200, 'LONG', :item_id FROM generate_series(0, :rows - 1) i"
+    ), {'first': FIRST_AUCTION_ID, 'timestamp': TIMESTAMP,
+        'item_id': ITEM_ID, 'rows': rows})
+
+
+def timed(label: str, rows: int, serialize) -> float:
+    db.session.expunge_all()
+
+    start = time.perf_counter()
+    body = serialize()
+    elapsed = time.perf_counter() - start
+
+    print(f'{label:22} {elapsed:6.2f}s {rows / elapsed:12,.0f} rows/s '
+          f'{len(body) / 2 ** 20:8.1f} MiB')
+    return elapsed
+
+
+def main(rows: int = 100000):
+    app = create_app('config/testing.py')
+
+    with app.app_context():
+        setup(rows)
+
+        query = Auction.query.filter(Auction.item_id == ITEM_ID) \
+            .order_by(Auction.timestamp, Auction.id)
+        row_query = query.with_entities(*Auction.columns())
+
+        try:
+            baseline = timed('orm + flask encoder', rows, lambda: json.dumps(
+                {'auctions': [auction.serialize() for auction in query]},
+                cls=FlaskJSONEncoder
+            ).encode())
+            timed('rows + stdlib', rows, lambda: JSONProvider().dumps(
+                {'auctions': serialize_rows(row_query.all())}
+            ))
+
+            if orjson is not None:
+                elapsed = timed('rows + orjson', rows,
+                                lambda: ORJSONProvider().dumps(
+                                    {'auctions': serialize_rows(
+                                        row_query.all())}
+                                ))
+                print(f'speedup: {baseline / elapsed:.1f}x')
+        finally:
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
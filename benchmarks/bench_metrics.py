@@ -0,0 +1,106 @@
+"""Measures the time the metrics service adds to every request.
+
+Run from the project root with the same environment as `run_tests.sh`:
+
+    python -m benchmarks.bench_metrics [requests] [threads]
+
+The request hooks of `setup_metrics` are called directly inside a request
+context, so the figure excludes routing and the WSGI round trip. They
+are compared with hooks that only resolve the request, the context local
+lookup every hook pays, and run from several threads at once to include
+contention on the metric locks.
+"""
+import sys
+import threading
+import time
+
+from flask import request
+
+from backend import create_app
+from backend.services.metrics import REGISTRY
+from backend.services.metrics.metrics import AUTH_VERIFICATION
+
+
+def hooks(app):
+    start, = (f for f in app.before_request_funcs[None]
+              if f.__name__ == 'start_request')
+    record, = (f for f in app.after_request_funcs[None]
+               if f.__name__ == 'record_request')
+
+    return start, record
+
+
+def baseline_hooks(app):
+    def start():
+        request._get_current_object()
+
+    def record(response):
+        request._get_current_object()
+        return response
+
+    return start, record
+
+
+def run_hooks(app, requests: int, hooks=hooks) -> float:
+    start, record = hooks(app)
+    response = app.response_class()
+
+    # The request context matches the route, whose rule is a label
+    with app.test_request_context('/item/1'):
+        begin = time.perf_counter()
+
+        for _ in range(requests):
+            start()
+            record(response)
+
+        return time.perf_counter() - begin
+
+
+def run_threads(app, requests: int, threads: int) -> float:
+    workers = [threading.Thread(target=run_hooks, args=(app, requests))
+               for _ in range(threads)]
+    begin = time.perf_counter()
+
+    for worker in workers:
+        worker.start()
+
+    for worker in workers:
+        worker.join()
+
+    return time.perf_counter() - begin
+
+
+def main(requests: int = 200000, threads: int = 4):
+    app = create_app('config/testing.py')
+
+    baseline = run_hooks(app, requests, baseline_hooks)
+    print(f'context lookups only      {baseline / requests * 1e6:6.2f} '
+          'us/request')
+
+    elapsed = run_hooks(app, requests)
+    print(f'request hooks, 1 thread   {elapsed / requests * 1e6:6.2f} '
+          f'us/request, {(elapsed - baseline) / requests * 1e6:.2f} '
+          'recording')
+
+    elapsed = run_threads(app, requests // threads, threads)
+    print(f'request hooks, {threads} threads  '
+          f'{elapsed / requests * 1e6:6.2f} us/request (wall)')
+
+    begin = time.perf_counter()
+
+    for _ in range(requests):
+        AUTH_VERIFICATION.observe(0.0001, ('cached',))
+
+    elapsed = time.perf_counter() - begin
+    print(f'histogram observe         {elapsed / requests * 1e6:6.2f} '
+          'us/call')
+
+    begin = time.perf_counter()
+    text = REGISTRY.render()
+    print(f'render                    '
+          f'{(time.perf_counter() - begin) * 1000:6.2f} ms, '
+          f'{len(text.splitlines())} lines')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
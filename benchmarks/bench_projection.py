@@ -0,0 +1,63 @@
+"""Compares the memory used to read auctions as ORM objects and as rows.
+
+Run from the project root with the same environment as `run_tests.sh`:
+
+    python -m benchmarks.bench_projection [rows]
+
+Peak memory is measured with tracemalloc while the whole result is held,
+as a list endpoint does before encoding it. The rows are generated by a
+transaction that is rolled back at the end.
+"""
+import sys
+import time
+import tracemalloc
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Auction
+from benchmarks.bench_json import ITEM_ID, setup
+
+
+def measure(label: str, rows: int, query) -> int:
+    db.session.expunge_all()
+    tracemalloc.start()
+
+    start = time.perf_counter()
+    result = query.all()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+
+    tracemalloc.stop()
+    del result
+
+    print(f'{label:26} {peak / 2 ** 20:8.1f} MiB '
+          f'{peak / rows:8.0f} B/row {elapsed:6.2f}s')
+    return peak
+
+
+def main(rows: int = 100000):
+    app = create_app('config/testing.py')
+
+    with app.app_context():
+        setup(rows)
+
+        query = Auction.query.filter(Auction.item_id == ITEM_ID) \
+            .order_by(Auction.timestamp, Auction.id)
+
+        try:
+            orm = measure('orm objects', rows, query)
+            full = measure('rows, every field', rows,
+                           query.with_entities(*Auction.columns()))
+            projected = measure('rows, id,unit_price,quantity', rows,
+                                query.with_entities(Auction.id,
+                                                    Auction.unit_price,
+                                                    Auction.quantity))
+
+            print(f'reduction: {orm / full:.1f}x every field, '
+                  f'{orm / projected:.1f}x projected')
+        finally:
+            db.session.rollback()
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,88 @@
+"""Measures ingestion time and peak memory for a synthetic auction dump.
+
+Run from the project root with the same environment as `run_tests.sh`:
+
+    python -m benchmarks.bench_snapshot_ingest [megabytes]
+
+A Blizzard-shaped dump of roughly the requested size is written to a
+temporary file and ingested. The generated auctions and items are deleted
+afterwards.
+"""
+import json
+import os
+import resource
+import sys
+import tempfile
+import time
+from datetime import datetime
+from random import choice, randint
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Auction, Item
+from backend.database.models.auction import TIME_LEFT_VALUES
+from backend.services.ingest import ingest_snapshot
+
+FIRST_ITEM_ID = 2_000_000_000
+FIRST_AUCTION_ID = 2_000_000_000
+ITEMS = 5000
+
+
+def write_dump(fp, megabytes: int) -> int:
+    fp.write('{"_links": {"self": {"href": "https://example.com"}}, '
+             '"auctions": [')
+    count = 0
+
+    while fp.tell() < megabytes * 1024 * 1024:
+        if count:
+            fp.write(',')
+
+        fp.write(json.dumps({
+            'id': FIRST_AUCTION_ID + count,
+            'item': {
+                'id': FIRST_ITEM_ID + randint(0, ITEMS - 1),
+                'context': 5,
+                'bonus_lists': [randint(1000, 8000), randint(1000, 8000)]
+            },
+            'bid': randint(0, 10000),
+            'buyout': randint(10000, 100000),
+            'quantity': randint(1, 200),
+            'time_left': choice(TIME_LEFT_VALUES)
+        }))
+        count += 1
+
+    fp.write(']}')
+    return count
+
+
+def main(megabytes: int = 200):
+    app = create_app('config/testing.py')
+
+    with tempfile.NamedTemporaryFile('w+', suffix='.json') as fp:
+        auctions = write_dump(fp, megabytes)
+        fp.flush()
+        fp.seek(0)
+
+        with app.app_context():
+            try:
+                start = time.perf_counter()
+                result, items = ingest_snapshot(fp, datetime.utcnow())
+                elapsed = time.perf_counter() - start
+            finally:
+                Auction.query.filter(
+                    Auction.item_id >= FIRST_ITEM_ID
+                ).delete()
+                Item.query.filter(Item.id >= FIRST_ITEM_ID).delete()
+                db.session.commit()
+
+    # ru_maxrss is reported in kilobytes on Linux
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    print(f'dump:      {megabytes} MB, {auctions} auctions')
+    print(f'ingested:  {result.inserted} inserted, {items} items created')
+    print(f'elapsed:   {elapsed:.1f}s ({auctions / elapsed:,.0f} rows/s)')
+    print(f'peak RSS:  {peak:.0f} MB')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
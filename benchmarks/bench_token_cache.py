@@ -0,0 +1,59 @@
+"""Compares authenticated requests/sec with and without the token cache.
+
+Run from the project root with the same environment as `run_tests.sh`:
+
+    python -m benchmarks.bench_token_cache [requests]
+
+Requests go through `requires_auth` to a route that does no database work,
+so the numbers isolate the cost of token verification.
+"""
+import sys
+import time
+
+from flask import jsonify
+
+from backend import create_app
+from backend.services.auth import TokenCache, requires_auth
+from test.utils.auth import get_token
+
+
+def run(app, token: str, requests: int) -> float:
+    client = app.test_client()
+    headers = {'Authorization': token}
+
+    start = time.perf_counter()
+
+    for _ in range(requests):
+        client.get('/_bench', headers=headers)
+
+    return requests / (time.perf_counter() - start)
+
+
+def main(requests: int = 2000):
+    app = create_app('config/testing.py')
+
+    @app.get('/_bench')
+    @requires_auth('get:items')
+    def bench(jwt):
+        return jsonify({'success': True})
+
+    with app.app_context():
+        token = get_token('premium')
+
+    app.extensions['token_cache'] = TokenCache(max_size=0)
+    uncached = run(app, token, requests)
+
+    app.extensions['token_cache'] = TokenCache(
+        max_size=app.config['AUTH_TOKEN_CACHE_SIZE'],
+        max_age=app.config['AUTH_TOKEN_CACHE_MAX_AGE']
+    )
+    cached = run(app, token, requests)
+
+    print(f'requests:          {requests}')
+    print(f'without cache:     {uncached:10.0f} req/s')
+    print(f'with cache:        {cached:10.0f} req/s')
+    print(f'speedup:           {cached / uncached:10.1f}x')
+
+
+if __name__ == '__main__':
+    main(*(int(arg) for arg in sys.argv[1:]))
@@ -0,0 +1,205 @@
+import os
+import stat
+import tempfile
+import unittest
+
+from flask import Flask
+
+from backend import create_app
+from backend.services.auth import JWKSKeyStore, TokenCache, setup_auth
+from backend.services.cache import (
+    MemoryBackend,
+    ResponseCache,
+    SQLiteBackend,
+    create_backend,
+    get_cache_url
+)
+from .test_jwks import make_jwks
+from .test_response_cache import make_response
+
+
+class BackendTestMixin:
+
+    def make_backend(self, **bounds):
+        raise NotImplementedError
+
+    def test_get_set_delete(self):
+
+        backend = self.make_backend()
+        backend.set('a', b'1')
+
+        self.assertEqual(backend.get('a'), b'1')
+
+        backend.delete('a')
+
+        self.assertIsNone(backend.get('a'))
+        self.assertEqual(backend.stats['entries'], 0)
+
+    def test_expired_value_dropped(self):
+
+        backend = self.make_backend()
+        backend.set('a', b'1', ttl=-1)
+
+        self.assertIsNone(backend.get('a'))
+
+    def test_evicts_by_size(self):
+
+        backend = self.make_backend(max_bytes=10)
+        backend.set('a', b'x' * 6)
+        backend.set('b', b'x' * 6)
+
+        self.assertIsNone(backend.get('a'))
+        self.assertEqual(backend.get('b'), b'x' * 6)
+        self.assertEqual(backend.stats['bytes'], 6)
+        self.assertEqual(backend.stats['evictions'], 1)
+
+    def test_evicts_by_count(self):
+
+        backend = self.make_backend(max_entries=2)
+
+        for key in 'abc':
+            backend.set(key, b'1')
+
+        self.assertEqual(backend.stats['entries'], 2)
+        self.assertIsNone(backend.get('a'))
+
+
+class MemoryBackendTestCase(BackendTestMixin, unittest.TestCase):
+
+    def make_backend(self, **bounds):
+        return MemoryBackend(**bounds)
+
+
+class SQLiteBackendTestCase(BackendTestMixin, unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def make_backend(self, **bounds):
+        return create_backend(f'sqlite:///{self.path}', 'test', **bounds)
+
+    def test_file_readable_by_owner_only(self):
+
+        os.chmod(self.path, 0o644)
+        self.make_backend().set('a', b'1')
+
+        for suffix in ('', '-wal', '-shm'):
+            mode = os.stat(self.path + suffix).st_mode
+
+            self.assertEqual(stat.S_IMODE(mode), 0o600)
+
+    @unittest.skipUnless(os.geteuid() == 0, 'changing owners requires root')
+    def test_file_of_another_user_refused(self):
+
+        os.chown(self.path, 65534, -1)
+
+        with self.assertRaises(ValueError):
+            self.make_backend()
+
+    def test_shared_between_instances(self):
+
+        self.make_backend().set('a', b'1')
+
+        self.assertEqual(self.make_backend().get('a'), b'1')
+
+    def test_namespaces_are_isolated(self):
+
+        SQLiteBackend(self.path, 'one').set('a', b'1')
+
+        self.assertIsNone(SQLiteBackend(self.path, 'two').get('a'))
+
+    def test_response_cache_shared_between_workers(self):
+
+        worker_1 = ResponseCache(backend=SQLiteBackend(self.path, 'r'))
+        worker_2 = ResponseCache(backend=SQLiteBackend(self.path, 'r'))
+        worker_1.put('/items', make_response('a', 10))
+
+        self.assertEqual(worker_2.get('/items', 'a').body, b'x' * 10)
+        self.assertEqual(worker_2.stats['hits'], 1)
+
+    def test_token_cache_shared_between_workers(self):
+
+        worker_1 = TokenCache(backend=SQLiteBackend(self.path, 'tokens'))
+        worker_2 = TokenCache(backend=SQLiteBackend(self.path, 'tokens'))
+        worker_1.put('token-1', {'sub': 'user-1'})
+
+        self.assertEqual(worker_2.get('token-1'), {'sub': 'user-1'})
+
+    def test_jwks_fetched_once_for_all_workers(self):
+
+        fetches = []
+
+        def fetch(url, timeout):
+            fetches.append(url)
+            return make_jwks('key-1')
+
+        worker_1, worker_2 = (
+            JWKSKeyStore('stub://jwks', fetch=fetch,
+                         backend=SQLiteBackend(self.path, 'jwks'))
+            for _ in range(2)
+        )
+
+        self.assertIsNotNone(worker_1.get_key('key-1'))
+        self.assertIsNotNone(worker_2.get_key('key-1'))
+        self.assertEqual(len(fetches), 1)
+        self.assertEqual(worker_2.stats['shared_loads'], 1)
+
+
+class CreateBackendTestCase(unittest.TestCase):
+
+    def test_unsupported_url(self):
+
+        with self.assertRaises(ValueError):
+            create_backend('redis://localhost', 'test')
+
+    def test_default_url_in_instance_folder(self):
+
+        with tempfile.TemporaryDirectory() as directory:
+            instance_path = os.path.join(directory, 'instance')
+            app = Flask(__name__, instance_path=instance_path)
+            app.config['CACHE_URL'] = None
+            url = get_cache_url(app)
+
+            self.assertEqual(url, 'sqlite:///' + os.path.join(
+                instance_path, 'cache.sqlite'
+            ))
+            self.assertEqual(
+                stat.S_IMODE(os.stat(instance_path).st_mode), 0o700
+            )
+
+
+class TokenCacheBackendTestCase(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        self.app = create_app('config/testing.py')
+        self.app.config['CACHE_URL'] = f'sqlite:///{self.path}'
+
+    def tearDown(self):
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(self.path + suffix):
+                os.remove(self.path + suffix)
+
+    def test_payloads_kept_per_process_by_default(self):
+
+        setup_auth(self.app)
+
+        self.assertIsInstance(self.app.extensions['token_cache'].backend,
+                              MemoryBackend)
+        self.assertIsInstance(self.app.extensions['jwks'].backend,
+                              SQLiteBackend)
+
+    def test_payloads_shared_when_enabled(self):
+
+        self.app.config['AUTH_TOKEN_CACHE_SHARED'] = True
+        setup_auth(self.app)
+
+        self.assertIsInstance(self.app.extensions['token_cache'].backend,
+                              SQLiteBackend)
@@ -0,0 +1,139 @@
+import json
+import unittest
+
+from sqlalchemy import text
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Item
+from backend.database.versions import mark_changed, table_versions
+from backend.services.catalogue import item_catalogue
+from .utils.auth import get_token
+from .utils.queries import assert_max_queries
+
+ITEM_ID = 2_100_000_300
+OTHER_ID = 2_100_000_301
+
+
+class ItemCatalogueTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.client = self.app.test_client
+
+        with self.app.app_context():
+            self.headers = {'Authorization': get_token('admin')}
+            Item(id=ITEM_ID, name='Catalogued Cloak').insert()
+            item_catalogue.load()
+
+    def tearDown(self):
+        table_versions.configure(
+            self.app.config['CACHE_VERSION_POLL_INTERVAL']
+        )
+
+        with self.app.app_context():
+            Item.query.filter(Item.id.in_([ITEM_ID, OTHER_ID])).delete()
+            db.session.commit()
+
+    def test_lookups_skip_the_database(self):
+
+        with self.app.app_context(), assert_max_queries(self, 0):
+            self.assertEqual(item_catalogue.get_name(ITEM_ID),
+                             'Catalogued Cloak')
+            self.assertEqual(item_catalogue.get_names([ITEM_ID, ITEM_ID]),
+                             {ITEM_ID: 'Catalogued Cloak'})
+
+    def test_misses_skip_the_database(self):
+
+        with self.app.app_context(), assert_max_queries(self, 0):
+            self.assertEqual(
+                item_catalogue.get_names([ITEM_ID, OTHER_ID, OTHER_ID + 1]),
+                {ITEM_ID: 'Catalogued Cloak'}
+            )
+
+    def test_items_of_other_processes_found(self):
+
+        with self.app.app_context():
+            item_catalogue.exists(ITEM_ID)
+
+            with db.engine.begin() as connection:
+                connection.execute(text(
+                    "INSERT INTO items (id, name) VALUES (:id, 'Far Cloak')"
+                ), {'id': OTHER_ID})
+
+            # Not seen until the versions of this process are read again
+            with assert_max_queries(self, 0):
+                self.assertFalse(item_catalogue.exists(OTHER_ID))
+
+            table_versions.configure(poll_interval=0)
+
+            self.assertEqual(item_catalogue.get_name(OTHER_ID), 'Far Cloak')
+
+        res = self.client().get(f'/item/{OTHER_ID}', headers=self.headers)
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_orm_writes_are_applied(self):
+
+        with self.app.app_context():
+            Item(id=OTHER_ID, name='Other Cloak').insert()
+            item = Item.query.get(ITEM_ID)
+            item.name = 'Renamed Cloak'
+            item.update()
+            Item.query.get(OTHER_ID).delete()
+
+            with assert_max_queries(self, 0):
+                self.assertEqual(item_catalogue.get_name(ITEM_ID),
+                                 'Renamed Cloak')
+                self.assertFalse(item_catalogue.exists(OTHER_ID))
+
+    def test_other_writes_reload(self):
+
+        with self.app.app_context():
+            db.session.execute(text(
+                "INSERT INTO items (id, name) VALUES (:id, 'Core Cloak')"
+            ), {'id': OTHER_ID})
+            mark_changed('items')
+            db.session.commit()
+
+            with assert_max_queries(self, 1):
+                self.assertTrue(item_catalogue.exists(OTHER_ID))
+
+    def test_uncommitted_items_are_seen(self):
+
+        with self.app.app_context():
+            db.session.add(Item(id=OTHER_ID, name='Pending Cloak'))
+
+            self.assertEqual(item_catalogue.get_name(OTHER_ID),
+                             'Pending Cloak')
+
+            db.session.rollback()
+
+            self.assertFalse(item_catalogue.exists(OTHER_ID))
+
+    def test_create_auction_checks_the_catalogue(self):
+
+        res = self.client().post('/auctions', headers=self.headers, json={
+            'id': 2_100_000_300, 'bid': 1, 'buyout': 2, 'quantity': 1,
+            'time_left': 'LONG', 'item_id': OTHER_ID
+        })
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn(str(OTHER_ID), data['message'])
+
+    def test_create_auction_with_item_id_string(self):
+
+        auction = {'id': 2_100_000_300, 'timestamp': '2021-07-18T22:11:33',
+                   'bid': 1, 'buyout': 2, 'quantity': 1, 'time_left': 'LONG'}
+
+        res = self.client().post('/auctions', headers=self.headers,
+                                 json={**auction, 'item_id': str(ITEM_ID)})
+
+        self.assertEqual(res.status_code, 200)
+
+        for item_id in ('cloak', True, [ITEM_ID]):
+            res = self.client().post('/auctions', headers=self.headers,
+                                     json={**auction, 'item_id': item_id})
+
+            self.assertEqual(res.status_code, 400, item_id)
@@ -0,0 +1,91 @@
+import os
+import unittest
+from unittest import mock
+
+from sqlalchemy import exc, text
+
+from backend import create_app
+from backend.database import db
+from backend.database.instrumentation import TimedQueuePool
+from backend.services.metrics.metrics import POOL_CHECKOUT_TIMEOUTS
+
+
+def create_engine(**environ):
+    with mock.patch.dict(os.environ, environ):
+        app = create_app('config/testing.py')
+
+    return db.get_engine(app)
+
+
+class EngineOptionsTestCase(unittest.TestCase):
+
+    def test_pool_options(self):
+
+        engine = create_engine(SQL_POOL_SIZE='3', SQL_MAX_OVERFLOW='2',
+                               SQL_POOL_TIMEOUT='7', SQL_POOL_RECYCLE='60')
+        pool = engine.pool
+
+        self.assertIsInstance(pool, TimedQueuePool)
+        self.assertEqual(pool.size(), 3)
+        self.assertEqual(pool._max_overflow, 2)
+        self.assertEqual(pool._timeout, 7)
+        self.assertEqual(pool._recycle, 60)
+        self.assertTrue(pool._pre_ping)
+
+    def test_statement_timeout(self):
+
+        engine = create_engine(SQL_STATEMENT_TIMEOUT_MS='50')
+
+        with engine.connect() as conn:
+            self.assertEqual(conn.scalar(text('SHOW statement_timeout')),
+                             '50ms')
+
+            with self.assertRaises(exc.OperationalError):
+                conn.execute(text('SELECT pg_sleep(1)'))
+
+    def test_no_statement_timeout(self):
+
+        engine = create_engine(SQL_STATEMENT_TIMEOUT_MS='0')
+
+        with engine.connect() as conn:
+            self.assertEqual(conn.scalar(text('SHOW statement_timeout')),
+                             '0')
+
+    def test_exhausted_pool_is_counted(self):
+
+        engine = create_engine(SQL_POOL_SIZE='1', SQL_MAX_OVERFLOW='0',
+                               SQL_POOL_TIMEOUT='0')
+        before = POOL_CHECKOUT_TIMEOUTS.collect().get((), 0)
+
+        with engine.connect():
+            with self.assertRaises(exc.TimeoutError):
+                engine.connect()
+
+        self.assertEqual(POOL_CHECKOUT_TIMEOUTS.collect()[()], before + 1)
+
+    def test_dispose_after_fork(self):
+
+        engine = create_engine()
+
+        with engine.connect() as conn:
+            conn.scalar(text('SELECT 1'))
+
+        pool = engine.pool
+        read, write = os.pipe()
+        pid = os.fork()
+
+        if pid == 0:
+            # The child must not reuse the connection of its parent
+            replaced = engine.pool is not pool and \
+                engine.pool.checkedin() == 0
+            os.write(write, b'1' if replaced else b'0')
+            os._exit(0)
+
+        os.close(write)
+        os.waitpid(pid, 0)
+
+        self.assertEqual(os.read(read, 1), b'1')
+        self.assertIs(engine.pool, pool)
+        self.assertEqual(pool.checkedin(), 1)
+
+        os.close(read)
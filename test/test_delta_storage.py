@@ -0,0 +1,194 @@
+import io
+import json
+import os
+import unittest
+from datetime import datetime, timedelta
+from unittest import mock
+
+from sqlalchemy import text
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import (
+    AuctionChange,
+    AuctionListing,
+    AuctionSnapshot,
+    Item,
+    ItemPriceStats,
+    SnapshotDiff
+)
+from backend.database.partitions import partition_name, partition_start
+from backend.database.storage import prune_deltas
+from backend.services.ingest import ingest_snapshot
+from .utils.auth import get_token
+
+ITEM_ID = 2_100_000_100
+COMMODITY_ID = 2_100_000_101
+T0 = datetime(2002, 1, 1)
+T1 = T0 + timedelta(hours=1)
+T2 = T0 + timedelta(hours=2)
+
+
+def auction(id, item_id=ITEM_ID, time_left='VERY_LONG', quantity=1, **prices):
+    return {'id': id, 'item': {'id': item_id}, 'quantity': quantity,
+            'time_left': time_left, **prices}
+
+
+# 1 never changes, 2 is partly bought, 3 is missing from T1, 4 is outbid
+SNAPSHOTS = {
+    T0: [auction(1, buyout=100),
+         auction(2, COMMODITY_ID, quantity=20, unit_price=10),
+         auction(3, buyout=50)],
+    T1: [auction(1, buyout=100),
+         auction(2, COMMODITY_ID, quantity=15, unit_price=10),
+         auction(4, bid=20, buyout=90)],
+    T2: [auction(1, buyout=100),
+         auction(2, COMMODITY_ID, quantity=15, unit_price=10),
+         auction(3, buyout=50),
+         auction(4, bid=30, buyout=90)],
+}
+
+REQUESTS = [
+    '/auctions',
+    f'/auctions?item_id={ITEM_ID}&sort=-buyout',
+    f'/auctions?from={T1.isoformat()}&to={T2.isoformat()}',
+    '/auction/3',
+    '/auction/4',
+    '/auctions?ids=4,99,1,3',
+    f'/snapshots/{T1.isoformat()}/diff',
+    f'/snapshots/{T2.isoformat()}/diff',
+]
+
+
+def create_delta_app():
+    with mock.patch.dict(os.environ, {'AUCTIONS_STORAGE': 'delta'}):
+        return create_app('config/testing.py')
+
+
+def ingest_snapshots(app):
+    with app.app_context():
+        for timestamp, auctions in SNAPSHOTS.items():
+            ingest_snapshot(io.StringIO(json.dumps({'auctions': auctions})),
+                            timestamp)
+
+
+class DeltaStorageTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_delta_app()
+        self.client = self.app.test_client
+
+        with self.app.app_context():
+            self.headers = {'Authorization': get_token('admin')}
+
+    def tearDown(self):
+        with self.app.app_context():
+            Item.query.filter(Item.id.in_([ITEM_ID, COMMODITY_ID])).delete()
+            AuctionSnapshot.query.filter(AuctionSnapshot.timestamp >= T0) \
+                .delete()
+            SnapshotDiff.query.filter(SnapshotDiff.timestamp >= T0).delete()
+            db.session.commit()
+
+    def get_all(self, client) -> list:
+        return [json.loads(client().get(path, headers=self.headers).data)
+                for path in REQUESTS]
+
+    def get_stats(self) -> list:
+        with self.app.app_context():
+            return [
+                stats.serialize() for stats in ItemPriceStats.query
+                .filter(ItemPriceStats.item_id.in_([ITEM_ID, COMMODITY_ID]))
+                .order_by(ItemPriceStats.item_id, ItemPriceStats.timestamp)
+            ]
+
+    def test_reads_match_row_storage(self):
+
+        rows_app = create_app('config/testing.py')
+        ingest_snapshots(rows_app)
+        expected = self.get_all(rows_app.test_client)
+        expected_stats = self.get_stats()
+        self.tearDown()
+
+        # Left behind, it would be pruned by test_partitions
+        with rows_app.app_context():
+            db.session.execute(text(
+                f'DROP TABLE IF EXISTS '
+                f'{partition_name(partition_start(T0))}'
+            ))
+            db.session.commit()
+
+        ingest_snapshots(self.app)
+
+        self.assertEqual(self.get_all(self.client), expected)
+        self.assertEqual(self.get_stats(), expected_stats)
+        self.assertEqual(len(expected[0]['auctions']), 10)
+
+    def test_stores_listings_once(self):
+
+        ingest_snapshots(self.app)
+
+        with self.app.app_context():
+            listings = {listing.id: listing for listing in
+                        AuctionListing.query.filter(AuctionListing.id < 5)}
+            changes = [(change.id, change.timestamp, change.until)
+                       for change in AuctionChange.query
+                       .filter(AuctionChange.id < 5)
+                       .order_by(AuctionChange.id, AuctionChange.timestamp)]
+
+        self.assertEqual((listings[1].first_seen, listings[1].last_seen),
+                         (T0, None))
+        self.assertEqual(listings[3].last_seen, None)
+        # Seen again after a gap, so a new row starts where it came back
+        self.assertEqual(changes, [
+            (1, T0, None),
+            (2, T0, T1), (2, T1, None),
+            (3, T0, T1), (3, T2, None),
+            (4, T1, T2), (4, T2, None),
+        ])
+
+    def test_gone_listings_are_closed(self):
+
+        with self.app.app_context():
+            for timestamp in (T0, T1):
+                ingest_snapshot(io.StringIO(json.dumps(
+                    {'auctions': SNAPSHOTS[timestamp]}
+                )), timestamp)
+
+            change = AuctionChange.query.filter(AuctionChange.id == 3).one()
+
+        # Closed at the first snapshot it is missing from, rather than when
+        # it is listed again
+        self.assertEqual((change.timestamp, change.until), (T0, T1))
+
+    def test_snapshots_are_appended(self):
+
+        ingest_snapshots(self.app)
+
+        with self.app.app_context(), self.assertRaises(ValueError):
+            ingest_snapshot(io.StringIO('{"auctions": []}'), T1)
+
+    def test_writes_are_rejected(self):
+
+        res = self.client().delete('/auction/1', headers=self.headers)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 409)
+        self.assertFalse(data['success'])
+
+    def test_prune_deltas(self):
+
+        ingest_snapshots(self.app)
+
+        with self.app.app_context():
+            dropped = prune_deltas(timedelta(minutes=30), now=T2)
+            changes = AuctionChange.query.filter(AuctionChange.id < 5).count()
+
+        res = self.client().get('/auctions', headers=self.headers)
+        data = json.loads(res.data)
+
+        self.assertEqual(dropped, 2)
+        # Rows that stopped holding before the cutoff are gone
+        self.assertEqual(changes, 5)
+        self.assertEqual({auction['timestamp'] for auction in
+                          data['auctions']}, {T2.isoformat()})
+        self.assertEqual(len(self.get_stats()), 6)
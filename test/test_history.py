@@ -0,0 +1,92 @@
+import unittest
+from datetime import datetime
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Auction, ItemPriceStats
+from backend.services.ingest import load_auctions
+from .test_routes import cleanup_db, populate_db
+
+TIMESTAMP = datetime.fromisoformat('2021-07-18 22:11:33.433027')
+
+
+def get_stats(item_id: int, timestamp: datetime = TIMESTAMP):
+    return ItemPriceStats.query.filter(
+        ItemPriceStats.item_id == item_id,
+        ItemPriceStats.timestamp == timestamp
+    ).one_or_none()
+
+
+class PriceStatsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.runner = self.app.test_cli_runner()
+        self.items, self.auctions = populate_db()
+
+    def tearDown(self):
+        cleanup_db(self)
+
+    def test_stats_maintained_on_insert(self):
+
+        with self.app.app_context():
+            stats = get_stats(186364)
+
+            self.assertEqual(stats.auctions, 4)
+            self.assertEqual(stats.quantity, 4)
+            self.assertEqual(stats.min_price, 19894)
+
+    def test_stats_maintained_on_update(self):
+
+        with self.app.app_context():
+            auction = Auction.query.filter(Auction.id == 1999415).one()
+            auction.buyout = 100
+            auction.update()
+
+            self.assertEqual(get_stats(186364).min_price, 100)
+
+    def test_stats_maintained_on_move_and_delete(self):
+
+        with self.app.app_context():
+            auction = Auction.query.filter(Auction.id == 1999415).one()
+            auction.item_id = 186362
+            auction.update()
+
+            self.assertEqual(get_stats(186364).auctions, 3)
+            self.assertEqual(get_stats(186362).auctions, 4)
+
+            auction.delete()
+
+            self.assertEqual(get_stats(186362).auctions, 3)
+
+    def test_stats_maintained_on_bulk_load(self):
+
+        with self.app.app_context():
+            result = load_auctions([{
+                'id': 1999415,
+                'timestamp': '2021-07-18T22:11:33.433027',
+                'buyout': 100,
+                'quantity': 2,
+                'time_left': 'SHORT',
+                'item_id': 186362
+            }])
+
+            self.assertEqual(result.updated, 1)
+            self.assertEqual(get_stats(186364).auctions, 3)
+            self.assertEqual(get_stats(186362).auctions, 4)
+            self.assertEqual(get_stats(186362).min_price, 50)
+
+    def test_rebuild_stats_command(self):
+
+        with self.app.app_context():
+            ItemPriceStats.query.filter(
+                ItemPriceStats.item_id.in_(self.items)
+            ).delete()
+            db.session.commit()
+
+        result = self.runner.invoke(args=['ingest', 'rebuild-stats'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+
+        with self.app.app_context():
+            self.assertEqual(get_stats(186364).auctions, 4)
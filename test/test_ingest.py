@@ -0,0 +1,92 @@
+import io
+import unittest
+
+from backend import create_app, APP_ROOT
+from backend.database import db
+from backend.database.models import Auction, Item
+from backend.services.ingest import iter_snapshot_auctions
+from .test_routes import cleanup_db, populate_db
+
+SNAPSHOT = f'{APP_ROOT}/test/data/snapshot.json'
+SNAPSHOT_AUCTIONS = list(range(1999915, 1999921))
+SNAPSHOT_ITEMS = [999999001, 999999002]
+
+
+class SnapshotParserTestCase(unittest.TestCase):
+
+    def test_iter_snapshot_auctions(self):
+
+        with open(SNAPSHOT) as f:
+            auctions = list(iter_snapshot_auctions(f))
+
+        self.assertEqual([auction['id'] for auction in auctions],
+                         SNAPSHOT_AUCTIONS)
+
+    def test_iter_snapshot_auctions_small_chunks(self):
+
+        with open(SNAPSHOT) as f:
+            expected = list(iter_snapshot_auctions(f))
+
+        with open(SNAPSHOT) as f:
+            auctions = list(iter_snapshot_auctions(f, chunk_size=7))
+
+        self.assertEqual(auctions, expected)
+
+    def test_iter_snapshot_auctions_empty(self):
+
+        for document in ('{}', '{"auctions": []}', '{"a": 1, "auctions": []}'):
+            self.assertEqual(
+                list(iter_snapshot_auctions(io.StringIO(document))), []
+            )
+
+    def test_iter_snapshot_auctions_invalid(self):
+
+        with self.assertRaises(ValueError):
+            list(iter_snapshot_auctions(io.StringIO('[1, 2]')))
+
+
+class SnapshotIngestTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.runner = self.app.test_cli_runner()
+        self.items, self.auctions = populate_db()
+
+    def tearDown(self):
+        with self.app.app_context():
+            Auction.query.filter(Auction.id.in_(SNAPSHOT_AUCTIONS)).delete()
+            Item.query.filter(Item.id.in_(SNAPSHOT_ITEMS)).delete()
+            db.session.commit()
+
+        cleanup_db(self)
+
+    def test_ingest_snapshot_command(self):
+
+        result = self.runner.invoke(args=[
+            'ingest', 'snapshot', SNAPSHOT,
+            '--timestamp', '2021-07-19 22:00:00'
+        ])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('4 inserted, 0 updated, 2 rejected', result.output)
+
+        with self.app.app_context():
+            auction = Auction.query.filter(Auction.id == 1999917).one()
+
+            self.assertEqual(auction.item.name, 'Unknown item 999999001')
+            self.assertEqual(auction.timestamp.isoformat(),
+                             '2021-07-19T22:00:00')
+            self.assertEqual(
+                Auction.query.filter(Auction.id.in_(SNAPSHOT_AUCTIONS))
+                .count(), 4
+            )
+
+    def test_ingest_snapshot_command_twice_updates(self):
+
+        args = ['ingest', 'snapshot', SNAPSHOT,
+                '--timestamp', '2021-07-19 22:00:00']
+        self.runner.invoke(args=args)
+        result = self.runner.invoke(args=args)
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('0 inserted, 4 updated', result.output)
@@ -0,0 +1,77 @@
+import re
+import unittest
+
+from backend import create_app
+from backend.database import db
+from backend.database.instrumentation import _shape
+from backend.database.models import Item
+from .test_routes import cleanup_db, populate_db
+from .utils.auth import get_token
+
+
+class ShapeTestCase(unittest.TestCase):
+
+    def test_shape_hides_values(self):
+
+        self.assertEqual(
+            _shape({'id': 42, 'name': 'secret', 'ids': list(range(100))}),
+            {'id': 'int', 'name': 'str', 'ids': 'list[100]'}
+        )
+        self.assertEqual(_shape((1, 'a')), ('int', 'str'))
+
+
+class InstrumentationTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.client = self.app.test_client
+
+        with self.app.app_context():
+            self.headers = {'Authorization': get_token('premium')}
+
+        self.items, self.auctions = populate_db()
+
+    def tearDown(self):
+        cleanup_db(self)
+
+    def server_timing(self, res) -> dict:
+        metrics = {}
+
+        for metric in res.headers['Server-Timing'].split(', '):
+            name, *params = metric.split(';')
+            metrics[name] = dict(param.split('=', 1) for param in params)
+
+        return metrics
+
+    def test_server_timing(self):
+
+        res = self.client().get('/items', headers=self.headers)
+        metrics = self.server_timing(res)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(metrics['db']['desc'], '"1 statement"')
+        self.assertGreater(float(metrics['db']['dur']), 0)
+        self.assertGreaterEqual(float(metrics['app']['dur']),
+                                float(metrics['db']['dur']))
+
+    def test_cache_hit_runs_no_statement(self):
+
+        self.client().get('/items', headers=self.headers)
+        res = self.client().get('/items', headers=self.headers)
+
+        self.assertEqual(res.headers['X-Cache'], 'HIT')
+        self.assertEqual(self.server_timing(res)['db']['desc'],
+                         '"0 statements"')
+
+    def test_slow_query_logged_without_values(self):
+
+        self.app.config['SQL_SLOW_QUERY_MS'] = 0
+
+        with self.app.app_context(), \
+             self.assertLogs('backend.database.instrumentation',
+                             'WARNING') as logs:
+            Item.query.filter(Item.name == 'Secret name').all()
+
+        self.assertTrue(any(re.search(r"'name_1': 'str'", line)
+                            for line in logs.output))
+        self.assertFalse(any('Secret name' in line for line in logs.output))
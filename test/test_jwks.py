@@ -0,0 +1,115 @@
+import json
+import os
+import tempfile
+import threading
+import time
+import unittest
+
+from backend.services.auth import JWKSKeyStore
+
+
+def make_jwks(*kids):
+    return {
+        'keys': [
+            {'kty': 'RSA', 'kid': kid, 'use': 'sig', 'n': 'n', 'e': 'AQAB'}
+            for kid in kids
+        ]
+    }
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class JWKSKeyStoreTestCase(unittest.TestCase):
+
+    def setUp(self):
+        fd, self.path = tempfile.mkstemp(suffix='.json')
+        with os.fdopen(fd, 'w') as f:
+            json.dump(make_jwks('key-1'), f)
+
+        self.clock = FakeClock()
+        self.store = JWKSKeyStore(f'file://{self.path}', ttl=60,
+                                  min_refresh_interval=10, clock=self.clock)
+
+    def tearDown(self):
+        os.remove(self.path)
+
+    def test_get_key_from_local_file(self):
+
+        key = self.store.get_key('key-1')
+
+        self.assertEqual(key['kid'], 'key-1')
+        self.assertEqual(self.store.stats['misses'], 1)
+        self.assertEqual(self.store.stats['refreshes'], 1)
+
+    def test_cache_hit_does_not_refetch(self):
+
+        self.store.get_key('key-1')
+        self.store.get_key('key-1')
+        self.store.get_key('key-1')
+
+        self.assertEqual(self.store.stats['hits'], 2)
+        self.assertEqual(self.store.stats['refreshes'], 1)
+
+    def test_refresh_after_ttl(self):
+
+        self.store.get_key('key-1')
+        self.clock.now = 61
+        self.store.get_key('key-1')
+
+        self.assertEqual(self.store.stats['refreshes'], 2)
+
+    def test_unknown_kid_refreshes_once(self):
+
+        self.store.get_key('key-1')
+
+        with open(self.path, 'w') as f:
+            json.dump(make_jwks('key-1', 'key-2'), f)
+
+        self.clock.now = 11
+        self.assertIsNotNone(self.store.get_key('key-2'))
+        self.assertIsNone(self.store.get_key('key-3'))
+        self.assertIsNone(self.store.get_key('key-3'))
+        self.assertEqual(self.store.stats['refreshes'], 2)
+
+    def test_serves_stale_keys_when_refresh_fails(self):
+
+        self.store.get_key('key-1')
+        os.remove(self.path)
+        self.clock.now = 61
+
+        key = self.store.get_key('key-1')
+
+        # Recreated so tearDown can remove it
+        open(self.path, 'w').close()
+
+        self.assertEqual(key['kid'], 'key-1')
+        self.assertEqual(self.store.stats['refresh_failures'], 1)
+
+    def test_concurrent_misses_share_one_fetch(self):
+        calls = []
+
+        def fetch(url, timeout):
+            calls.append(url)
+            time.sleep(0.05)
+            return make_jwks('key-1')
+
+        store = JWKSKeyStore('stub://jwks', fetch=fetch)
+        threads = [
+            threading.Thread(target=store.get_key, args=('key-1',))
+            for _ in range(8)
+        ]
+
+        for thread in threads:
+            thread.start()
+
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(store.get_key('key-1')['kid'], 'key-1')
@@ -0,0 +1,121 @@
+import json
+import unittest
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Auction
+from backend.services.catalogue import item_catalogue
+from .test_routes import cleanup_db, populate_db
+from .utils.auth import get_token
+from .utils.queries import assert_max_queries
+
+MISSING_ID = 2_100_000_400
+
+
+class LookupTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.client = self.app.test_client
+
+        with self.app.app_context():
+            self.headers = {'Authorization': get_token('premium')}
+            self.engine = db.engine
+
+        self.items, self.auctions = populate_db()
+
+        with self.app.app_context():
+            # A later snapshot of the first auction
+            Auction(id=1999415, timestamp='2021-07-18 23:11:33', bid=1,
+                    buyout=2, unit_price=2, quantity=1, time_left='SHORT',
+                    item_id=186364).insert()
+            item_catalogue.load()
+
+    def tearDown(self):
+        with self.app.app_context():
+            cleanup_db(self)
+
+    def test_get_auctions_by_ids(self):
+
+        with assert_max_queries(self, 1, self.engine):
+            res = self.client().get(
+                f'/auctions?ids=1959977,{MISSING_ID},1999415,1959977',
+                headers=self.headers
+            )
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([auction['id'] for auction in data['auctions']],
+                         [1959977, 1999415])
+        self.assertEqual(data['auctions'][1]['time_left'], 'SHORT')
+        self.assertEqual(data['missing'], [MISSING_ID])
+
+    def test_lookup_auctions(self):
+
+        res = self.client().post('/auctions/lookup', headers=self.headers,
+                                 json={'ids': [1975985, MISSING_ID]})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([auction['id'] for auction in data['auctions']],
+                         [1975985])
+        self.assertEqual(data['missing'], [MISSING_ID])
+
+    def test_get_items_by_ids(self):
+
+        # Missing ids included, answered by the catalogue
+        with assert_max_queries(self, 0, self.engine):
+            res = self.client().get(f'/items?ids={MISSING_ID},186364',
+                                    headers=self.headers)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([item['id'] for item in data['items']], [186364])
+        self.assertEqual(data['missing'], [MISSING_ID])
+
+    def test_lookup_items(self):
+
+        res = self.client().post('/items/lookup', headers=self.headers,
+                                 json={'ids': [186358, 186364]})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual([item['id'] for item in data['items']],
+                         [186358, 186364])
+        self.assertEqual(data['missing'], [])
+
+    def test_400_malformed_ids(self):
+
+        for res in (
+            self.client().get('/auctions?ids=1,a', headers=self.headers),
+            self.client().get('/items?ids=', headers=self.headers),
+            self.client().post('/auctions/lookup', headers=self.headers,
+                               json={'ids': ['1']}),
+            self.client().post('/items/lookup', headers=self.headers,
+                               json=[1]),
+        ):
+            data = json.loads(res.data)
+
+            self.assertEqual(res.status_code, 400)
+            self.assertEqual(data['success'], False)
+
+    def test_400_too_many_ids(self):
+
+        self.app.config['API_MAX_LOOKUP_IDS'] = 2
+
+        res = self.client().post('/auctions/lookup', headers=self.headers,
+                                 json={'ids': [1, 2, 3]})
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertIn('At most 2 ids', data['message'])
+
+    def test_403_lookup_without_permission(self):
+
+        with self.app.app_context():
+            headers = {'Authorization': get_token('free')}
+
+        res = self.client().post('/items/lookup', headers=headers,
+                                 json={'ids': [186364]})
+
+        self.assertEqual(res.status_code, 403)
@@ -0,0 +1,199 @@
+import json
+import os
+import re
+import tempfile
+import unittest
+
+from backend import create_app
+from backend.services.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MultiProcessStore,
+    Registry
+)
+from .test_routes import cleanup_db, populate_db
+from .utils.auth import get_token
+
+
+def sample(text: str, name: str, **labels) -> float:
+    """Returns the value of a sample of the text format, 0 when absent."""
+    for line in text.splitlines():
+        match = re.fullmatch(r'(\w+)(?:\{(.*)\})? (\S+)', line)
+
+        if match and match[1] == name and \
+           dict(re.findall(r'(\w+)="([^"]*)"', match[2] or '')) == labels:
+            return float(match[3])
+
+    return 0
+
+
+class RegistryTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.registry = Registry()
+
+    def test_render_counter_and_gauge(self):
+
+        counter = self.registry.register(
+            Counter('jobs_total', 'Jobs.', ('kind',)))
+        gauge = self.registry.register(Gauge('queue', 'Queued jobs.'))
+
+        counter.inc(('a"b',))
+        counter.inc(('a"b',), 2)
+        gauge.inc()
+        gauge.inc()
+        gauge.dec()
+
+        text = self.registry.render()
+
+        self.assertIn('# TYPE jobs_total counter', text)
+        self.assertIn('jobs_total{kind="a\\"b"} 3', text)
+        self.assertIn('queue 1', text)
+
+    def test_render_histogram(self):
+
+        histogram = self.registry.register(
+            Histogram('latency', 'Latency.', ('route',), buckets=(0.1, 1)))
+
+        for value in (0.05, 0.1, 0.5, 2):
+            histogram.observe(value, ('/',))
+
+        text = self.registry.render()
+
+        self.assertEqual(sample(text, 'latency_bucket', route='/', le='0.1'),
+                         2)
+        self.assertEqual(sample(text, 'latency_bucket', route='/', le='1'), 3)
+        self.assertEqual(sample(text, 'latency_bucket', route='/',
+                                le='+Inf'), 4)
+        self.assertEqual(sample(text, 'latency_count', route='/'), 4)
+        self.assertAlmostEqual(sample(text, 'latency_sum', route='/'), 2.65)
+
+    def test_duplicate_metric(self):
+
+        self.registry.register(Counter('jobs_total', 'Jobs.'))
+
+        with self.assertRaises(ValueError):
+            self.registry.register(Counter('jobs_total', 'Jobs.'))
+
+    def test_merge_processes(self):
+
+        counter = self.registry.register(Counter('jobs_total', 'Jobs.'))
+        gauge = self.registry.register(Gauge('queue', 'Queued jobs.'))
+        histogram = self.registry.register(
+            Histogram('latency', 'Latency.', buckets=(1,)))
+
+        counter.inc()
+        gauge.inc()
+        histogram.observe(0.5)
+
+        with tempfile.TemporaryDirectory() as directory:
+            self.registry.enable_multiprocess(MultiProcessStore(directory))
+
+            # A live worker, the parent of the tests, and an exited one
+            other = {
+                'jobs_total': {'type': 'counter', 'values': [[[], 2]]},
+                'queue': {'type': 'gauge', 'values': [[[], 5]]},
+                'latency': {'type': 'histogram',
+                            'values': [[[], [[0, 1], 3.0]]]}
+            }
+
+            for pid in (os.getppid(), 2 ** 22 + 1):
+                with open(os.path.join(directory, f'{pid}.json'), 'w') as f:
+                    json.dump(other, f)
+
+            self.registry.flush()
+            self.assertTrue(os.path.exists(
+                os.path.join(directory, f'{os.getpid()}.json')))
+
+            text = self.registry.render()
+
+        self.assertEqual(sample(text, 'jobs_total'), 5)
+        self.assertEqual(sample(text, 'queue'), 6)
+        self.assertEqual(sample(text, 'latency_count'), 3)
+        self.assertEqual(sample(text, 'latency_bucket', le='1'), 1)
+        self.assertEqual(sample(text, 'latency_sum'), 6.5)
+
+
+class MetricsRoutesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.client = self.app.test_client
+
+        with self.app.app_context():
+            self.headers = {'Authorization': get_token('premium')}
+            self.metrics_headers = {'Authorization': get_token('admin')}
+
+        self.items, self.auctions = populate_db()
+
+    def tearDown(self):
+        cleanup_db(self)
+
+    def metrics(self) -> str:
+        res = self.client().get('/metrics', headers=self.metrics_headers)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertTrue(res.content_type.startswith('text/plain'))
+
+        return res.get_data(as_text=True)
+
+    def test_request_metrics(self):
+
+        labels = {'method': 'GET', 'route': '/item/<int:id>'}
+        before = self.metrics()
+
+        self.client().get(f'/item/{self.items[0]}', headers=self.headers)
+        self.client().get('/item/0', headers=self.headers)
+        self.client().get('/item/0')
+
+        after = self.metrics()
+
+        for status, count in (('200', 1), ('404', 1), ('401', 1)):
+            name = 'http_request_duration_seconds_count'
+            self.assertEqual(
+                sample(after, name, status=status, **labels)
+                - sample(before, name, status=status, **labels), count)
+
+        self.assertEqual(sample(after, 'http_requests_in_flight'), 1)
+        self.assertGreater(
+            sample(after, 'auth_verification_seconds_count',
+                   result='cached'),
+            sample(before, 'auth_verification_seconds_count',
+                   result='cached'))
+        self.assertGreater(
+            sample(after, 'db_pool_checkout_wait_seconds_count'), 0)
+        self.assertGreater(sample(after, 'db_pool_connections',
+                                  state='idle'), 0)
+        self.assertIn('# TYPE jwks_fetches_total counter', after)
+        self.assertIn('response_cache_lookups_total{result="misses"}', after)
+
+    def test_401_metrics(self):
+
+        res = self.client().get('/metrics')
+
+        self.assertEqual(res.status_code, 401)
+
+    def test_403_metrics(self):
+
+        res = self.client().get('/metrics', headers=self.headers)
+
+        self.assertEqual(res.status_code, 403)
+
+    def test_unmatched_route(self):
+
+        self.client().get('/nowhere')
+
+        self.assertGreater(sample(self.metrics(),
+                                  'http_request_duration_seconds_count',
+                                  method='GET', route='<unmatched>',
+                                  status='404'), 0)
+
+    def test_cache_counters_follow_latest_app(self):
+
+        self.client().get('/items', headers=self.headers)
+        self.client().get('/items', headers=self.headers)
+
+        self.assertEqual(sample(self.metrics(),
+                                'response_cache_lookups_total',
+                                result='hits'), 1)
@@ -0,0 +1,141 @@
+import unittest
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Auction, ItemPriceStats
+from backend.database.partitions import (
+    ensure_partitions,
+    list_partitions,
+    partition_start,
+    prune_partitions
+)
+from .test_routes import cleanup_db, populate_db
+from .utils.auth import get_token
+from .utils.queries import count_queries
+
+OLD_TIMESTAMP = datetime(2020, 1, 8, 12)
+
+
+class PartitionTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.runner = self.app.test_cli_runner()
+        self.items, self.auctions = populate_db()
+
+    def tearDown(self):
+        cleanup_db(self)
+
+    def test_partition_start(self):
+
+        self.assertEqual(partition_start(datetime(2021, 7, 18, 22, 11)),
+                         datetime(2021, 7, 12))
+        self.assertEqual(partition_start(datetime(2021, 7, 19)),
+                         datetime(2021, 7, 19))
+
+    def test_partitions_created_on_insert(self):
+
+        with self.app.app_context():
+            self.assertIn(('auctions_p20210712', datetime(2021, 7, 12)),
+                          list_partitions())
+
+    def test_partitioned_checked_once(self):
+
+        with self.app.app_context():
+            ensure_partitions([datetime(2021, 7, 18)])
+            engine = db.session.connection().engine
+
+            with count_queries(engine) as statements:
+                ensure_partitions([datetime(2021, 7, 18)])
+
+            db.session.rollback()
+
+        self.assertEqual(len(statements), 1)
+        self.assertIn('to_regclass', statements[0])
+
+    def test_offset_timestamp_stored_in_its_partition(self):
+
+        # Monday 01:00 at +02:00 is still Sunday in UTC, so the row belongs
+        # to the partition of the week before
+        with self.app.app_context():
+            headers = {'Authorization': get_token('admin')}
+
+        res = self.app.test_client().post(
+            '/auctions',
+            json=dict(id=1999416, timestamp='2030-03-04T01:00:00+02:00',
+                      bid=0, buyout=100, unit_price=0, quantity=1,
+                      time_left='SHORT', item_id=186364),
+            headers=headers
+        )
+
+        with self.app.app_context():
+            auction = Auction.query.filter(Auction.id == 1999416).one()
+            timestamp = auction.timestamp
+            auction.delete()
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(timestamp, datetime(2030, 3, 3, 23))
+
+    def test_400_unparsed_timestamp(self):
+
+        with self.app.app_context():
+            headers = {'Authorization': get_token('admin')}
+
+        res = self.app.test_client().post(
+            '/auctions',
+            json=dict(id=1999417, timestamp='July 19 2021 22:11', bid=0,
+                      buyout=100, unit_price=0, quantity=1,
+                      time_left='SHORT', item_id=186364),
+            headers=headers
+        )
+
+        self.assertEqual(res.status_code, 400)
+
+    def test_time_filter_prunes_partitions(self):
+
+        with self.app.app_context():
+            ensure_partitions([datetime(2021, 7, 19), datetime(2021, 7, 26)])
+            plan = '\n'.join(db.session.execute(text(
+                "EXPLAIN SELECT * FROM auctions "
+                "WHERE timestamp >= '2021-07-19' AND timestamp < '2021-07-20'"
+            )).scalars())
+            db.session.rollback()
+
+        self.assertIn('auctions_p20210719', plan)
+        self.assertNotIn('auctions_p20210712', plan)
+        self.assertNotIn('auctions_p20210726', plan)
+
+    def test_prune_partitions(self):
+
+        with self.app.app_context():
+            Auction(id=1999415, timestamp=OLD_TIMESTAMP, buyout=100,
+                    quantity=1, time_left='LONG', item_id=186364).insert()
+            ItemPriceStats.query.filter(
+                ItemPriceStats.timestamp == OLD_TIMESTAMP
+            ).delete()
+            db.session.commit()
+
+            dropped = prune_partitions(timedelta(days=30),
+                                       now=datetime(2020, 3, 1))
+
+            self.assertEqual(dropped, ['auctions_p20200106'])
+            self.assertEqual(
+                Auction.query.filter(Auction.timestamp == OLD_TIMESTAMP)
+                .count(), 0
+            )
+            self.assertEqual(
+                ItemPriceStats.query.filter(
+                    ItemPriceStats.timestamp == OLD_TIMESTAMP
+                ).one().min_price, 100
+            )
+
+    def test_prune_command_keeps_recent_partitions(self):
+
+        result = self.runner.invoke(args=['ingest', 'prune',
+                                          '--max-age', '36500'])
+
+        self.assertEqual(result.exit_code, 0, result.output)
+        self.assertIn('Dropped 0 partitions', result.output)
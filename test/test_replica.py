@@ -0,0 +1,237 @@
+import os
+import unittest
+from unittest import mock
+
+from sqlalchemy import event
+
+from backend import create_app
+from backend.database import db
+from backend.database.replica import REPLICA_BIND, ReplicaRouter
+from backend.database.versions import table_versions
+from backend.services.cache import MemoryBackend
+from backend.services.search import has_trigram_index
+from .test_routes import cleanup_db, populate_db
+from .utils.auth import get_token
+
+
+def create_replica_app(replica_url: str):
+    with mock.patch.dict(os.environ,
+                         {'FLASK_REPLICA_DATABASE_URL': replica_url}):
+        return create_app('config/testing.py')
+
+
+def forget_changes(test) -> dict:
+    """Forgets the changes seen so far for the duration of a test, so
+    cached routes do not read from the primary because of them.
+
+    Returns:
+        dict: When each table changed since, clearing it lets the window
+        after a change pass.
+    """
+    changed_at = {}
+    patcher = mock.patch.object(table_versions, '_changed_at', changed_at)
+    patcher.start()
+    test.addCleanup(patcher.stop)
+
+    return changed_at
+
+
+class StatementCounter:
+    """Counts the statements an engine runs."""
+
+    def __init__(self, engine):
+        self.count = 0
+        event.listen(engine, 'before_cursor_execute', self.record)
+
+    def record(self, *args):
+        self.count += 1
+
+    def __call__(self) -> int:
+        count, self.count = self.count, 0
+        return count
+
+
+class ReplicaRoutingTestCase(unittest.TestCase):
+    """The replica is a second engine on the test database."""
+
+    def setUp(self):
+        self.app = create_replica_app(os.environ['FLASK_DATABASE_URL'])
+        self.client = self.app.test_client
+        self.primary = StatementCounter(db.get_engine(self.app))
+        self.replica = StatementCounter(
+            db.get_engine(self.app, REPLICA_BIND))
+
+        with self.app.app_context():
+            self.headers = {'Authorization': get_token('admin')}
+            self.other_headers = {'Authorization': get_token('premium')}
+
+        self.items, self.auctions = populate_db()
+        self.primary()
+        self.changed_at = forget_changes(self)
+
+    def tearDown(self):
+        cleanup_db(self)
+
+    def test_reads_go_to_replica(self):
+
+        res = self.client().get('/items', headers=self.headers)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(self.replica(), 0)
+        self.assertEqual(self.primary(), 0)
+
+    def test_writes_go_to_primary(self):
+
+        res = self.client().post('/items', json=dict(id=4119196, name='x'),
+                                 headers=self.headers)
+        self.items.append(4119196)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(self.primary(), 0)
+        self.assertEqual(self.replica(), 0)
+
+    def test_reads_stick_to_primary_after_write(self):
+
+        self.client().post('/items', json=dict(id=4119196, name='x'),
+                           headers=self.headers)
+        self.items.append(4119196)
+        self.primary()
+
+        # Served by a query, unlike /item/<id> and the item catalogue
+        res = self.client().get('/items?fields=id', headers=self.headers)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(self.primary(), 0)
+        self.assertEqual(self.replica(), 0)
+
+        # Other clients read from the replica once the change is old enough
+        self.changed_at.clear()
+        self.client().get('/items', headers=self.other_headers)
+
+        self.assertEqual(self.primary(), 0)
+        self.assertGreater(self.replica(), 0)
+
+    def test_reads_stick_without_subject(self):
+
+        with self.app.app_context():
+            headers = {'Authorization': get_token('admin', subject=False)}
+
+        self.client().post('/items', json=dict(id=4119196, name='x'),
+                           headers=headers)
+        self.items.append(4119196)
+        self.primary()
+        self.changed_at.clear()
+
+        res = self.client().get('/items?fields=id', headers=headers)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(self.primary(), 0)
+        self.assertEqual(self.replica(), 0)
+
+        # Other clients still read from the replica
+        self.client().get('/items', headers=self.other_headers)
+
+        self.assertEqual(self.primary(), 0)
+        self.assertGreater(self.replica(), 0)
+
+    def test_recent_changes_read_from_primary(self):
+
+        self.client().post('/items', json=dict(id=4119196, name='x'),
+                           headers=self.headers)
+        self.items.append(4119196)
+        self.primary()
+
+        # Cached for every client, so not read from a lagging replica
+        res = self.client().get('/items', headers=self.other_headers)
+
+        self.assertIn(4119196, [item['id'] for item in res.json['items']])
+        self.assertGreater(self.primary(), 0)
+        self.assertEqual(self.replica(), 0)
+
+    def test_search_index_built_from_primary(self):
+
+        with self.app.app_context():
+            if has_trigram_index():
+                self.skipTest('Searches go through pg_trgm')
+
+        self.primary()
+        self.replica()
+        res = self.client().get('/items/search?q=cord',
+                                headers=self.other_headers)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertGreater(self.replica(), 0)
+        # Rebuilt since populate_db changed the items
+        self.assertGreater(self.primary(), 0)
+
+    def test_failed_write_does_not_stick(self):
+
+        self.client().post('/items', json=dict(name='x'),
+                           headers=self.headers)
+        self.primary()
+        self.client().get('/items', headers=self.headers)
+
+        self.assertEqual(self.primary(), 0)
+
+
+class UnhealthyReplicaTestCase(unittest.TestCase):
+
+    def setUp(self):
+        # Nothing listens on port 1
+        self.app = create_replica_app(
+            'postgresql://postgres@localhost:1/wow')
+        self.client = self.app.test_client
+
+        with self.app.app_context():
+            self.headers = {'Authorization': get_token('premium')}
+
+        self.items, self.auctions = populate_db()
+        forget_changes(self)
+
+    def tearDown(self):
+        cleanup_db(self)
+
+    def test_falls_back_to_primary(self):
+
+        router = self.app.extensions['replica']
+
+        for _ in range(2):
+            res = self.client().get('/items', headers=self.headers)
+            self.assertEqual(res.status_code, 200)
+
+        # Probed once, then left alone until the retry interval elapsed
+        self.assertEqual(router.stats['probes'], 1)
+        self.assertFalse(router.is_available())
+
+
+class ReplicaRouterTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.now = 0.0
+        self.app = create_app('config/testing.py')
+        self.router = ReplicaRouter(db.get_engine(self.app),
+                                    sticky_seconds=5, retry_interval=30,
+                                    clock=lambda: self.now)
+
+    def test_probe_after_retry_interval(self):
+
+        self.assertTrue(self.router.is_available())
+
+        self.router.mark_down()
+        self.now = 29
+        self.assertFalse(self.router.is_available())
+
+        self.now = 30
+        self.assertTrue(self.router.is_available())
+        self.assertEqual(self.router.stats['probes'], 2)
+
+    def test_sticky_needs_backend(self):
+
+        self.router.stick('auth0|admin')
+        self.assertFalse(self.router.is_sticky('auth0|admin'))
+
+        self.router.configure(MemoryBackend())
+        self.router.stick('auth0|admin')
+
+        self.assertTrue(self.router.is_sticky('auth0|admin'))
+        self.assertFalse(self.router.is_sticky('auth0|premium'))
@@ -0,0 +1,57 @@
+import unittest
+
+from backend.services.cache import ResponseCache
+from backend.services.cache.response_cache import CachedResponse
+
+
+def make_response(etag: str, size: int) -> CachedResponse:
+    return CachedResponse(etag, b'x' * size, 200, 'application/json')
+
+
+class ResponseCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.cache = ResponseCache(max_bytes=150)
+
+    def test_get_put(self):
+
+        self.assertIsNone(self.cache.get('/items', 'a'))
+        self.cache.put('/items', make_response('a', 10))
+
+        self.assertEqual(self.cache.get('/items', 'a').body, b'x' * 10)
+        self.assertEqual(self.cache.stats['hits'], 1)
+        self.assertEqual(self.cache.stats['misses'], 1)
+        self.assertEqual(self.cache.stats['hit_ratio'], 0.5)
+
+    def test_stale_etag_misses(self):
+
+        self.cache.put('/items', make_response('a', 10))
+
+        self.assertIsNone(self.cache.get('/items', 'b'))
+
+    def test_evicts_least_recently_used_by_size(self):
+
+        self.cache.put('/item/1', make_response('a', 40))
+        self.cache.put('/item/2', make_response('a', 40))
+        self.cache.get('/item/1', 'a')
+        self.cache.put('/item/3', make_response('a', 40))
+
+        self.assertIsNotNone(self.cache.get('/item/1', 'a'))
+        self.assertIsNone(self.cache.get('/item/2', 'a'))
+        self.assertEqual(self.cache.stats['bytes'],
+                         2 * len(make_response('a', 40).pack()))
+        self.assertEqual(self.cache.stats['evictions'], 1)
+
+    def test_oversized_body_not_cached(self):
+
+        self.cache.put('/items', make_response('a', 151))
+
+        self.assertEqual(self.cache.stats['entries'], 0)
+
+    def test_not_modified_counts_bytes_saved(self):
+
+        self.cache.put('/items', make_response('a', 10))
+        self.cache.not_modified('/items')
+
+        self.assertEqual(self.cache.stats['not_modified'], 1)
+        self.assertEqual(self.cache.stats['bytes_saved'], 10)
@@ -1,10 +1,15 @@
 import json
 import unittest
+from datetime import datetime
 from random import choice
 
+from sqlalchemy import event
+
+from backend.database import db
 from backend.database.models import Auction, Item
 from backend import create_app, APP_ROOT
 from .utils.auth import get_token
+from .utils.queries import assert_max_queries
 
 
 def populate_db():
@@ -373,6 +378,81 @@ class PremiumUserTestCase(unittest.TestCase):
         self.assertEqual(data['success'], True)
         self.assertIsNotNone(data.get('items', None))
 
+    def test_get_items_include_auctions(self):
+
+        with self.app.app_context():
+            engine = db.engine
+
+        # The items and the ids of their auctions, however many items
+        with assert_max_queries(self, 2, engine):
+            res = self.client().get('/items?include=auctions',
+                                    headers=self.headers)
+        data = json.loads(res.data)
+        items = {item['id']: item for item in data['items']}
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(items[186364]['auctions'],
+                         [1924519, 1929462, 1959977, 1999415])
+
+    def test_get_items_include_latest_auctions(self):
+
+        # Listed in an earlier snapshot only
+        Auction(id=1999418, timestamp='2021-07-18 21:11:33', buyout=100,
+                quantity=1, time_left='LONG', item_id=186364).insert()
+        self.auctions.append(1999418)
+
+        res = self.client().get('/items?include=auctions',
+                                headers=self.headers)
+        data = json.loads(res.data)
+        items = {item['id']: item for item in data['items']}
+
+        self.assertEqual(res.status_code, 200)
+        self.assertNotIn(1999418, items[186364]['auctions'])
+
+    def test_get_items_pages(self):
+
+        ids = []
+        after = ''
+
+        while True:
+            res = self.client().get(f'/items?limit=3&fields=id{after}',
+                                    headers=self.headers)
+            data = json.loads(res.data)
+
+            self.assertEqual(res.status_code, 200)
+            self.assertLessEqual(len(data['items']), 3)
+            ids += [item['id'] for item in data['items']]
+
+            if not data['next']:
+                break
+
+            after = f"&after={data['next']}"
+
+        self.assertEqual(ids, sorted(set(ids)))
+        self.assertLessEqual(set(self.items), set(ids))
+
+    def test_400_get_items_invalid_cursor(self):
+
+        res = self.client().get('/items?after=WyJhIl0',
+                                headers=self.headers)
+
+        self.assertEqual(res.status_code, 400)
+
+    def test_400_get_items_unknown_include(self):
+
+        res = self.client().get('/items?include=history',
+                                headers=self.headers)
+
+        self.assertEqual(res.status_code, 400)
+
+    def test_item_repr_does_not_query(self):
+
+        with self.app.app_context():
+            item = Item.query.get(186364)
+
+            with assert_max_queries(self, 0):
+                self.assertIn('186364', repr(item))
+
     def test_404_get_items(self):
 
         cleanup_db(self)
@@ -394,6 +474,68 @@ class PremiumUserTestCase(unittest.TestCase):
         self.assertEqual(data['success'], True)
         self.assertIsNotNone(data.get('item', None))
 
+    def test_get_item_history(self):
+
+        res = self.client().get('/item/186364/history', headers=self.headers)
+        data = json.loads(res.data)
+        prices = sorted([289119, 331124, 1966894, 19894])
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['success'], True)
+        self.assertEqual(len(data['history']), 1)
+        self.assertEqual(data['history'][0]['auctions'], 4)
+        self.assertEqual(data['history'][0]['quantity'], 4)
+        self.assertEqual(data['history'][0]['min'], prices[0])
+        self.assertEqual(data['history'][0]['median'],
+                         (prices[1] + prices[2]) / 2)
+        self.assertEqual(data['history'][0]['mean'], sum(prices) / 4)
+
+    def test_get_item_history_bucketed(self):
+
+        res = self.client().get(
+            '/item/186364/history?bucket=1d&from=2021-07-18&to=2021-07-19',
+            headers=self.headers
+        )
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(data['history']), 1)
+        self.assertEqual(data['history'][0]['snapshots'], 1)
+        self.assertEqual(data['history'][0]['timestamp'],
+                         '2021-07-18T00:00:00')
+        # Averages of the snapshot percentiles, named as such
+        self.assertEqual(data['history'][0]['median_avg'],
+                         (331124 + 289119) / 2)
+        self.assertNotIn('median', data['history'][0])
+        self.assertNotIn('p25', data['history'][0])
+
+    def test_get_item_history_out_of_range(self):
+
+        res = self.client().get('/item/186364/history?from=2021-07-19',
+                                headers=self.headers)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['history'], [])
+
+    def test_400_get_item_history_invalid_bucket(self):
+
+        res = self.client().get('/item/186364/history?bucket=1y',
+                                headers=self.headers)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(data['success'], False)
+
+    def test_404_get_item_history(self):
+
+        res = self.client().get('/item/00114894/history',
+                                headers=self.headers)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 404)
+        self.assertEqual(data['success'], False)
+
     def test_404_get_item(self):
 
         res = self.client().get('/item/00114894', headers=self.headers)
@@ -454,6 +596,8 @@ class PremiumUserTestCase(unittest.TestCase):
         self.assertEqual(res.status_code, 200)
         self.assertEqual(data['success'], True)
         self.assertIsNotNone(data.get('auctions', None))
+        # Timestamps are ISO-8601 whichever JSON provider is used
+        datetime.fromisoformat(data['auctions'][0]['timestamp'])
 
     def test_404_get_auctions(self):
 
@@ -467,6 +611,171 @@ class PremiumUserTestCase(unittest.TestCase):
 
         populate_db()
 
+    def test_get_auctions_paginated(self):
+
+        seen = []
+        cursor = None
+
+        while True:
+            query = '?limit=5' + (f'&after={cursor}' if cursor else '')
+            res = self.client().get(f'/auctions{query}', headers=self.headers)
+            data = json.loads(res.data)
+
+            self.assertEqual(res.status_code, 200)
+            self.assertLessEqual(len(data['auctions']), 5)
+
+            seen.extend(auction['id'] for auction in data['auctions'])
+            cursor = data['next']
+
+            if not cursor:
+                break
+
+        self.assertEqual(len(seen), len(set(seen)))
+        self.assertTrue(set(self.auctions).issubset(seen))
+
+    def test_get_auctions_fields(self):
+
+        res = self.client().get('/auctions?limit=2&fields=unit_price,quantity',
+                                headers=self.headers)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(set(data['auctions'][0]), {'unit_price', 'quantity'})
+
+        # The cursor does not depend on the fields being returned
+        res = self.client().get(
+            f"/auctions?limit=2&fields=id&after={data['next']}",
+            headers=self.headers
+        )
+
+        self.assertEqual(res.status_code, 200)
+
+    def test_get_auctions_fields_ndjson(self):
+
+        res = self.client().get('/auctions?format=ndjson&fields=id,buyout',
+                                headers=self.headers)
+        auctions = [json.loads(line) for line in res.data.splitlines()]
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(set(auctions[0]), {'id', 'buyout'})
+
+    def test_get_auctions_filtered(self):
+
+        res = self.client().get(
+            '/auctions?item_id=172097&item_id=173204'
+            '&min_price=3500&max_price=39321&from=2021-07-18',
+            headers=self.headers
+        )
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual({auction['id'] for auction in data['auctions']},
+                         {1993357, 1951355})
+
+    def test_get_auctions_filtered_by_time_left(self):
+
+        res = self.client().get(
+            '/auctions?item_id=186362&time_left=SHORT&time_left=MEDIUM',
+            headers=self.headers
+        )
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(data['auctions']), 3)
+
+    def test_get_auctions_sorted_paginated(self):
+
+        seen = []
+        cursor = None
+
+        while True:
+            query = '?item_id=186364&sort=-buyout&limit=3' + \
+                (f'&after={cursor}' if cursor else '')
+            res = self.client().get(f'/auctions{query}', headers=self.headers)
+            data = json.loads(res.data)
+
+            self.assertEqual(res.status_code, 200)
+
+            seen.extend(auction['id'] for auction in data['auctions'])
+            cursor = data['next']
+
+            if not cursor:
+                break
+
+        self.assertEqual(seen, [1929462, 1959977, 1999415, 1924519])
+
+    def test_400_get_auctions_unindexed_sort(self):
+
+        for sort in ('bid', 'buyout', '-quantity'):
+            res = self.client().get(f'/auctions?sort={sort}',
+                                    headers=self.headers)
+            data = json.loads(res.data)
+
+            self.assertEqual(res.status_code, 400)
+            self.assertEqual(data['success'], False)
+            self.assertIn('index', data['message'])
+
+    def test_400_get_auctions_invalid_filter(self):
+
+        for query in ('item_id=abc', 'time_left=SOON', 'min_price=cheap',
+                      'from=yesterday'):
+            res = self.client().get(f'/auctions?{query}',
+                                    headers=self.headers)
+
+            self.assertEqual(res.status_code, 400)
+
+    def test_400_get_auctions_unknown_field(self):
+
+        res = self.client().get('/auctions?fields=id,password',
+                                headers=self.headers)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(data['success'], False)
+
+    def test_400_get_auctions_invalid_cursor(self):
+
+        res = self.client().get('/auctions?after=garbage',
+                                headers=self.headers)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(data['success'], False)
+
+    def test_400_get_auctions_invalid_limit(self):
+
+        res = self.client().get('/auctions?limit=0', headers=self.headers)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(data['success'], False)
+
+    def test_get_auctions_ndjson(self):
+
+        res = self.client().get('/auctions?format=ndjson',
+                                headers=self.headers)
+        auctions = [json.loads(line) for line in res.data.splitlines()]
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.mimetype, 'application/x-ndjson')
+        self.assertTrue(set(self.auctions).issubset(
+            auction['id'] for auction in auctions
+        ))
+
+    def test_get_items_ndjson(self):
+
+        res = self.client().get(
+            '/items',
+            headers={**self.headers, 'Accept': 'application/x-ndjson'}
+        )
+        items = [json.loads(line) for line in res.data.splitlines()]
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.mimetype, 'application/x-ndjson')
+        self.assertTrue(set(self.items).issubset(
+            item['id'] for item in items
+        ))
+
     def test_get_auction(self):
 
         res = self.client().get('/auction/1999415', headers=self.headers)
@@ -587,6 +896,53 @@ class AdminUserTestCase(unittest.TestCase):
         self.assertEqual(data['success'], False)
         self.assertIsNone(data.get('item', None))
 
+    def test_get_items_not_modified(self):
+
+        res = self.client().get('/items', headers=self.headers)
+        etag = res.headers['ETag']
+
+        res = self.client().get(
+            '/items', headers={**self.headers, 'If-None-Match': etag}
+        )
+
+        self.assertEqual(res.status_code, 304)
+        self.assertEqual(res.data, b'')
+        self.assertEqual(
+            self.app.extensions['response_cache'].stats['not_modified'], 1
+        )
+
+    def test_get_items_served_from_cache(self):
+
+        first = self.client().get('/items', headers=self.headers)
+        second = self.client().get('/items', headers=self.headers)
+
+        self.assertEqual(first.headers['X-Cache'], 'MISS')
+        self.assertEqual(second.headers['X-Cache'], 'HIT')
+        self.assertEqual(first.data, second.data)
+
+    def test_get_items_cache_invalidated_by_create(self):
+
+        etag = self.client().get('/items', headers=self.headers) \
+            .headers['ETag']
+        created = self.client().post(
+            '/items',
+            json=dict(id=4119197, name='My Most Amazing item'),
+            headers=self.headers
+        )
+
+        self.assertEqual(created.status_code, 200)
+
+        res = self.client().get(
+            '/items', headers={**self.headers, 'If-None-Match': etag}
+        )
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers['X-Cache'], 'MISS')
+        self.assertIn(4119197, [item['id'] for item in data['items']])
+
+        self.client().delete('/item/4119197', headers=self.headers)
+
     def test_create_item(self):
 
         res = self.client().post(
@@ -753,6 +1109,76 @@ class AdminUserTestCase(unittest.TestCase):
         self.assertEqual(data['success'], False)
         self.assertIsNone(data.get('created', None))
 
+    def test_create_auctions_bulk(self):
+
+        auction = dict(
+            timestamp='2021-07-18 22:11:33.433027',
+            bid=0,
+            buyout=123144,
+            unit_price=0,
+            quantity=23,
+            time_left='short',
+            item_id=186358
+        )
+
+        res = self.client().post(
+            '/auctions/bulk',
+            json=[
+                dict(auction, id=123144511),
+                dict(auction, id=123144512),
+                dict(auction, id=self.auctions[0]),
+                dict(auction, id=123144513, time_left='FOREVER'),
+                dict(auction, id=123144514, item_id=1),
+                'not an auction'
+            ],
+            headers=self.headers
+        )
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['success'], True)
+        self.assertEqual(data['inserted'], 2)
+        self.assertEqual(data['updated'], 1)
+        self.assertEqual(data['rejected'], 3)
+        self.assertEqual([error['index'] for error in data['errors']],
+                         [3, 4, 5])
+
+    def test_create_auctions_bulk_ndjson(self):
+
+        lines = [
+            json.dumps(dict(
+                id=123144511 + i,
+                timestamp='2021-07-18T22:11:33Z',
+                quantity=1,
+                time_left='LONG',
+                item_id=186358
+            ))
+            for i in range(3)
+        ]
+
+        res = self.client().post(
+            '/auctions/bulk',
+            data='\n'.join(lines + ['{broken']),
+            headers={**self.headers, 'Content-Type': 'application/x-ndjson'}
+        )
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['inserted'], 3)
+        self.assertEqual(data['rejected'], 1)
+
+    def test_400_create_auctions_bulk(self):
+
+        res = self.client().post(
+            '/auctions/bulk',
+            json=dict(id=123144511),
+            headers=self.headers
+        )
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 400)
+        self.assertEqual(data['success'], False)
+
     def test_update_auction(self):
 
         auction_id = choice(self.auctions)
@@ -822,3 +1248,58 @@ class AdminUserTestCase(unittest.TestCase):
 
 if __name__ == '__main__':
     unittest.main()
+
+
+class OffsetTimestampTestCase(unittest.TestCase):
+    """Timestamps sent with an offset, read by a database whose session
+    time zone is not UTC."""
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.client = self.app.test_client
+
+        with self.app.app_context():
+            self.headers = {'Authorization': get_token('premium')}
+
+            @event.listens_for(db.engine, 'connect')
+            def set_time_zone(connection, record):
+                with connection.cursor() as cursor:
+                    cursor.execute("SET TIME ZONE 'Asia/Tokyo'")
+
+                # Or the rollback on checkin would undo it
+                connection.commit()
+
+            db.engine.dispose()
+
+        self.items, self.auctions = populate_db()
+
+    def tearDown(self):
+        cleanup_db(self)
+
+        with self.app.app_context():
+            db.engine.dispose()
+
+    def test_get_auctions_filtered(self):
+
+        # 22:00 to 23:00 in UTC, around the auctions of the item
+        res = self.client().get(
+            '/auctions?item_id=186364&from=2021-07-19T00:00:00%2B02:00'
+            '&to=2021-07-18T23:00:00Z',
+            headers=self.headers
+        )
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(data['auctions']), 4)
+
+    def test_get_item_history(self):
+
+        # 2021-07-18T22:00:00 in UTC, before the auctions
+        res = self.client().get(
+            '/item/186364/history?from=2021-07-19T00:00:00%2B02:00',
+            headers=self.headers
+        )
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(len(data['history']), 1)
@@ -0,0 +1,262 @@
+import json
+import unittest
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Item
+from backend.services.search import (
+    TrigramIndex,
+    find_items,
+    has_trigram_index,
+    trigrams
+)
+from backend.services.search.search import (
+    EXACT,
+    FUZZY,
+    PREFIX,
+    SUBSTRING,
+    _find_items_postgres
+)
+from .utils.auth import get_token
+from .utils.queries import count_queries
+
+ITEMS = [
+    (2_100_000_200, 'Zorblax'),
+    (2_100_000_201, 'Zorblax Shard'),
+    (2_100_000_202, 'Greater Zorblax Shard'),
+    (2_100_000_203, 'Zorblux Shard'),
+    (2_100_000_204, 'Unrelated Trinket'),
+]
+
+
+class TrigramIndexTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.index = TrigramIndex(ITEMS)
+
+    def test_trigrams(self):
+
+        self.assertEqual(trigrams('Soul-Dust'), {
+            '  s', ' so', 'sou', 'oul', 'ul ',
+            '  d', ' du', 'dus', 'ust', 'st ',
+        })
+
+    def test_ranks_exact_prefix_substring_then_fuzzy(self):
+
+        results = self.index.search('zorblax', 10)
+
+        self.assertEqual([result.name for result in results], [
+            'Zorblax', 'Zorblax Shard', 'Greater Zorblax Shard',
+            'Zorblux Shard',
+        ])
+        self.assertEqual([result.key[0] for result in results],
+                         [EXACT, PREFIX, SUBSTRING, FUZZY])
+
+    def test_short_queries_match_prefixes(self):
+
+        results = self.index.search('Zo', 10)
+
+        self.assertEqual([result.name for result in results],
+                         ['Zorblax', 'Zorblax Shard', 'Zorblux Shard'])
+
+    def test_substrings_within_words(self):
+
+        results = self.index.search('blax sh', 10)
+
+        self.assertEqual([result.name for result in results],
+                         ['Zorblax Shard', 'Greater Zorblax Shard'])
+
+    def test_pages_into_fuzzy_matches(self):
+
+        first = self.index.search('zorblax', 3)
+        second = self.index.search('zorblax', 3, after=first[-1].key)
+
+        self.assertEqual([result.name for result in second],
+                         ['Zorblux Shard'])
+
+    def test_pages_never_repeat_items(self):
+
+        index = TrigramIndex([(1, 'Xtidal cord'), (2, 'Cord Tidal'),
+                              (3, 'Tidel Cord'), *ITEMS])
+
+        for query in ('tidal cord', 'zorblax', 'zo'):
+            for limit in (1, 2, 3):
+                ids = []
+                after = None
+
+                while True:
+                    page = index.search(query, limit, after)
+                    ids += [result.id for result in page]
+
+                    if len(page) < limit:
+                        break
+
+                    after = page[-1].key
+
+                self.assertEqual(
+                    ids, [result.id for result in index.search(query, 10)],
+                    (query, limit)
+                )
+
+    def test_no_match(self):
+
+        self.assertEqual(self.index.search('quux', 10), [])
+
+
+class PostgresSearchTestCase(unittest.TestCase):
+    """Checks the pg_trgm search against `TrigramIndex`, which it is
+    meant to rank like."""
+
+    QUERIES = ('zorblax', 'ZORBLAX', 'Zo', 'blax sh', 'zorblux shard',
+               'zorblux', 'quux')
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.context = self.app.app_context()
+        self.context.push()
+
+        if not has_trigram_index():
+            self.context.pop()
+            self.skipTest('ix_items_name_trgm does not exist, pg_trgm is '
+                          'not installed.')
+
+        for id, name in ITEMS:
+            db.session.add(Item(id=id, name=name))
+
+        db.session.commit()
+
+        # Over every item, like the index `find_items` falls back on
+        self.index = TrigramIndex(
+            db.session.query(Item.id, Item.name).order_by(Item.id)
+        )
+
+    def tearDown(self):
+        Item.query.filter(Item.id.in_([id for id, _ in ITEMS])).delete()
+        db.session.commit()
+        self.context.pop()
+
+    def test_uses_trigram_index(self):
+
+        self.assertEqual(find_items('zorblax', 10),
+                         _find_items_postgres('zorblax', 10, None))
+
+    def test_ranks_like_trigram_index(self):
+
+        for query in self.QUERIES:
+            results = _find_items_postgres(query, 10, None)
+
+            self.assertEqual(results, self.index.search(query, 10), query)
+
+        self.assertEqual(
+            [result.key[0] for result in
+             _find_items_postgres('zorblax', 10, None)],
+            [EXACT, PREFIX, SUBSTRING, FUZZY]
+        )
+
+    def test_pages_like_trigram_index(self):
+
+        for query in self.QUERIES:
+            for limit in (1, 2, 3):
+                after = None
+
+                while True:
+                    page = _find_items_postgres(query, limit, after)
+
+                    self.assertEqual(page,
+                                     self.index.search(query, limit, after),
+                                     (query, limit, after))
+
+                    if len(page) < limit:
+                        break
+
+                    after = page[-1].key
+
+
+class SearchRouteTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.client = self.app.test_client
+
+        with self.app.app_context():
+            self.headers = {'Authorization': get_token('admin')}
+
+            for id, name in ITEMS:
+                db.session.add(Item(id=id, name=name))
+
+            db.session.commit()
+
+    def tearDown(self):
+        with self.app.app_context():
+            Item.query.filter(Item.id.in_([id for id, _ in ITEMS])).delete()
+            db.session.commit()
+
+    def search(self, query: str):
+        res = self.client().get(f'/items/search?{query}',
+                                headers=self.headers)
+        return res.status_code, json.loads(res.data)
+
+    def test_search_items(self):
+
+        status, data = self.search('q=ZORBLAX')
+
+        self.assertEqual(status, 200)
+        self.assertTrue(data['success'])
+        self.assertEqual(data['items'], [
+            {'id': 2_100_000_200, 'name': 'Zorblax'},
+            {'id': 2_100_000_201, 'name': 'Zorblax Shard'},
+            {'id': 2_100_000_202, 'name': 'Greater Zorblax Shard'},
+            {'id': 2_100_000_203, 'name': 'Zorblux Shard'},
+        ])
+        self.assertIsNone(data['next'])
+
+    def test_search_items_pages(self):
+
+        status, first = self.search('q=zorblax&limit=3')
+        _, second = self.search(f"q=zorblax&limit=3&after={first['next']}")
+
+        self.assertEqual(status, 200)
+        self.assertEqual([item['id'] for item in first['items']],
+                         [2_100_000_200, 2_100_000_201, 2_100_000_202])
+        self.assertEqual([item['id'] for item in second['items']],
+                         [2_100_000_203])
+        self.assertIsNone(second['next'])
+
+    def test_search_sees_renamed_items(self):
+
+        self.search('q=zorblax')
+
+        with self.app.app_context():
+            Item.query.filter(Item.id == 2_100_000_200).one().name = 'Quill'
+            db.session.commit()
+
+        _, data = self.search('q=zorblax')
+
+        self.assertNotIn(2_100_000_200, [item['id'] for item in data['items']])
+
+    def test_trigram_index_looked_up_once(self):
+
+        with self.app.app_context():
+            engine = db.engine
+
+        self.search('q=zorblax')
+
+        # Another query, so the response is not served from the cache
+        with count_queries(engine) as statements:
+            self.search('q=zorblux')
+
+        self.assertFalse([statement for statement in statements
+                          if 'to_regclass' in statement])
+
+    def test_400_search_items(self):
+
+        for query in ('', 'q=%20', 'q=zorblax&limit=0',
+                      'q=zorblax&after=WzFd'):
+            self.assertEqual(self.search(query)[0], 400, query)
+
+    def test_404_search_items(self):
+
+        status, data = self.search('q=quuxquux')
+
+        self.assertEqual(status, 404)
+        self.assertFalse(data['success'])
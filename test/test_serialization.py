@@ -0,0 +1,95 @@
+import json
+import unittest
+from datetime import datetime
+from decimal import Decimal
+
+from backend import create_app
+from backend.database.models import Auction
+from backend.services.serialization import (
+    FieldError,
+    JSONProvider,
+    ORJSONProvider,
+    create_provider,
+    get_fields,
+    with_columns
+)
+from backend.services.serialization.serialization import orjson
+
+PAYLOAD = {
+    'id': 1,
+    'name': 'Blackrock Ore',
+    'timestamp': datetime(2021, 7, 18, 22, 11, 33),
+    'precise': datetime(2021, 7, 18, 22, 11, 33, 250),
+    'quantity': Decimal('12'),
+    'mean': Decimal('1.5')
+}
+
+EXPECTED = {
+    'id': 1,
+    'name': 'Blackrock Ore',
+    'timestamp': '2021-07-18T22:11:33',
+    'precise': '2021-07-18T22:11:33.000250',
+    'quantity': 12,
+    'mean': 1.5
+}
+
+
+class JSONProviderTestCase(unittest.TestCase):
+
+    def test_stdlib_encodes_iso_timestamps(self):
+
+        data = JSONProvider().dumps(PAYLOAD)
+
+        self.assertEqual(json.loads(data), EXPECTED)
+
+    @unittest.skipIf(orjson is None, 'orjson is not installed')
+    def test_orjson_matches_stdlib(self):
+
+        self.assertEqual(json.loads(ORJSONProvider().dumps(PAYLOAD)),
+                         EXPECTED)
+        self.assertEqual(ORJSONProvider(sort_keys=True).dumps(PAYLOAD),
+                         JSONProvider(sort_keys=True).dumps(PAYLOAD))
+
+    def test_create_provider(self):
+
+        self.assertEqual(create_provider('stdlib').name, 'stdlib')
+        self.assertEqual(create_provider('auto').name,
+                         'orjson' if orjson is not None else 'stdlib')
+
+        with self.assertRaises(ValueError):
+            create_provider('simplejson')
+
+    def test_jsonify_response(self):
+
+        app = create_app('config/testing.py')
+
+        with app.app_context():
+            res = app.extensions['json'].response(success=True)
+
+        self.assertEqual(res.mimetype, 'application/json')
+        self.assertEqual(json.loads(res.get_data()), {'success': True})
+
+
+class FieldsTestCase(unittest.TestCase):
+
+    def test_get_fields(self):
+
+        columns = get_fields('quantity, id,quantity', Auction.columns())
+
+        self.assertEqual(columns, (Auction.quantity, Auction.id))
+        self.assertEqual(get_fields(None, Auction.columns()),
+                         Auction.columns())
+
+    def test_unknown_field(self):
+
+        with self.assertRaises(FieldError):
+            get_fields('id,password', Auction.columns())
+
+        with self.assertRaises(FieldError):
+            get_fields(',', Auction.columns())
+
+    def test_with_columns(self):
+
+        columns = with_columns((Auction.id,), Auction.timestamp, Auction.id)
+
+        self.assertEqual(columns, (Auction.id, Auction.timestamp))
@@ -0,0 +1,136 @@
+import json
+import unittest
+from datetime import datetime, timedelta
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Auction, Item, SnapshotDiff
+from backend.services.snapshots import (
+    compute_snapshot_diff,
+    fetch_snapshot_diff
+)
+from .utils.auth import get_token
+
+ITEM_ID = 2_100_000_000
+PREVIOUS = datetime(2001, 1, 1)
+TIMESTAMP = PREVIOUS + timedelta(hours=1)
+
+
+def auction(id, timestamp, time_left='LONG', bid=None, buyout=None,
+            unit_price=None, quantity=1):
+    return Auction(id=id, timestamp=timestamp, bid=bid, buyout=buyout,
+                   unit_price=unit_price, quantity=quantity,
+                   time_left=time_left, item_id=ITEM_ID)
+
+
+class SnapshotDiffTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.client = self.app.test_client
+
+        with self.app.app_context():
+            self.headers = {'Authorization': get_token('premium')}
+
+        db.session.add(Item(id=ITEM_ID, name='Diffed item'))
+        db.session.add_all([
+            # Could have run out within the hour
+            auction(1, PREVIOUS, 'SHORT', unit_price=10),
+            auction(7, PREVIOUS, 'MEDIUM', unit_price=10),
+            # Could not have
+            auction(2, PREVIOUS, 'LONG', unit_price=10),
+            # Replaced by a stack of the same item and size, 6
+            auction(3, PREVIOUS, 'VERY_LONG', buyout=500, quantity=5),
+            auction(4, PREVIOUS, bid=100, buyout=900),
+            auction(5, PREVIOUS, bid=100, buyout=900),
+            auction(4, TIMESTAMP, bid=100, buyout=900),
+            auction(5, TIMESTAMP, bid=150, buyout=900),
+            auction(6, TIMESTAMP, 'VERY_LONG', buyout=450, quantity=5),
+            auction(8, TIMESTAMP, 'VERY_LONG', unit_price=10),
+        ])
+        db.session.commit()
+
+    def tearDown(self):
+        db.session.rollback()
+        Auction.query.filter(Auction.item_id == ITEM_ID).delete()
+        SnapshotDiff.query.filter(SnapshotDiff.timestamp <= TIMESTAMP) \
+            .delete()
+        Item.query.filter(Item.id == ITEM_ID).delete()
+        db.session.commit()
+
+    def test_compute_snapshot_diff(self):
+
+        diff = compute_snapshot_diff(TIMESTAMP)
+
+        self.assertEqual(diff['previous_timestamp'], PREVIOUS)
+        self.assertEqual(diff['new'], [6, 8])
+        self.assertEqual(diff['sold'], [2])
+        self.assertEqual(diff['expired'], [1, 7])
+        self.assertEqual(diff['relisted'], [3])
+        self.assertEqual(diff['price_changed'], [5])
+
+    def test_longer_gap_expires_more(self):
+
+        later = TIMESTAMP + timedelta(hours=3)
+        db.session.add(auction(4, later, bid=100, buyout=900))
+        db.session.commit()
+
+        # LONG auctions have at least two hours left, VERY_LONG twelve
+        diff = compute_snapshot_diff(later)
+
+        self.assertEqual(diff['previous_timestamp'], TIMESTAMP)
+        self.assertEqual(diff['expired'], [5])
+        self.assertEqual(diff['sold'], [6, 8])
+
+    def test_no_previous_snapshot(self):
+
+        self.assertIsNone(compute_snapshot_diff(PREVIOUS))
+        self.assertIsNone(compute_snapshot_diff(datetime(2001, 1, 2)))
+
+    def test_get_snapshot_diff(self):
+
+        res = self.client().get(f'/snapshots/{TIMESTAMP.isoformat()}/diff',
+                                headers=self.headers)
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(data['previous_timestamp'], PREVIOUS.isoformat())
+        self.assertEqual(data['counts'], {'new': 2, 'sold': 1, 'expired': 2,
+                                          'relisted': 1, 'price_changed': 1})
+        self.assertEqual(data['new'], [6, 8])
+        self.assertIsNotNone(SnapshotDiff.query.get(TIMESTAMP))
+
+    def test_get_snapshot_diff_with_offset(self):
+
+        for timestamp in (f'{TIMESTAMP.isoformat()}+00:00',
+                          f'{TIMESTAMP.isoformat()}Z',
+                          '2001-01-01T02:00:00+01:00'):
+            res = self.client().get(f'/snapshots/{timestamp}/diff',
+                                    headers=self.headers)
+            data = json.loads(res.data)
+
+            self.assertEqual(res.status_code, 200)
+            self.assertEqual(data['timestamp'], TIMESTAMP.isoformat())
+            self.assertEqual(data['new'], [6, 8])
+
+    def test_404_get_snapshot_diff(self):
+
+        res = self.client().get(f'/snapshots/{PREVIOUS.isoformat()}/diff',
+                                headers=self.headers)
+
+        self.assertEqual(res.status_code, 404)
+
+    def test_400_get_snapshot_diff(self):
+
+        res = self.client().get('/snapshots/yesterday/diff',
+                                headers=self.headers)
+
+        self.assertEqual(res.status_code, 400)
+
+    def test_write_invalidates_stored_diff(self):
+
+        fetch_snapshot_diff(TIMESTAMP)
+        auction(9, TIMESTAMP, unit_price=10).insert()
+
+        self.assertIsNone(SnapshotDiff.query.get(TIMESTAMP))
+        self.assertEqual(fetch_snapshot_diff(TIMESTAMP)['new'], [6, 8, 9])
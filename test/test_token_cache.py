@@ -0,0 +1,89 @@
+import unittest
+
+from backend import create_app
+from backend.services.auth import TokenCache
+from .test_jwks import FakeClock
+from .utils.auth import get_token
+
+
+class TokenCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.clock = FakeClock()
+        self.cache = TokenCache(max_size=2, max_age=60, clock=self.clock)
+
+    def test_get_put(self):
+
+        self.assertIsNone(self.cache.get('token-1'))
+        self.cache.put('token-1', {'sub': 'user-1'})
+
+        self.assertEqual(self.cache.get('token-1'), {'sub': 'user-1'})
+        self.assertEqual(self.cache.stats, {'hits': 1, 'misses': 1})
+
+    def test_expires_at_max_age(self):
+
+        self.cache.put('token-1', {'sub': 'user-1'})
+        self.clock.now = 60
+
+        self.assertIsNone(self.cache.get('token-1'))
+
+    def test_expires_at_exp_claim(self):
+
+        self.cache.put('token-1', {'sub': 'user-1', 'exp': 10})
+        self.clock.now = 10
+
+        self.assertIsNone(self.cache.get('token-1'))
+
+    def test_expired_token_not_cached(self):
+
+        self.clock.now = 20
+        self.cache.put('token-1', {'sub': 'user-1', 'exp': 10})
+
+        self.assertEqual(self.cache.backend.stats['entries'], 0)
+
+    def test_evicts_least_recently_used(self):
+
+        self.cache.put('token-1', {'sub': 'user-1'})
+        self.cache.put('token-2', {'sub': 'user-2'})
+        self.cache.get('token-1')
+        self.cache.put('token-3', {'sub': 'user-3'})
+
+        self.assertIsNotNone(self.cache.get('token-1'))
+        self.assertIsNone(self.cache.get('token-2'))
+        self.assertIsNotNone(self.cache.get('token-3'))
+
+    def test_disabled(self):
+        cache = TokenCache(max_size=0)
+        cache.put('token-1', {'sub': 'user-1'})
+
+        self.assertIsNone(cache.get('token-1'))
+
+
+class RequiresAuthCacheTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.client = self.app.test_client
+        self.token_cache = self.app.extensions['token_cache']
+
+        with self.app.app_context():
+            self.token = get_token('public')
+
+    def test_repeat_token_uses_cache(self):
+
+        for _ in range(3):
+            res = self.client().get('/items',
+                                    headers={'Authorization': self.token})
+            self.assertEqual(res.status_code, 403)
+
+        self.assertEqual(self.token_cache.stats['hits'], 2)
+
+    def test_rejected_token_not_cached(self):
+
+        headers = {'Authorization': self.token[:-4] + 'AAAA'}
+
+        for _ in range(2):
+            res = self.client().get('/items', headers=headers)
+            self.assertIn(res.status_code, (400, 401))
+
+        self.assertEqual(self.token_cache.backend.stats['entries'], 0)
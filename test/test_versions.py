@@ -0,0 +1,188 @@
+import json
+import os
+import tempfile
+import unittest
+
+from sqlalchemy import text
+
+from backend import create_app
+from backend.database import db
+from backend.database.models import Item
+from backend.database.versions import (
+    TableVersions,
+    mark_changed,
+    table_versions
+)
+from .test_jwks import FakeClock
+from .test_routes import cleanup_db, populate_db
+from .utils.auth import get_token
+
+ITEM_ID = 2_100_000_500
+OTHER_ID = 2_100_000_501
+
+
+def insert_elsewhere(id: int, name: str):
+    """Inserts an item through a connection of its own, as another
+    process or psql would."""
+    with db.engine.begin() as connection:
+        connection.execute(text(
+            'INSERT INTO items (id, name) VALUES (:id, :name)'
+        ), {'id': id, 'name': name})
+
+
+class TableVersionsTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.context = self.app.app_context()
+        self.context.push()
+
+        self.clock = FakeClock()
+        self.versions = TableVersions(self.clock)
+        self.versions.configure(poll_interval=1)
+
+    def tearDown(self):
+        Item.query.filter(Item.id.in_([ITEM_ID, OTHER_ID])).delete()
+        db.session.commit()
+        self.context.pop()
+
+    def test_other_writes_seen_within_poll_interval(self):
+
+        token = self.versions.token(('items',))
+        insert_elsewhere(ITEM_ID, 'Versioned Veil')
+
+        self.assertEqual(self.versions.token(('items',)), token)
+
+        self.clock.now += 1
+
+        self.assertNotEqual(self.versions.token(('items',)), token)
+        self.assertTrue(self.versions.changed_within(('items',), 1))
+
+        self.clock.now += 1
+
+        self.assertFalse(self.versions.changed_within(('items',), 1))
+
+    def test_other_writes_bumped_as_they_commit(self):
+
+        self.versions.configure(poll_interval=0)
+        version = self.versions.get('items')
+
+        with db.engine.begin() as connection:
+            connection.execute(text(
+                "INSERT INTO items (id, name) VALUES (:id, 'Versioned Veil')"
+            ), {'id': ITEM_ID})
+
+            # Not before, or the rows read meanwhile would be cached under
+            # the new version
+            self.assertEqual(self.versions.get('items'), version)
+
+        self.assertGreater(self.versions.get('items'), version)
+
+    def test_concurrent_writers_do_not_wait(self):
+
+        with db.engine.connect() as first, db.engine.connect() as second:
+            first_transaction = first.begin()
+            second_transaction = second.begin()
+            second.execute(text("SET LOCAL lock_timeout = '1s'"))
+
+            for connection, id in ((first, ITEM_ID), (second, OTHER_ID)):
+                connection.execute(text(
+                    "INSERT INTO items (id, name) VALUES (:id, 'Veil')"
+                ), {'id': id})
+
+            # Would time out if the first writer held a lock on a version
+            second_transaction.commit()
+            first_transaction.commit()
+
+    def test_commit_bumps_once_and_is_seen_right_away(self):
+
+        version = table_versions.get('items')
+
+        db.session.add(Item(id=ITEM_ID, name='Versioned Veil'))
+        db.session.flush()
+        db.session.add(Item(id=OTHER_ID, name='Versioned Visor'))
+        db.session.commit()
+
+        self.assertEqual(table_versions.get('items'), version + 1)
+        self.assertEqual(db.session.info['committed_versions']['items'],
+                         version + 1)
+
+    def test_tables_marked_changed_are_bumped(self):
+
+        version = table_versions.get('item_price_stats')
+
+        # Nothing written, like a dropped partition
+        mark_changed('item_price_stats')
+        db.session.commit()
+
+        self.assertEqual(table_versions.get('item_price_stats'), version + 1)
+
+
+class OtherProcessWritesTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.client = self.app.test_client
+
+        with self.app.app_context():
+            self.headers = {'Authorization': get_token('premium')}
+
+        self.items, self.auctions = populate_db()
+        self.items.append(ITEM_ID)
+
+    def tearDown(self):
+        table_versions.configure(
+            self.app.config['CACHE_VERSION_POLL_INTERVAL']
+        )
+        cleanup_db(self)
+
+    def test_cached_response_invalidated(self):
+
+        first = self.client().get('/items', headers=self.headers)
+
+        with self.app.app_context():
+            insert_elsewhere(ITEM_ID, 'Versioned Veil')
+
+        # Seen on the next poll
+        table_versions.configure(poll_interval=0)
+        res = self.client().get(
+            '/items',
+            headers={**self.headers, 'If-None-Match': first.headers['ETag']}
+        )
+        data = json.loads(res.data)
+
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.headers['X-Cache'], 'MISS')
+        self.assertIn(ITEM_ID, [item['id'] for item in data['items']])
+
+
+class LocalVersionsTestCase(unittest.TestCase):
+    """Databases without sequences, where each process counts its own
+    commits."""
+
+    def setUp(self):
+        self.app = create_app('config/testing.py')
+        self.directory = tempfile.TemporaryDirectory()
+        self.app.config['SQLALCHEMY_DATABASE_URI'] = \
+            'sqlite:///' + os.path.join(self.directory.name, 'test.db')
+        self.context = self.app.app_context()
+        self.context.push()
+
+        Item.__table__.create(db.engine)
+
+    def tearDown(self):
+        db.session.remove()
+        db.engine.dispose()
+        self.context.pop()
+        self.directory.cleanup()
+
+    def test_commits_are_counted(self):
+
+        token = table_versions.token(('items',))
+        version = table_versions.get('items')
+
+        db.session.add(Item(id=ITEM_ID, name='Versioned Veil'))
+        db.session.commit()
+
+        self.assertEqual(table_versions.get('items'), version + 1)
+        self.assertNotEqual(table_versions.token(('items',)), token)
@@ -5,10 +5,12 @@ from jose import jwt
 
 payloads = {
     'public': {
+        'sub': 'auth0|public',
         'aud': 'wow-auctions',
         'permissions': []
     },
     'free': {
+        'sub': 'auth0|free',
         'aud': 'wow-auctions',
         'permissions': [
             'get:auction',
@@ -16,6 +18,7 @@ payloads = {
         ]
     },
     'premium': {
+        'sub': 'auth0|premium',
         'aud': 'wow-auctions',
         'permissions': [
             'get:auctions',
@@ -25,6 +28,7 @@ payloads = {
         ]
     },
     'admin': {
+        'sub': 'auth0|admin',
         'aud': 'wow-auctions',
         'permissions': [
             'get:auctions',
@@ -36,23 +40,31 @@ payloads = {
             'post:items',
             'get:item',
             'patch:item',
-            'delete:item'
+            'delete:item',
+            'get:metrics'
         ]
     }
 }
 
 
-def get_token(user: str) -> str:
+def get_token(user: str, subject: bool = True) -> str:
     """Returns a valid JWT for testing purposes.
 
     Args:
         user (str): User to request token for.
+        subject (bool, optional): Whether the token has a `sub` claim.
+        Defaults to True.
 
     Returns:
         str: A JWT.
     """
+    payload = dict(payloads[user.lower()])
+
+    if not subject:
+        del payload['sub']
+
     token = jwt.encode(
-        payloads[user.lower()],
+        payload,
         os.environ.get('SIGNING_PRIV_KEY'),
         algorithm=current_app.config['AUTH_ALGORITHM']
     )
@@ -0,0 +1,50 @@
+from contextlib import contextmanager
+
+from sqlalchemy import event
+
+from backend.database import db
+
+
+@contextmanager
+def count_queries(engine=None):
+    """Records the SQL statements executed within the block.
+
+    Args:
+        engine (Engine, optional): Engine to watch. Defaults to the one of
+        the current app.
+
+    Yields:
+        list: The executed statements, filled in as they run.
+    """
+    engine = engine or db.engine
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(engine, 'before_cursor_execute', record)
+
+    try:
+        yield statements
+    finally:
+        event.remove(engine, 'before_cursor_execute', record)
+
+
+@contextmanager
+def assert_max_queries(test, maximum: int, engine=None):
+    """Fails a test if the block runs more than `maximum` SQL statements.
+
+    Args:
+        test (TestCase): The running test.
+        maximum (int): Number of statements allowed.
+        engine (Engine, optional): Engine to watch. Defaults to the one of
+        the current app.
+    """
+    with count_queries(engine) as statements:
+        yield statements
+
+    test.assertLessEqual(
+        len(statements), maximum,
+        f'{len(statements)} queries instead of at most {maximum}:\n' +
+        '\n'.join(statements)
+    )